@@ -1,5 +1,339 @@
 # app/db.py
-from app.supabase_client import supabase
+import datetime
+import logging
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Optional
+
+from app.utils.cache import TTLCache
+from app.utils.profiler import InstrumentedClient
+from app.utils.parallel import get_executor
+from app.utils.product_search import ProductIndex
+from app.utils.stock_matrix import StockMatrix, stock_deltas
+
+logger = logging.getLogger(__name__)
+
+# Tabel referensi per toko yang dibaca hampir di setiap rerun halaman transaksi
+REFERENCE_TABLES = ("warehouse_list", "supplier", "accounts", "product")
+
+# Hasil query dashboard (lihat cached_dashboard_query), dipakai sebagai "tabel" di RPC_WRITES
+DASHBOARD = "dashboard"
+
+# Tabel referensi (dan DASHBOARD) yang ikut berubah ketika RPC tertentu berhasil dijalankan
+RPC_WRITES = {
+    "record_sale_transaction_multi": ("accounts", DASHBOARD),
+    "record_other_sale": ("accounts", DASHBOARD),
+    "record_purchase_transaction_multi": ("accounts", DASHBOARD),
+    "record_purchase_return": ("accounts", DASHBOARD),
+    "record_sale_return": ("accounts", DASHBOARD),
+    "record_stock_adjustment": (DASHBOARD,),
+    "bulk_import_smart": ("product", "supplier", "accounts", DASHBOARD),
+    "record_customer_payment": ("accounts",),
+    "record_supplier_payment": ("accounts",),
+    "record_operational_expense": ("accounts", DASHBOARD),
+    "adjust_account_balance": ("accounts",),
+    "transfer_funds": ("accounts",),
+    "create_default_cash_account": ("accounts",),
+    "update_supplier": ("supplier",),
+    "delete_supplier_permanent": ("supplier",),
+    "update_warehouse": ("warehouse_list",),
+    "delete_warehouse_permanent": ("warehouse_list", "product"),
+    "migrate_all_warehouse_stock": ("product",),
+    "migrate_product_stock": ("product",),
+    "delete_store_cascade": REFERENCE_TABLES + (DASHBOARD,),
+}
+
+_reference_cache = TTLCache(maxsize=256, ttl=300)
+# Naik setiap kali cache (tabel, toko) dibuang; hasil fetch yang dimulai sebelum itu tidak disimpan
+_reference_generation: Counter = Counter()
+_client: Optional[InstrumentedClient] = None
+_client_lock = threading.Lock()
 
 def get_client():
-    return supabase
\ No newline at end of file
+    """Client database dengan pencatatan waktu, jumlah baris dan ukuran respons setiap query.
+
+    Client (dan library supabase) baru dibuat saat pertama kali dibutuhkan, sehingga
+    halaman login bisa tampil tanpa menunggu import dan koneksi database.
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from app.supabase_client import supabase
+                _client = InstrumentedClient(supabase)
+    return _client
+
+def _reference_rows(table: str, store: str, columns: str, order: str = None) -> list:
+    # List yang dikembalikan adalah objek di cache: jangan diubah. Objek baru = versi data baru.
+    key = (table, store, columns, order)
+    rows = _reference_cache.get(key)
+    if rows is None:
+        generation = _reference_generation[table, store]
+        query = get_client().table(table).select(columns).eq("store", store)
+        if order:
+            query = query.order(order)
+        rows = query.execute().data or []
+        if _reference_generation[table, store] == generation:
+            _reference_cache.set(key, rows)
+    return rows
+
+def fetch_reference(table: str, store: str, columns: str, order: str = None) -> list:
+    """Ambil data referensi toko (gudang, supplier, rekening, produk) lewat cache bersama."""
+    return list(_reference_rows(table, store, columns, order))
+
+# Kolom produk untuk semua picker produk, agar satu toko cukup punya satu cache dan satu index.
+# Stok sengaja tidak ikut: stok dibaca dari stock_matrix sehingga transaksi tidak membuang katalog
+PRODUCT_COLUMNS = "productid, productname, type, size, brand, harga"
+_product_indexes: dict = {}
+_product_index_lock = threading.Lock()
+
+def product_index(store: str) -> ProductIndex:
+    """Index pencarian produk toko, dipakai bersama semua sesi. Diperiksa ulang setiap kali
+    katalog di cache berganti (TTL habis atau invalidate_reference/invalidate_after_rpc)."""
+    rows = _reference_rows("product", store, PRODUCT_COLUMNS, order="productname")
+    index = _product_indexes.get(store)
+    if index is not None and index.rows is rows:
+        return index
+    with _product_index_lock:
+        index = _product_indexes.get(store)
+        # Perubahan harga saja cukup mengganti baris; index dibangun ulang jika
+        # produk atau kolom yang dicari berubah
+        if index is None or not index.refresh(rows):
+            index = ProductIndex(rows)
+            _product_indexes[store] = index
+    return index
+
+# Matriks stok produk x gudang per toko. Transaksi dari aplikasi ini diterapkan sebagai
+# delta; perubahan dari luar (perangkat/proses lain) tertangkap saat revalidasi berkala.
+STOCK_REVALIDATE_SECONDS = 120
+STOCK_PAGE_SIZE = 1000
+_stock_matrices: dict = {}
+_stock_reloading: set = set()
+_stock_lock = threading.Lock()
+
+def _load_stock_matrix(store: str) -> StockMatrix:
+    warehouse_ids = [w["warehouseid"] for w in _reference_rows("warehouse_list", store, "warehouseid, name", order="name")]
+    rows = []
+    while warehouse_ids:
+        page = get_client().table("product_warehouse").select("productid, warehouseid, quantity").in_(
+            "warehouseid", warehouse_ids
+        ).order("productid").order("warehouseid").range(len(rows), len(rows) + STOCK_PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < STOCK_PAGE_SIZE:
+            break
+    return StockMatrix(warehouse_ids, rows)
+
+def _revalidate_stock_matrix(store: str):
+    with _stock_lock:
+        if store in _stock_reloading:
+            return
+        _stock_reloading.add(store)
+
+    def reload():
+        try:
+            _stock_matrices[store] = _load_stock_matrix(store)
+        except Exception as e:
+            logger.warning(f"Gagal memuat ulang stok toko {store}: {e}")
+        finally:
+            _stock_reloading.discard(store)
+
+    get_executor().submit(reload)
+
+def stock_matrix(store: str) -> StockMatrix:
+    """Stok semua produk di semua gudang toko. Pemanggilan pertama memuat matriks; setelah
+    STOCK_REVALIDATE_SECONDS data lama tetap dipakai sambil dimuat ulang di background."""
+    matrix = _stock_matrices.get(store)
+    if matrix is None:
+        with _stock_lock:
+            matrix = _stock_matrices.get(store)
+            if matrix is None:
+                matrix = _stock_matrices[store] = _load_stock_matrix(store)
+    elif time.monotonic() - matrix.loaded_at > STOCK_REVALIDATE_SECONDS:
+        _revalidate_stock_matrix(store)
+    return matrix
+
+def _update_stock_matrix(rpc_name: str, store: str, params: Optional[dict]):
+    matrix = _stock_matrices.get(store)
+    if matrix is None:
+        return
+    deltas = stock_deltas(rpc_name, params)
+    if deltas is None or not matrix.apply(deltas):
+        # Perubahan tidak bisa dihitung: muat ulang saat dibaca berikutnya
+        _stock_matrices.pop(store, None)
+
+def invalidate_reference(store: str, *tables: str):
+    """Buang cache referensi toko. Tanpa argumen tables, semua tabel toko tersebut dibuang."""
+    targets = set(tables or REFERENCE_TABLES)
+    for table in targets:
+        _reference_generation[table, store] += 1
+    _reference_cache.invalidate(lambda key: key[1] == store and key[0] in targets)
+
+# Hasil query dashboard admin per (toko, query, awal, akhir); rentang [awal, akhir) berupa teks
+# YYYY-MM-DD, None untuk query tanpa rentang. Rentang yang seluruhnya sudah lewat tidak berubah
+# oleh transaksi hari ini sehingga disimpan lama. Rentang yang mencakup hari ini dan query tanpa
+# rentang dibuang setiap kali RPC transaksi toko itu berhasil, begitu pula rentang yang memuat
+# tanggal transaksi mundur (parameter TRANSACTION_DATE_PARAMS).
+DASHBOARD_PAST_TTL = 24 * 3600
+DASHBOARD_CURRENT_TTL = 300
+TRANSACTION_DATE_PARAMS = ("p_transaction_date", "p_return_date", "p_expense_date", "p_import_date")
+_dashboard_cache = TTLCache(maxsize=1024, ttl=DASHBOARD_CURRENT_TTL)
+# Naik setiap kali hasil dashboard toko dibuang; hasil yang mulai dihitung sebelum itu tidak disimpan
+_dashboard_generation: Counter = Counter()
+_MISSING = object()
+# Hari yang berubah per toko sejak terakhir diambil pop_changed_days (None = semua hari)
+_changed_days: dict = {}
+_changed_days_lock = threading.Lock()
+
+def cached_dashboard_query(store: str, name: str, start_date: Optional[str], end_date: Optional[str], compute):
+    """Hasil compute() untuk (toko, query, rentang), dari cache jika ada."""
+    key = (store, name, start_date, end_date)
+    result = _dashboard_cache.get(key, _MISSING)
+    if result is _MISSING:
+        generation = _dashboard_generation[store]
+        result = compute()
+        if _dashboard_generation[store] == generation:
+            past = end_date is not None and end_date <= datetime.date.today().isoformat()
+            _dashboard_cache.set(key, result, ttl=DASHBOARD_PAST_TTL if past else None)
+    return result
+
+def _mark_changed_days(store: str, days):
+    now = time.time()
+    with _changed_days_lock:
+        if days is None:
+            _changed_days[store] = None
+            return
+        changed = _changed_days.setdefault(store, {})
+        if changed is not None:
+            changed.update((day, now) for day in days)
+
+def pop_changed_days(store: str):
+    """Hari transaksi toko yang berubah sejak pemanggilan sebelumnya, {YYYY-MM-DD: waktu
+    (time.time())}, atau None jika semua hari dianggap berubah. Dipakai app/rollups.py."""
+    with _changed_days_lock:
+        return _changed_days.pop(store, {})
+
+def dashboard_generation(store: str) -> int:
+    """Naik setiap kali transaksi toko membuang hasil dashboard; dipakai rollup dan fakta
+    penjualan untuk tahu bahwa refresh terakhir mungkin belum memuat transaksi itu."""
+    return _dashboard_generation[store]
+
+def invalidate_dashboard(store: str, days=None):
+    """Buang hasil dashboard toko yang mencakup hari ini atau salah satu `days` (YYYY-MM-DD).
+    Tanpa days, semua hasil toko tersebut dibuang."""
+    _dashboard_generation[store] += 1
+    today = datetime.date.today().isoformat()
+    _mark_changed_days(store, None if days is None else (today, *days))
+    if days is None:
+        _dashboard_cache.invalidate(lambda key: key[0] == store)
+        return
+
+    def affected(key):
+        key_store, _, start, end = key
+        if key_store != store:
+            return False
+        if start is None or end > today:
+            return True
+        return any(start <= day < end for day in days)
+
+    _dashboard_cache.invalidate(affected)
+
+def _transaction_days(params: Optional[dict]) -> tuple:
+    return tuple(str(params[name])[:10] for name in TRANSACTION_DATE_PARAMS if params and params.get(name))
+
+def invalidate_after_rpc(rpc_name: str, store: str, params: Optional[dict] = None):
+    """Panggil setelah RPC tulis berhasil agar pembacaan berikutnya mengambil data baru.
+    Dengan params, perubahan stok diterapkan langsung ke matriks stok tanpa memuat ulang."""
+    tables = RPC_WRITES.get(rpc_name)
+    if tables:
+        invalidate_reference(store, *tables)
+        if DASHBOARD in tables:
+            invalidate_dashboard(store, None if rpc_name == "delete_store_cascade" else _transaction_days(params))
+    _update_stock_matrix(rpc_name, store, params)
+
+# Agregat per grup: satu round trip per tab, menggantikan satu query per toko/supplier/gudang
+
+def count_staff_by_store() -> dict:
+    """Jumlah akun pegawai per toko, {store: jumlah}. Toko tanpa pegawai tidak muncul."""
+    rows = get_client().table("users").select("store").eq("role", "pegawai").execute().data or []
+    return dict(Counter(row["store"] for row in rows if row["store"]))
+
+def supplier_debt_totals(store: str) -> dict:
+    """Sisa hutang aktif per supplier toko, {supplierid: total_debt}."""
+    rows = get_client().rpc("get_suppliers_view", {"store_input": store}).execute().data or []
+    return {row["supplierid"]: row.get("total_debt") or 0 for row in rows}
+
+def warehouse_stock_totals(warehouse_ids) -> dict:
+    """Total unit dan jumlah jenis produk (stok > 0) per gudang, {warehouseid: {"total_stock", "product_count"}}."""
+    totals = {wid: {"total_stock": 0, "product_count": 0} for wid in warehouse_ids}
+    if not totals:
+        return totals
+    fetched = 0
+    while True:
+        page = get_client().table("product_warehouse").select("productid, warehouseid, quantity").in_(
+            "warehouseid", list(totals)
+        ).order("productid").order("warehouseid").range(fetched, fetched + STOCK_PAGE_SIZE - 1).execute().data or []
+        for row in page:
+            entry = totals[row["warehouseid"]]
+            entry["total_stock"] += row["quantity"]
+            if row["quantity"] > 0:
+                entry["product_count"] += 1
+        fetched += len(page)
+        if len(page) < STOCK_PAGE_SIZE:
+            return totals
+
+
+# Riwayat transaksi dengan keyset pagination. Setiap RPC riwayat diurutkan menurut
+# (tanggal, id) menurun; baris terakhir sebuah halaman menjadi cursor halaman berikutnya.
+HISTORY_KEYS = {
+    "get_sale_history": ("sale_date", "saleid"),
+    "get_purchase_history": ("purchase_date", "purchaseid"),
+    "get_stock_adjustment_history": ("adjusted_at", "adjustmentid"),
+    "get_purchase_return_history": ("return_date", "return_id"),
+    "get_sale_return_history": ("return_date", "return_id"),
+}
+HISTORY_PAGE_SIZE = 500
+
+# Filter riwayat berupa tuple (nama metode builder, *argumen), mis. ("ilike", "invoice_number", "*PO-1*").
+# Filter dijalankan PostgREST di atas hasil RPC sehingga hanya baris yang cocok yang dikirim.
+
+def _quote_filter_value(value: str) -> str:
+    escaped = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{escaped}"'
+
+def search_filter(term: str, columns) -> tuple:
+    """Cocokkan term (tanpa beda huruf besar/kecil) ke salah satu kolom."""
+    pattern = _quote_filter_value(f"*{term.strip()}*")
+    return ("or_", ",".join(f"{column}.ilike.{pattern}" for column in columns))
+
+def contains_filter(column: str, term: str) -> tuple:
+    return ("ilike", column, f"*{term.strip()}*")
+
+def equals_filter(column: str, value) -> tuple:
+    if isinstance(value, bool):
+        value = "true" if value else "false"
+    return ("eq", column, value)
+
+@dataclass
+class HistoryPage:
+    rows: list
+    cursor: Optional[tuple]  # None jika sudah halaman terakhir
+    total: Optional[int] = None
+
+def fetch_history_page(rpc_name: str, params: dict, cursor: Optional[tuple] = None,
+                       page_size: int = HISTORY_PAGE_SIZE, with_total: bool = False, filters=()) -> HistoryPage:
+    """Ambil satu halaman RPC riwayat setelah cursor (tanggal, id). with_total menghitung total baris (exact)."""
+    date_column, id_column = HISTORY_KEYS[rpc_name]
+    client = get_client()
+    query = client.rpc(rpc_name, params, count="exact") if with_total else client.rpc(rpc_name, params)
+    for method, *args in filters:
+        query = getattr(query, method)(*args)
+    if cursor is not None:
+        last_date, last_id = cursor
+        query = query.or_(f'{date_column}.lt."{last_date}",and({date_column}.eq."{last_date}",{id_column}.lt.{last_id})')
+    response = query.order(date_column, desc=True).order(id_column, desc=True).limit(page_size).execute()
+
+    rows = response.data or []
+    next_cursor = (rows[-1][date_column], rows[-1][id_column]) if len(rows) == page_size else None
+    return HistoryPage(rows, next_cursor, response.count if with_total else None)
@@ -0,0 +1,66 @@
+# Backend lokal berbasis SQLite yang meniru permukaan client supabase-py
+# (table().select()...execute(), rpc(...).execute()). Dipakai untuk development
+# tanpa koneksi internet, tes, dan benchmark yang bisa diulang.
+import os
+
+from .client import APIResponse, LocalAPIError, LocalClient
+
+__all__ = ["APIResponse", "LocalAPIError", "LocalClient", "create_local_client", "seed_demo_data"]
+
+
+def create_local_client(db_path: str = ":memory:") -> LocalClient:
+    """Buat LocalClient dan pastikan ada akun admin untuk login pertama kali."""
+    client = LocalClient(db_path)
+    if not client.query("SELECT 1 FROM users LIMIT 1"):
+        from werkzeug.security import generate_password_hash
+
+        password = os.getenv("LOCAL_ADMIN_PASSWORD", "admin123")
+        client.table("users").insert({
+            "username": os.getenv("LOCAL_ADMIN_USERNAME", "admin"),
+            "password": generate_password_hash(password, method='pbkdf2:sha256'),
+            "role": "admin",
+        }).execute()
+    return client
+
+
+def seed_demo_data(client: LocalClient, store: str = "Toko Demo", n_products: int = 200,
+                   n_sales: int = 2000, days: int = 180, seed: int = 42) -> dict:
+    """Isi satu toko dengan data acak yang deterministik (untuk benchmark)."""
+    import datetime
+    import random
+
+    rng = random.Random(seed)
+    warehouses = [
+        client.table("warehouse_list").insert({"store": store, "name": f"Gudang {i + 1}"}).execute().data[0]["warehouseid"]
+        for i in range(3)
+    ]
+    supplier_id = client.table("supplier").insert({"store": store, "suppliername": "Supplier Demo"}).execute().data[0]["supplierid"]
+    account_id = client.rpc("create_default_cash_account", {"p_store_name": store}).execute().data
+
+    products = client.table("product").insert([
+        {"store": store, "productname": f"Produk {i:04d}", "type": rng.choice(["Kaos", "Celana", "Jaket", "Topi"]),
+         "size": rng.choice(["S", "M", "L", "XL"]), "brand": f"Merek {i % 12}"}
+        for i in range(n_products)
+    ]).execute().data
+    product_ids = [p["productid"] for p in products]
+
+    start = datetime.datetime.now() - datetime.timedelta(days=days)
+    # Stok awal cukup untuk semua penjualan acak (maks. 3 unit per transaksi)
+    base_stock = 3 * n_sales // max(n_products, 1)
+    for warehouse_id in warehouses:
+        items = [{"product_id": pid, "quantity": base_stock + rng.randint(50, 200), "price": rng.randint(10, 200) * 1000} for pid in product_ids]
+        client.rpc("record_purchase_transaction_multi", {
+            "p_store": store, "p_supplier_id": supplier_id, "p_warehouse_id": warehouse_id, "p_items": items,
+            "p_payment_type": "credit", "p_transaction_date": start.isoformat(),
+        }).execute()
+
+    for _ in range(n_sales):
+        sale_date = start + datetime.timedelta(seconds=rng.randint(0, days * 86400))
+        product_id = rng.choice(product_ids)
+        client.rpc("record_sale_transaction_multi", {
+            "p_store": store, "p_warehouse_id": rng.choice(warehouses), "p_payment_type": "cash",
+            "p_account_id": account_id, "p_transaction_date": sale_date.isoformat(),
+            "p_items": [{"product_id": product_id, "quantity": rng.randint(1, 3), "price": rng.randint(15, 300) * 1000}],
+        }).execute()
+
+    return {"store": store, "warehouses": warehouses, "supplier_id": supplier_id, "account_id": account_id, "product_ids": product_ids}
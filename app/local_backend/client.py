@@ -0,0 +1,574 @@
+import fnmatch
+import inspect
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from .schema import DDL, BOOLEAN_COLUMNS, FOREIGN_KEYS
+
+
+class LocalAPIError(Exception):
+    """Padanan postgrest APIError: punya message, code, details dan hint."""
+
+    def __init__(self, message: str, code: Optional[str] = None, details: Optional[str] = None, hint: Optional[str] = None):
+        super().__init__(message)
+        self.message = message
+        self.code = code
+        self.details = details
+        self.hint = hint
+
+
+@dataclass
+class APIResponse:
+    data: Any
+    count: Optional[int] = None
+
+
+def parse_select(columns: str) -> list:
+    """Pecah string select PostgREST menjadi daftar kolom dan embed (nama, sub-select)."""
+    fields = []
+    depth = 0
+    current = ""
+    for char in columns:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            fields.append(current.strip())
+            current = ""
+        else:
+            current += char
+    if current.strip():
+        fields.append(current.strip())
+
+    parsed = []
+    for field in fields:
+        if "(" in field:
+            name, inner = field.split("(", 1)
+            parsed.append((name.strip(), parse_select(inner.rsplit(")", 1)[0])))
+        else:
+            parsed.append(field)
+    return parsed
+
+
+class LocalClient:
+    """Pengganti Client supabase-py yang disimpan di SQLite, untuk development, tes dan benchmark."""
+
+    def __init__(self, db_path: str = ":memory:"):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if db_path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.executescript(DDL)
+        self.lock = threading.RLock()
+        self._columns = {}
+
+    def table(self, name: str) -> "QueryBuilder":
+        return QueryBuilder(self, name)
+
+    def from_(self, name: str) -> "QueryBuilder":
+        return self.table(name)
+
+    def rpc(self, name: str, params: Optional[dict] = None, count: Optional[str] = None) -> "RPCBuilder":
+        return RPCBuilder(self, name, params or {}, count)
+
+    def columns(self, table: str) -> list:
+        if table not in self._columns:
+            rows = self.conn.execute(f"PRAGMA table_info({table})").fetchall()
+            if not rows:
+                raise LocalAPIError(f'relation "public.{table}" does not exist', code="42P01")
+            self._columns[table] = [row["name"] for row in rows]
+        return self._columns[table]
+
+    def primary_key(self, table: str) -> str:
+        return self.columns(table)[0]
+
+    def to_dict(self, table: str, row: sqlite3.Row) -> dict:
+        record = dict(row)
+        for column in BOOLEAN_COLUMNS.get(table, ()):
+            if record.get(column) is not None:
+                record[column] = bool(record[column])
+        return record
+
+    def query(self, sql: str, params: tuple = ()) -> list:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def transaction(self):
+        return _Transaction(self)
+
+
+class _Transaction:
+    def __init__(self, client: LocalClient):
+        self.client = client
+
+    def __enter__(self):
+        self.client.lock.acquire()
+        self.client.conn.execute("BEGIN IMMEDIATE")
+        return self.client.conn
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        try:
+            if exc_type is None:
+                self.client.conn.execute("COMMIT")
+            else:
+                self.client.conn.execute("ROLLBACK")
+        finally:
+            self.client.lock.release()
+        if isinstance(exc_val, sqlite3.IntegrityError):
+            raise _integrity_error(exc_val) from exc_val
+        return False
+
+
+def _integrity_error(error: sqlite3.IntegrityError) -> LocalAPIError:
+    message = str(error)
+    if "UNIQUE" in message:
+        return LocalAPIError(f"duplicate key value violates unique constraint ({message})", code="23505")
+    if "FOREIGN KEY" in message:
+        return LocalAPIError(f"insert or update violates foreign key constraint ({message})", code="23503")
+    return LocalAPIError(message, code="23000")
+
+
+_OPERATORS = {
+    "eq": "=",
+    "neq": "!=",
+    "gt": ">",
+    "gte": ">=",
+    "lt": "<",
+    "lte": "<=",
+    "like": "LIKE",
+}
+
+
+class QueryBuilder:
+    def __init__(self, client: LocalClient, table: str):
+        self.client = client
+        self.table_name = table
+        self.method = "select"
+        self.select_columns = "*"
+        self.count_mode = None
+        self.payload = None
+        self.filters = []
+        self.orders = []
+        self.limit_value = None
+        self.offset_value = None
+        self.single_row = False
+        self.maybe_single_row = False
+
+    # Metode operasi
+    def select(self, columns: str = "*", count: Optional[str] = None) -> "QueryBuilder":
+        self.method = "select"
+        self.select_columns = columns
+        self.count_mode = count
+        return self
+
+    def insert(self, data) -> "QueryBuilder":
+        self.method = "insert"
+        self.payload = data
+        return self
+
+    def upsert(self, data, on_conflict: Optional[str] = None) -> "QueryBuilder":
+        self.method = "upsert"
+        self.payload = data
+        return self
+
+    def update(self, data: dict) -> "QueryBuilder":
+        self.method = "update"
+        self.payload = data
+        return self
+
+    def delete(self) -> "QueryBuilder":
+        self.method = "delete"
+        return self
+
+    # Filter
+    def _filter(self, column: str, operator: str, value) -> "QueryBuilder":
+        self.filters.append((column, operator, value))
+        return self
+
+    def eq(self, column: str, value) -> "QueryBuilder":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value) -> "QueryBuilder":
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value) -> "QueryBuilder":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value) -> "QueryBuilder":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value) -> "QueryBuilder":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value) -> "QueryBuilder":
+        return self._filter(column, "lte", value)
+
+    def like(self, column: str, pattern: str) -> "QueryBuilder":
+        return self._filter(column, "like", pattern.replace("*", "%"))
+
+    def ilike(self, column: str, pattern: str) -> "QueryBuilder":
+        return self._filter(column, "ilike", pattern.replace("*", "%"))
+
+    def in_(self, column: str, values) -> "QueryBuilder":
+        return self._filter(column, "in", list(values))
+
+    def is_(self, column: str, value) -> "QueryBuilder":
+        return self._filter(column, "is", value)
+
+    # Modifier
+    def order(self, column: str, desc: bool = False, nullsfirst: bool = False) -> "QueryBuilder":
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, size: int) -> "QueryBuilder":
+        self.limit_value = size
+        return self
+
+    def range(self, start: int, end: int) -> "QueryBuilder":
+        self.offset_value = start
+        self.limit_value = end - start + 1
+        return self
+
+    def single(self) -> "QueryBuilder":
+        self.single_row = True
+        return self
+
+    def maybe_single(self) -> "QueryBuilder":
+        self.maybe_single_row = True
+        return self
+
+    def _where(self) -> tuple:
+        columns = self.client.columns(self.table_name)
+        clauses = []
+        params = []
+        for column, operator, value in self.filters:
+            if column not in columns:
+                raise LocalAPIError(f"column {self.table_name}.{column} does not exist", code="42703")
+            if operator == "in":
+                if not value:
+                    clauses.append("0")
+                    continue
+                clauses.append(f"{column} IN ({', '.join('?' for _ in value)})")
+                params.extend(value)
+            elif operator == "is":
+                clauses.append(f"{column} IS {'NULL' if value in (None, 'null') else '?'}")
+                if value not in (None, "null"):
+                    params.append(value)
+            elif operator == "ilike":
+                clauses.append(f"LOWER({column}) LIKE LOWER(?)")
+                params.append(value)
+            else:
+                clauses.append(f"{column} {_OPERATORS[operator]} ?")
+                params.append(value)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return where, params
+
+    def execute(self) -> APIResponse:
+        if self.method == "select":
+            with self.client.lock:
+                return self._execute_select()
+        with self.client.transaction():
+            return getattr(self, f"_execute_{self.method}")()
+
+    def _execute_select(self) -> APIResponse:
+        where, params = self._where()
+        sql = f"SELECT * FROM {self.table_name}{where}"
+        if self.orders:
+            sql += " ORDER BY " + ", ".join(f"{column} {'DESC' if desc else 'ASC'}" for column, desc in self.orders)
+        if self.limit_value is not None:
+            sql += f" LIMIT {int(self.limit_value)}"
+            if self.offset_value:
+                sql += f" OFFSET {int(self.offset_value)}"
+
+        rows = [self.client.to_dict(self.table_name, r) for r in self.client.conn.execute(sql, params).fetchall()]
+        count = None
+        if self.count_mode:
+            count = self.client.conn.execute(f"SELECT COUNT(*) FROM {self.table_name}{where}", params).fetchone()[0]
+
+        data = _project(self.client, self.table_name, rows, parse_select(self.select_columns))
+        return self._shape(data, count)
+
+    def _shape(self, data: list, count: Optional[int]) -> APIResponse:
+        if self.single_row:
+            if len(data) != 1:
+                raise LocalAPIError(
+                    "JSON object requested, multiple (or no) rows returned",
+                    code="PGRST116",
+                    details=f"The result contains {len(data)} rows",
+                )
+            return APIResponse(data[0], count)
+        if self.maybe_single_row:
+            return APIResponse(data[0] if data else None, count)
+        return APIResponse(data, count)
+
+    def _execute_insert(self) -> APIResponse:
+        records = self.payload if isinstance(self.payload, list) else [self.payload]
+        columns = self.client.columns(self.table_name)
+        inserted = []
+        for record in records:
+            unknown = [key for key in record if key not in columns]
+            if unknown:
+                raise LocalAPIError(f"Could not find the '{unknown[0]}' column of '{self.table_name}'", code="PGRST204")
+            keys = list(record.keys())
+            cursor = self.client.conn.execute(
+                f"INSERT INTO {self.table_name} ({', '.join(keys)}) VALUES ({', '.join('?' for _ in keys)})",
+                [record[key] for key in keys],
+            )
+            row = self.client.conn.execute(f"SELECT * FROM {self.table_name} WHERE rowid = ?", (cursor.lastrowid,)).fetchone()
+            inserted.append(self.client.to_dict(self.table_name, row))
+        return APIResponse(inserted)
+
+    def _execute_upsert(self) -> APIResponse:
+        records = self.payload if isinstance(self.payload, list) else [self.payload]
+        upserted = []
+        for record in records:
+            keys = list(record.keys())
+            cursor = self.client.conn.execute(
+                f"INSERT OR REPLACE INTO {self.table_name} ({', '.join(keys)}) VALUES ({', '.join('?' for _ in keys)})",
+                [record[key] for key in keys],
+            )
+            row = self.client.conn.execute(f"SELECT * FROM {self.table_name} WHERE rowid = ?", (cursor.lastrowid,)).fetchone()
+            upserted.append(self.client.to_dict(self.table_name, row))
+        return APIResponse(upserted)
+
+    def _execute_update(self) -> APIResponse:
+        where, params = self._where()
+        pk = self.client.primary_key(self.table_name)
+        ids = [r[0] for r in self.client.conn.execute(f"SELECT {pk} FROM {self.table_name}{where}", params).fetchall()]
+        if not ids:
+            return APIResponse([])
+        assignments = ", ".join(f"{key} = ?" for key in self.payload)
+        placeholders = ", ".join("?" for _ in ids)
+        self.client.conn.execute(
+            f"UPDATE {self.table_name} SET {assignments} WHERE {pk} IN ({placeholders})",
+            list(self.payload.values()) + ids,
+        )
+        rows = self.client.conn.execute(f"SELECT * FROM {self.table_name} WHERE {pk} IN ({placeholders})", ids).fetchall()
+        return APIResponse([self.client.to_dict(self.table_name, r) for r in rows])
+
+    def _execute_delete(self) -> APIResponse:
+        where, params = self._where()
+        rows = self.client.conn.execute(f"SELECT * FROM {self.table_name}{where}", params).fetchall()
+        self.client.conn.execute(f"DELETE FROM {self.table_name}{where}", params)
+        return APIResponse([self.client.to_dict(self.table_name, r) for r in rows])
+
+
+def _project(client: LocalClient, table: str, rows: list, fields: list) -> list:
+    """Terapkan daftar kolom select dan resolusikan embed lewat FOREIGN_KEYS."""
+    plain = [f for f in fields if isinstance(f, str)]
+    embeds = [f for f in fields if isinstance(f, tuple)]
+
+    for name, sub_fields in embeds:
+        many_to_one = [(c, pc) for (t, c), (pt, pc) in FOREIGN_KEYS.items() if t == table and pt == name]
+        one_to_many = [(c, pc) for (t, c), (pt, pc) in FOREIGN_KEYS.items() if t == name and pt == table]
+
+        if many_to_one:
+            local_col, remote_col = many_to_one[0]
+            keys = {r[local_col] for r in rows if r.get(local_col) is not None}
+            related = _fetch_related(client, name, remote_col, keys)
+            lookup = {r[remote_col]: r for r in related}
+            children = {k: v for k, v in zip(lookup.keys(), _project(client, name, list(lookup.values()), sub_fields))}
+            for r in rows:
+                r[name] = children.get(r.get(local_col))
+        elif one_to_many:
+            remote_col, local_col = one_to_many[0]
+            keys = {r[local_col] for r in rows if r.get(local_col) is not None}
+            related = _fetch_related(client, name, remote_col, keys)
+            projected = _project(client, name, [dict(r) for r in related], sub_fields + [remote_col])
+            grouped = {}
+            for original, child in zip(related, projected):
+                grouped.setdefault(original[remote_col], []).append(child)
+            keep_fk = "*" in sub_fields or remote_col in sub_fields
+            for r in rows:
+                items = grouped.get(r.get(local_col), [])
+                r[name] = items if keep_fk else [{k: v for k, v in c.items() if k != remote_col} for c in items]
+        else:
+            raise LocalAPIError(
+                f"Could not find a relationship between '{table}' and '{name}' in the schema cache",
+                code="PGRST200",
+            )
+
+    if "*" in plain:
+        return rows
+    keep = plain + [name for name, _ in embeds]
+    return [{key: r.get(key) for key in keep} for r in rows]
+
+
+def _fetch_related(client: LocalClient, table: str, column: str, keys: set) -> list:
+    if not keys:
+        return []
+    keys = list(keys)
+    rows = []
+    # SQLite membatasi jumlah parameter per statement
+    for start in range(0, len(keys), 900):
+        chunk = keys[start:start + 900]
+        rows.extend(client.conn.execute(
+            f"SELECT * FROM {table} WHERE {column} IN ({', '.join('?' for _ in chunk)})", chunk
+        ).fetchall())
+    return [client.to_dict(table, r) for r in rows]
+
+
+class RPCBuilder:
+    """Pemanggil RPC. Seperti PostgREST, hasil set-returning bisa difilter, diurutkan dan dibatasi."""
+
+    def __init__(self, client: LocalClient, name: str, params: dict, count: Optional[str] = None):
+        self.client = client
+        self.name = name
+        self.params = params
+        self.count_mode = count
+        self.conditions = []
+        self.orders = []
+        self.limit_value = None
+        self.offset_value = 0
+
+    def _filter(self, column: str, operator: str, value) -> "RPCBuilder":
+        self.conditions.append(("cond", column, operator, value))
+        return self
+
+    def eq(self, column: str, value) -> "RPCBuilder":
+        return self._filter(column, "eq", value)
+
+    def neq(self, column: str, value) -> "RPCBuilder":
+        return self._filter(column, "neq", value)
+
+    def gt(self, column: str, value) -> "RPCBuilder":
+        return self._filter(column, "gt", value)
+
+    def gte(self, column: str, value) -> "RPCBuilder":
+        return self._filter(column, "gte", value)
+
+    def lt(self, column: str, value) -> "RPCBuilder":
+        return self._filter(column, "lt", value)
+
+    def lte(self, column: str, value) -> "RPCBuilder":
+        return self._filter(column, "lte", value)
+
+    def ilike(self, column: str, pattern: str) -> "RPCBuilder":
+        return self._filter(column, "ilike", pattern)
+
+    def in_(self, column: str, values) -> "RPCBuilder":
+        return self._filter(column, "in", list(values))
+
+    def or_(self, filters: str) -> "RPCBuilder":
+        self.conditions.append(parse_logic_tree("or", filters))
+        return self
+
+    def order(self, column: str, desc: bool = False, nullsfirst: bool = False) -> "RPCBuilder":
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, size: int) -> "RPCBuilder":
+        self.limit_value = size
+        return self
+
+    def range(self, start: int, end: int) -> "RPCBuilder":
+        self.offset_value = start
+        self.limit_value = end - start + 1
+        return self
+
+    def execute(self) -> APIResponse:
+        from .rpc import RPC_FUNCTIONS
+
+        function = RPC_FUNCTIONS.get(self.name)
+        if function is None:
+            raise LocalAPIError(
+                f"Could not find the function public.{self.name} in the schema cache",
+                code="PGRST202",
+            )
+        try:
+            inspect.signature(function).bind(self.client, None, **self.params)
+        except TypeError as e:
+            raise LocalAPIError(
+                f"Could not find the function public.{self.name}({', '.join(sorted(self.params))}) in the schema cache",
+                code="PGRST202",
+                details=str(e),
+            ) from e
+
+        with self.client.transaction() as conn:
+            data = function(self.client, conn, **self.params)
+
+        if not isinstance(data, list):
+            return APIResponse(data)
+        rows = [row for row in data if all(_matches(row, condition) for condition in self.conditions)]
+        count = len(rows) if self.count_mode else None
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda row: (row.get(column) is None, row.get(column)), reverse=desc)
+        if self.limit_value is not None:
+            rows = rows[self.offset_value:self.offset_value + self.limit_value]
+        return APIResponse(rows, count)
+
+
+def _split_top_level(text: str) -> list:
+    parts, depth, quoted, escaped, current = [], 0, False, False, ""
+    for char in text:
+        if escaped:
+            escaped = False
+        elif quoted and char == "\\":
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == "," and depth == 0 and not quoted:
+            parts.append(current)
+            current = ""
+        else:
+            current += char
+    if current:
+        parts.append(current)
+    return parts
+
+def parse_logic_tree(operator: str, filters: str) -> tuple:
+    """Parse filter logika PostgREST, mis. 'sale_date.lt.X,and(sale_date.eq.X,saleid.lt.5)'."""
+    children = []
+    for part in _split_top_level(filters.strip()):
+        part = part.strip()
+        if part.startswith(("and(", "or(")) and part.endswith(")"):
+            name, inner = part.split("(", 1)
+            children.append(parse_logic_tree(name, inner[:-1]))
+        else:
+            column, op, value = part.split(".", 2)
+            if value.startswith('"') and value.endswith('"'):
+                value = re.sub(r'\\(.)', r'\1', value[1:-1])
+            children.append(("cond", column, op, value))
+    return (operator, children)
+
+def _coerce(value, like):
+    if isinstance(like, bool):
+        return str(value).lower() in ("true", "1") if isinstance(value, str) else bool(value)
+    if isinstance(like, (int, float)) and isinstance(value, str):
+        return float(value)
+    return value
+
+def _matches(row: dict, condition: tuple) -> bool:
+    if condition[0] in ("and", "or"):
+        results = (_matches(row, child) for child in condition[1])
+        return all(results) if condition[0] == "and" else any(results)
+
+    _, column, operator, value = condition
+    actual = row.get(column)
+    if operator == "is":
+        return actual is None if value in (None, "null") else actual == _coerce(value, actual)
+    if actual is None:
+        return False
+    if operator == "in":
+        return actual in [_coerce(v, actual) for v in value]
+    if operator == "ilike":
+        pattern = str(value).replace("*", "%").lower()
+        return _like(str(actual).lower(), pattern)
+    value = _coerce(value, actual)
+    return {
+        "eq": actual == value, "neq": actual != value, "gt": actual > value,
+        "gte": actual >= value, "lt": actual < value, "lte": actual <= value,
+    }[operator]
+
+def _like(text: str, pattern: str) -> bool:
+    return fnmatch.fnmatchcase(text, pattern.replace("[", "[[]").replace("%", "*").replace("_", "?"))
@@ -0,0 +1,651 @@
+# Implementasi lokal (SQLite) dari fungsi-fungsi RPC Supabase yang dipanggil halaman aplikasi.
+# Setiap fungsi menerima (client, conn, **params) dan dijalankan di dalam satu transaksi.
+import datetime
+import json
+
+from .client import LocalAPIError
+
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat()
+
+def _items(value) -> list:
+    return json.loads(value) if isinstance(value, (str, bytes)) else list(value or [])
+
+def _one(conn, sql: str, params: tuple = ()):
+    row = conn.execute(sql, params).fetchone()
+    return row[0] if row else None
+
+def _rows(conn, sql: str, params: tuple = ()) -> list:
+    return [dict(r) for r in conn.execute(sql, params).fetchall()]
+
+def _nota(description, invoice_number) -> str:
+    text = description or ""
+    if invoice_number:
+        text = f"{text} (Nota: {invoice_number})".strip()
+    return text
+
+def _account_transaction(conn, account_id, transaction_type, amount, description, transaction_date, created_by=None):
+    if not account_id:
+        return
+    balance = _one(conn, "SELECT balance FROM accounts WHERE account_id = ?", (account_id,))
+    if balance is None:
+        raise LocalAPIError(f"Rekening {account_id} tidak ditemukan", code="P0002")
+    balance_after = balance + amount
+    conn.execute("UPDATE accounts SET balance = ? WHERE account_id = ?", (balance_after, account_id))
+    conn.execute(
+        "INSERT INTO account_transactions (account_id, transaction_type, amount, balance_after, description, transaction_date, created_by) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (account_id, transaction_type, amount, balance_after, description, transaction_date or _now(), created_by),
+    )
+
+def _change_stock(conn, product_id, warehouse_id, delta: int):
+    current = _one(conn, "SELECT quantity FROM product_warehouse WHERE productid = ? AND warehouseid = ?", (product_id, warehouse_id))
+    if current is None:
+        current = 0
+        if delta < 0:
+            raise LocalAPIError(f"Stok produk {product_id} tidak mencukupi di gudang (tersedia 0)", code="P0001")
+        conn.execute("INSERT INTO product_warehouse (productid, warehouseid, quantity) VALUES (?, ?, 0)", (product_id, warehouse_id))
+    if current + delta < 0:
+        raise LocalAPIError(f"Stok produk {product_id} tidak mencukupi di gudang (tersedia {current})", code="P0001")
+    conn.execute(
+        "UPDATE product_warehouse SET quantity = quantity + ? WHERE productid = ? AND warehouseid = ?",
+        (delta, product_id, warehouse_id),
+    )
+    conn.execute(
+        "UPDATE product SET quantity = COALESCE(quantity, 0) + ?, updateat = ? WHERE productid = ?",
+        (delta, _now(), product_id),
+    )
+
+def _receive_goods(conn, product_id, supplier_id, warehouse_id, quantity: int, price: float):
+    """Tambah stok hasil pembelian dan perbarui harga rata-rata tertimbang."""
+    row = conn.execute("SELECT COALESCE(quantity, 0), COALESCE(harga, 0) FROM product WHERE productid = ?", (product_id,)).fetchone()
+    if row is None:
+        raise LocalAPIError(f"Produk {product_id} tidak ditemukan", code="P0002")
+    old_qty, old_price = max(row[0], 0), row[1]
+    if quantity > 0 and price:
+        new_price = (old_qty * old_price + quantity * price) / (old_qty + quantity)
+        conn.execute("UPDATE product SET harga = ? WHERE productid = ?", (new_price, product_id))
+    _change_stock(conn, product_id, warehouse_id, quantity)
+    if supplier_id:
+        conn.execute(
+            "INSERT INTO productsupply (productid, supplierid, price) VALUES (?, ?, ?) "
+            "ON CONFLICT (productid, supplierid) DO UPDATE SET price = excluded.price",
+            (product_id, supplier_id, price),
+        )
+
+def _open_debt(conn, store, debt_type, total, description, debt_date, due_date, supplier_id=None, customer_name=None, reference_id=None):
+    conn.execute(
+        "INSERT INTO debt (store, debt_type, supplierid, customer_name, reference_id, total_debt, description, debt_date, due_date) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (store, debt_type, supplier_id, customer_name, reference_id, total, description, debt_date, due_date),
+    )
+
+def _result(message: str, **extra) -> dict:
+    return {"success": True, "message": message, **extra}
+
+def _failure(message: str) -> dict:
+    return {"success": False, "message": message}
+
+
+# Transaksi penjualan & pembelian
+
+def record_sale_transaction_multi(client, conn, p_store, p_warehouse_id, p_items, p_payment_type="cash",
+                                  p_customer_name=None, p_due_date=None, p_account_id=None, p_description=None,
+                                  p_transaction_date=None, p_created_by=None, p_invoice_number=None):
+    items = _items(p_items)
+    if not items:
+        raise LocalAPIError("Daftar item penjualan kosong", code="P0001")
+    sale_date = p_transaction_date or _now()
+    transaction_ref = None
+    total = 0
+    for item in items:
+        product_id = item["product_id"]
+        quantity = int(item["quantity"])
+        price = float(item["price"])
+        cost = _one(conn, "SELECT COALESCE(harga, 0) FROM product WHERE productid = ? AND store = ?", (product_id, p_store))
+        if cost is None:
+            raise LocalAPIError(f"Produk {product_id} tidak ditemukan di toko {p_store}", code="P0002")
+        _change_stock(conn, product_id, p_warehouse_id, -quantity)
+        cursor = conn.execute(
+            "INSERT INTO sale (store, transaction_ref, productid, warehouseid, customer_name, quantity, price, total, cost, "
+            "payment_type, description, sale_date, invoice_number, is_non_stock, created_by) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 0, ?)",
+            (p_store, transaction_ref, product_id, p_warehouse_id, p_customer_name, quantity, price, quantity * price,
+             cost * quantity, p_payment_type, p_description, sale_date, p_invoice_number, p_created_by),
+        )
+        if transaction_ref is None:
+            transaction_ref = cursor.lastrowid
+            conn.execute("UPDATE sale SET transaction_ref = ? WHERE saleid = ?", (transaction_ref, transaction_ref))
+        total += quantity * price
+
+    if p_payment_type == "cash":
+        _account_transaction(conn, p_account_id, "sale", total, _nota(f"Penjualan #{transaction_ref}", p_invoice_number), sale_date, p_created_by)
+    else:
+        _open_debt(conn, p_store, "customer", total, p_description, sale_date, p_due_date,
+                   customer_name=p_customer_name, reference_id=transaction_ref)
+    return transaction_ref
+
+def record_other_sale(client, conn, p_store, p_item_name, p_quantity, p_price, p_item_type=None, p_customer_name=None,
+                      p_payment_type="cash", p_due_date=None, p_account_id=None, p_description=None,
+                      p_transaction_date=None, p_created_by=None, p_invoice_number=None):
+    sale_date = p_transaction_date or _now()
+    total = int(p_quantity) * float(p_price)
+    cursor = conn.execute(
+        "INSERT INTO sale (store, item_name, item_type, customer_name, quantity, price, total, cost, payment_type, "
+        "description, sale_date, invoice_number, is_non_stock, created_by) VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?, ?, ?, ?, 1, ?)",
+        (p_store, p_item_name, p_item_type, p_customer_name, int(p_quantity), float(p_price), total, p_payment_type,
+         p_description, sale_date, p_invoice_number, p_created_by),
+    )
+    sale_id = cursor.lastrowid
+    conn.execute("UPDATE sale SET transaction_ref = ? WHERE saleid = ?", (sale_id, sale_id))
+    if p_payment_type == "cash":
+        _account_transaction(conn, p_account_id, "other_sale", total, _nota(f"Penjualan lainnya: {p_item_name}", p_invoice_number), sale_date, p_created_by)
+    else:
+        _open_debt(conn, p_store, "customer", total, p_description, sale_date, p_due_date,
+                   customer_name=p_customer_name, reference_id=sale_id)
+    return sale_id
+
+def record_purchase_transaction_multi(client, conn, p_store, p_supplier_id, p_warehouse_id, p_items, p_payment_type="cash",
+                                      p_due_date=None, p_account_id=None, p_description=None, p_transaction_date=None,
+                                      p_created_by=None, p_invoice_number=None):
+    items = _items(p_items)
+    if not items:
+        raise LocalAPIError("Daftar item pembelian kosong", code="P0001")
+    purchase_date = p_transaction_date or _now()
+    transaction_ref = None
+    total = 0
+    for item in items:
+        product_id = item["product_id"]
+        quantity = int(item["quantity"])
+        price = float(item["price"])
+        _receive_goods(conn, product_id, p_supplier_id, p_warehouse_id, quantity, price)
+        cursor = conn.execute(
+            "INSERT INTO purchase (store, transaction_ref, productid, supplierid, warehouseid, quantity, price, total, "
+            "payment_type, description, purchase_date, invoice_number, created_by) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (p_store, transaction_ref, product_id, p_supplier_id, p_warehouse_id, quantity, price, quantity * price,
+             p_payment_type, p_description, purchase_date, p_invoice_number, p_created_by),
+        )
+        if transaction_ref is None:
+            transaction_ref = cursor.lastrowid
+            conn.execute("UPDATE purchase SET transaction_ref = ? WHERE purchaseid = ?", (transaction_ref, transaction_ref))
+        total += quantity * price
+
+    if p_payment_type == "cash":
+        _account_transaction(conn, p_account_id, "purchase", -total, _nota(f"Pembelian #{transaction_ref}", p_invoice_number), purchase_date, p_created_by)
+    else:
+        _open_debt(conn, p_store, "supplier", total, p_description, purchase_date, p_due_date,
+                   supplier_id=p_supplier_id, reference_id=transaction_ref)
+    return transaction_ref
+
+def bulk_import_smart(client, conn, p_store, p_products, p_warehouse_id, p_supplier_id=None, p_account_id=None,
+                      p_payment_type="cash", p_payment_amount=None, p_import_date=None, p_created_by=None, p_due_date=None):
+    products = _items(p_products)
+    import_date = p_import_date or _now()
+    new_count = existing_count = 0
+    transaction_ref = None
+    total = 0
+    for product in products:
+        name = product["productname"]
+        product_id = _one(conn, "SELECT productid FROM product WHERE store = ? AND productname = ?", (p_store, name))
+        if product_id is None:
+            cursor = conn.execute(
+                "INSERT INTO product (store, productname, type, size, color, brand, description, harga, quantity, updateat) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, 0, 0, ?)",
+                (p_store, name, product.get("type"), product.get("size"), product.get("color"), product.get("brand"),
+                 product.get("description"), import_date),
+            )
+            product_id = cursor.lastrowid
+            new_count += 1
+        else:
+            existing_count += 1
+
+        quantity = int(product.get("quantity") or 0)
+        price = float(product.get("harga") or 0)
+        if quantity > 0:
+            if not p_supplier_id:
+                raise LocalAPIError(f"Supplier wajib diisi untuk produk '{name}' dengan jumlah > 0", code="P0001")
+            _receive_goods(conn, product_id, p_supplier_id, p_warehouse_id, quantity, price)
+            cursor = conn.execute(
+                "INSERT INTO purchase (store, transaction_ref, productid, supplierid, warehouseid, quantity, price, total, "
+                "payment_type, description, purchase_date, created_by) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (p_store, transaction_ref, product_id, p_supplier_id, p_warehouse_id, quantity, price, quantity * price,
+                 p_payment_type, "Impor dari Excel", import_date, p_created_by),
+            )
+            if transaction_ref is None:
+                transaction_ref = cursor.lastrowid
+                conn.execute("UPDATE purchase SET transaction_ref = ? WHERE purchaseid = ?", (transaction_ref, transaction_ref))
+            total += quantity * price
+
+    if total > 0:
+        if p_payment_type == "cash":
+            _account_transaction(conn, p_account_id, "purchase", -(p_payment_amount or total), f"Impor stok #{transaction_ref}", import_date, p_created_by)
+        else:
+            _open_debt(conn, p_store, "supplier", total, "Impor dari Excel", import_date, p_due_date,
+                       supplier_id=p_supplier_id, reference_id=transaction_ref)
+    return [{"new_count": new_count, "existing_count": existing_count, "total_count": new_count + existing_count}]
+
+def record_stock_adjustment(client, conn, p_product_id, p_warehouse_id, p_adj_type, p_quantity, p_description=None, p_transaction_date=None):
+    quantity = int(p_quantity)
+    _change_stock(conn, p_product_id, p_warehouse_id, quantity if p_adj_type == "add" else -quantity)
+    cursor = conn.execute(
+        "INSERT INTO stock_adjustment (productid, warehouseid, adjustment_type, quantity, description, adjusted_at) VALUES (?, ?, ?, ?, ?, ?)",
+        (p_product_id, p_warehouse_id, p_adj_type, quantity, p_description, p_transaction_date or _now()),
+    )
+    return cursor.lastrowid
+
+
+# Retur
+
+def record_purchase_return(client, conn, p_store, p_supplier_id, p_warehouse_id, p_items, p_return_type, p_reason=None,
+                           p_description=None, p_account_id=None, p_return_date=None, p_created_by=None, p_invoice_number=None):
+    items = _items(p_items)
+    return_date = p_return_date or _now()
+    total = sum(int(i["quantity"]) * float(i["price"]) for i in items)
+    cursor = conn.execute(
+        "INSERT INTO purchase_return (store, supplierid, warehouseid, total_amount, return_type, reason, description, "
+        "return_date, invoice_number, created_by) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (p_store, p_supplier_id, p_warehouse_id, total, p_return_type, p_reason, p_description, return_date, p_invoice_number, p_created_by),
+    )
+    return_id = cursor.lastrowid
+    for item in items:
+        _change_stock(conn, item["product_id"], p_warehouse_id, -int(item["quantity"]))
+        conn.execute(
+            "INSERT INTO purchase_return_item (return_id, productid, quantity, price) VALUES (?, ?, ?, ?)",
+            (return_id, item["product_id"], int(item["quantity"]), float(item["price"])),
+        )
+
+    if p_return_type == "refund":
+        _account_transaction(conn, p_account_id, "purchase_return", total, _nota(f"Retur pembelian #{return_id}", p_invoice_number), return_date, p_created_by)
+    elif p_return_type == "credit_note":
+        remaining = total
+        debts = _rows(conn, "SELECT debtid, total_debt - paid_amount AS remaining FROM debt WHERE store = ? AND debt_type = 'supplier' "
+                            "AND supplierid = ? AND status = 'active' ORDER BY debt_date", (p_store, p_supplier_id))
+        for debt in debts:
+            if remaining <= 0:
+                break
+            cut = min(remaining, debt["remaining"])
+            conn.execute(
+                "UPDATE debt SET total_debt = total_debt - ?, status = CASE WHEN total_debt - ? <= paid_amount THEN 'paid' ELSE status END "
+                "WHERE debtid = ?",
+                (cut, cut, debt["debtid"]),
+            )
+            remaining -= cut
+    return return_id
+
+def record_sale_return(client, conn, p_store, p_warehouse_id, p_items, p_return_type, p_customer_name=None, p_reason=None,
+                       p_description=None, p_account_id=None, p_return_date=None, p_created_by=None, p_invoice_number=None):
+    items = _items(p_items)
+    return_date = p_return_date or _now()
+    total = sum(int(i["quantity"]) * float(i["price"]) for i in items)
+    cursor = conn.execute(
+        "INSERT INTO sale_return (store, warehouseid, customer_name, total_amount, return_type, reason, description, "
+        "return_date, invoice_number, created_by) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (p_store, p_warehouse_id, p_customer_name, total, p_return_type, p_reason, p_description, return_date, p_invoice_number, p_created_by),
+    )
+    return_id = cursor.lastrowid
+    for item in items:
+        _change_stock(conn, item["product_id"], p_warehouse_id, int(item["quantity"]))
+        conn.execute(
+            "INSERT INTO sale_return_item (return_id, productid, quantity, price) VALUES (?, ?, ?, ?)",
+            (return_id, item["product_id"], int(item["quantity"]), float(item["price"])),
+        )
+    if p_return_type == "refund":
+        _account_transaction(conn, p_account_id, "sale_return", -total, _nota(f"Retur penjualan #{return_id}", p_invoice_number), return_date, p_created_by)
+    return return_id
+
+
+# Utang, piutang & keuangan
+
+def _record_debt_payment(conn, debt_type, p_debtid, p_amount, p_note, p_transaction_date, p_account_id):
+    debt = conn.execute("SELECT * FROM debt WHERE debtid = ? AND debt_type = ?", (p_debtid, debt_type)).fetchone()
+    if debt is None:
+        raise LocalAPIError(f"Data utang/piutang {p_debtid} tidak ditemukan", code="P0002")
+    amount = float(p_amount)
+    remaining = debt["total_debt"] - debt["paid_amount"]
+    if amount <= 0 or amount > remaining:
+        raise LocalAPIError(f"Jumlah pembayaran tidak valid (sisa: {remaining:,.0f})", code="P0001")
+    paid_at = p_transaction_date or _now()
+    conn.execute(
+        "UPDATE debt SET paid_amount = paid_amount + ?, status = CASE WHEN paid_amount + ? >= total_debt THEN 'paid' ELSE status END "
+        "WHERE debtid = ?",
+        (amount, amount, p_debtid),
+    )
+    conn.execute("INSERT INTO payment_history (debtid, paidamount, paidat, description) VALUES (?, ?, ?, ?)", (p_debtid, amount, paid_at, p_note))
+    if debt_type == "customer":
+        _account_transaction(conn, p_account_id, "receivable_payment", amount, p_note, paid_at)
+    else:
+        _account_transaction(conn, p_account_id, "debt_payment", -amount, p_note, paid_at)
+    return p_debtid
+
+def record_customer_payment(client, conn, p_debtid, p_amount, p_note=None, p_transaction_date=None, p_account_id=None):
+    return _record_debt_payment(conn, "customer", p_debtid, p_amount, p_note, p_transaction_date, p_account_id)
+
+def record_supplier_payment(client, conn, p_debtid, p_amount, p_note=None, p_transaction_date=None, p_account_id=None):
+    return _record_debt_payment(conn, "supplier", p_debtid, p_amount, p_note, p_transaction_date, p_account_id)
+
+def record_operational_expense(client, conn, p_store, p_expense_type, p_amount, p_description=None, p_reference_id=None,
+                               p_account_id=None, p_expense_date=None, p_created_by=None):
+    expense_date = p_expense_date or _now()
+    cursor = conn.execute(
+        "INSERT INTO operational_expense (store, expense_type, amount, description, reference_id, account_id, expense_date, created_by) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (p_store, p_expense_type, float(p_amount), p_description, p_reference_id, p_account_id, expense_date, p_created_by),
+    )
+    transaction_type = "salary" if p_expense_type == "salary" else "operational_expense"
+    _account_transaction(conn, p_account_id, transaction_type, -float(p_amount), p_description or p_expense_type, expense_date, p_created_by)
+    return cursor.lastrowid
+
+def adjust_account_balance(client, conn, p_account_id, p_amount, p_description=None, p_user=None, p_transaction_date=None):
+    _account_transaction(conn, p_account_id, "adjustment", float(p_amount), p_description, p_transaction_date, p_user)
+    return True
+
+def transfer_funds(client, conn, p_from_account_id, p_to_account_id, p_amount, p_description=None, p_user=None, p_transaction_date=None):
+    amount = float(p_amount)
+    balance = _one(conn, "SELECT balance FROM accounts WHERE account_id = ?", (p_from_account_id,))
+    if balance is None or balance < amount:
+        raise LocalAPIError("Saldo rekening asal tidak mencukupi", code="P0001")
+    _account_transaction(conn, p_from_account_id, "transfer", -amount, p_description, p_transaction_date, p_user)
+    _account_transaction(conn, p_to_account_id, "transfer", amount, p_description, p_transaction_date, p_user)
+    return True
+
+def create_default_cash_account(client, conn, p_store_name):
+    existing = _one(conn, "SELECT account_id FROM accounts WHERE store = ? AND is_default = 1", (p_store_name,))
+    if existing is not None:
+        return existing
+    cursor = conn.execute(
+        "INSERT INTO accounts (store, account_name, account_type, balance, is_default) VALUES (?, 'Kas', 'cash', 0, 1)",
+        (p_store_name,),
+    )
+    return cursor.lastrowid
+
+def _debts(conn, store_input, debt_type, with_top: bool) -> list:
+    if debt_type == "supplier":
+        name_sql = "s.suppliername AS supplier_name"
+        description_key = "purchase_description"
+    else:
+        name_sql = "d.customer_name AS customer_name"
+        description_key = "sale_description"
+    rows = _rows(
+        conn,
+        f"SELECT d.debtid, {name_sql}, d.total_debt, d.paid_amount, d.total_debt - d.paid_amount AS remaining_debt, "
+        f"d.debt_date, d.description AS {description_key}, d.due_date FROM debt d "
+        "LEFT JOIN supplier s ON s.supplierid = d.supplierid "
+        "WHERE d.store = ? AND d.debt_type = ? AND d.status = 'active' ORDER BY d.debt_date",
+        (store_input, debt_type),
+    )
+    today = datetime.date.today()
+    for row in rows:
+        if with_top:
+            due = row["due_date"]
+            row["days_until_due"] = (datetime.date.fromisoformat(due[:10]) - today).days if due else None
+        else:
+            del row["due_date"]
+    return rows
+
+def get_customer_debts(client, conn, store_input):
+    return _debts(conn, store_input, "customer", with_top=False)
+
+def get_customer_debts_with_top(client, conn, store_input):
+    return _debts(conn, store_input, "customer", with_top=True)
+
+def get_supplier_debts(client, conn, store_input):
+    return _debts(conn, store_input, "supplier", with_top=False)
+
+def get_supplier_debts_with_top(client, conn, store_input):
+    return _debts(conn, store_input, "supplier", with_top=True)
+
+def _paid_debts(conn, store_input, debt_type) -> list:
+    rows = _debts_paid_rows(conn, store_input, debt_type)
+    for row in rows:
+        payments = _rows(conn, "SELECT paidamount, paidat, description FROM payment_history WHERE debtid = ? ORDER BY paidat", (row["debtid"],))
+        row["payment_history_details"] = "\n".join(
+            f"{p['paidat'][:16].replace('T', ' ')} - Rp {p['paidamount']:,.0f} ({p['description'] or '-'})" for p in payments
+        )
+    return rows
+
+def _debts_paid_rows(conn, store_input, debt_type) -> list:
+    if debt_type == "supplier":
+        columns = "s.suppliername AS supplier_name, d.description AS purchase_description"
+    else:
+        columns = "d.customer_name AS customer_name, d.description AS sale_description"
+    return _rows(
+        conn,
+        f"SELECT d.debtid, {columns}, d.total_debt, d.debt_date FROM debt d "
+        "LEFT JOIN supplier s ON s.supplierid = d.supplierid "
+        "WHERE d.store = ? AND d.debt_type = ? AND d.status = 'paid' ORDER BY d.debt_date DESC",
+        (store_input, debt_type),
+    )
+
+def get_paid_customer_debts_with_history(client, conn, store_input):
+    return _paid_debts(conn, store_input, "customer")
+
+def get_paid_supplier_debts_with_history(client, conn, store_input):
+    return _paid_debts(conn, store_input, "supplier")
+
+def get_supplier_debt_total(client, conn, p_store, p_supplier_id):
+    return _one(
+        conn,
+        "SELECT COALESCE(SUM(total_debt - paid_amount), 0) FROM debt WHERE store = ? AND debt_type = 'supplier' "
+        "AND supplierid = ? AND status = 'active'",
+        (p_store, p_supplier_id),
+    )
+
+def get_suppliers_view(client, conn, store_input):
+    return _rows(
+        conn,
+        "SELECT s.supplierid, s.suppliername, s.supplierno, s.address, s.description, "
+        "COALESCE(SUM(CASE WHEN d.status = 'active' THEN d.total_debt - d.paid_amount END), 0) AS total_debt "
+        "FROM supplier s LEFT JOIN debt d ON d.supplierid = s.supplierid AND d.debt_type = 'supplier' "
+        "WHERE s.store = ? GROUP BY s.supplierid ORDER BY s.suppliername",
+        (store_input,),
+    )
+
+
+# Riwayat
+
+def get_sale_history(client, conn, store_input, start_date_input, end_date_input):
+    rows = _rows(
+        conn,
+        "SELECT s.saleid, COALESCE(p.productname, s.item_name) AS product_name, w.name AS warehouse_name, s.customer_name, "
+        "s.quantity, s.price, s.total, s.payment_type, s.description, s.sale_date, s.invoice_number, s.is_non_stock "
+        "FROM sale s LEFT JOIN product p ON p.productid = s.productid LEFT JOIN warehouse_list w ON w.warehouseid = s.warehouseid "
+        "WHERE s.store = ? AND s.sale_date >= ? AND s.sale_date < ? ORDER BY s.sale_date DESC, s.saleid DESC",
+        (store_input, start_date_input, end_date_input),
+    )
+    for row in rows:
+        row["is_non_stock"] = bool(row["is_non_stock"])
+    return rows
+
+def get_purchase_history(client, conn, store_input, start_date_input, end_date_input):
+    return _rows(
+        conn,
+        "SELECT pu.purchaseid, p.productname AS product_name, s.suppliername AS supplier_name, w.name AS warehouse_name, "
+        "pu.quantity, pu.price, pu.total, pu.payment_type, pu.description, pu.purchase_date, pu.invoice_number "
+        "FROM purchase pu LEFT JOIN product p ON p.productid = pu.productid LEFT JOIN supplier s ON s.supplierid = pu.supplierid "
+        "LEFT JOIN warehouse_list w ON w.warehouseid = pu.warehouseid "
+        "WHERE pu.store = ? AND pu.purchase_date >= ? AND pu.purchase_date < ? ORDER BY pu.purchase_date DESC, pu.purchaseid DESC",
+        (store_input, start_date_input, end_date_input),
+    )
+
+def get_stock_adjustment_history(client, conn, store_input, start_date_input, end_date_input):
+    return _rows(
+        conn,
+        "SELECT a.adjustmentid, p.productname, w.name AS warehouse_name, a.quantity, a.adjustment_type, a.description, a.adjusted_at "
+        "FROM stock_adjustment a JOIN product p ON p.productid = a.productid LEFT JOIN warehouse_list w ON w.warehouseid = a.warehouseid "
+        "WHERE p.store = ? AND a.adjusted_at >= ? AND a.adjusted_at < ? ORDER BY a.adjusted_at DESC, a.adjustmentid DESC",
+        (store_input, start_date_input, end_date_input),
+    )
+
+def get_purchase_return_history(client, conn, store_input, start_date_input, end_date_input):
+    return _rows(
+        conn,
+        "SELECT r.return_id, s.suppliername AS supplier_name, w.name AS warehouse_name, r.total_amount, r.return_type, r.status, "
+        "r.reason, r.return_date, (SELECT COUNT(*) FROM purchase_return_item i WHERE i.return_id = r.return_id) AS item_count "
+        "FROM purchase_return r LEFT JOIN supplier s ON s.supplierid = r.supplierid LEFT JOIN warehouse_list w ON w.warehouseid = r.warehouseid "
+        "WHERE r.store = ? AND r.return_date >= ? AND r.return_date < ? ORDER BY r.return_date DESC, r.return_id DESC",
+        (store_input, start_date_input, end_date_input),
+    )
+
+def get_sale_return_history(client, conn, store_input, start_date_input, end_date_input):
+    return _rows(
+        conn,
+        "SELECT r.return_id, r.customer_name, w.name AS warehouse_name, r.total_amount, r.return_type, r.status, r.reason, r.return_date, "
+        "(SELECT COUNT(*) FROM sale_return_item i WHERE i.return_id = r.return_id) AS item_count "
+        "FROM sale_return r LEFT JOIN warehouse_list w ON w.warehouseid = r.warehouseid "
+        "WHERE r.store = ? AND r.return_date >= ? AND r.return_date < ? ORDER BY r.return_date DESC, r.return_id DESC",
+        (store_input, start_date_input, end_date_input),
+    )
+
+
+# Analitik dashboard
+
+def get_store_business_performance_v2(client, conn, store_input, start_date, end_date):
+    sales = conn.execute(
+        "SELECT COALESCE(SUM(CASE WHEN is_non_stock = 0 THEN total END), 0), COALESCE(SUM(CASE WHEN is_non_stock = 1 THEN total END), 0), "
+        "COALESCE(SUM(cost), 0), COUNT(DISTINCT CASE WHEN is_non_stock = 0 THEN transaction_ref END), "
+        "COUNT(DISTINCT CASE WHEN is_non_stock = 1 THEN transaction_ref END) "
+        "FROM sale WHERE store = ? AND sale_date >= ? AND sale_date < ?",
+        (store_input, start_date, end_date),
+    ).fetchone()
+    stock_revenue, non_stock_revenue, hpp, stock_tx, non_stock_tx = sales
+    expenses = conn.execute(
+        "SELECT COALESCE(SUM(amount), 0), COALESCE(SUM(CASE WHEN expense_type = 'salary' THEN amount END), 0) "
+        "FROM operational_expense WHERE store = ? AND expense_date >= ? AND expense_date < ?",
+        (store_input, start_date, end_date),
+    ).fetchone()
+    total_expenses, salary_expense = expenses
+    total_modal = _one(conn, "SELECT COALESCE(SUM(total), 0) FROM purchase WHERE store = ?", (store_input,))
+
+    total_revenue = stock_revenue + non_stock_revenue
+    gross_profit = stock_revenue - hpp + non_stock_revenue
+    net_profit = gross_profit - total_expenses
+    return [{
+        "total_modal": total_modal,
+        "hpp": hpp,
+        "stock_revenue": stock_revenue,
+        "non_stock_revenue": non_stock_revenue,
+        "total_revenue": total_revenue,
+        "stock_transaction_count": stock_tx,
+        "non_stock_transaction_count": non_stock_tx,
+        "transaction_count": stock_tx + non_stock_tx,
+        "gross_profit": gross_profit,
+        "total_expenses": total_expenses,
+        "salary_expense": salary_expense,
+        "other_expense": total_expenses - salary_expense,
+        "net_profit": net_profit,
+        "profit_margin": (net_profit / total_revenue * 100) if total_revenue else 0,
+    }]
+
+def get_store_kpis(client, conn, store_input, start_date, end_date):
+    row = conn.execute(
+        "SELECT COALESCE(SUM(total), 0), COALESCE(SUM(cost), 0), COUNT(DISTINCT transaction_ref) "
+        "FROM sale WHERE store = ? AND sale_date >= ? AND sale_date < ?",
+        (store_input, start_date, end_date),
+    ).fetchone()
+    return {"total_revenue": row[0], "total_cost": row[1], "gross_profit": row[0] - row[1], "sale_count": row[2]}
+
+def get_top_selling_products(client, conn, store_input, start_date, end_date, limit_count=10):
+    return _rows(
+        conn,
+        "SELECT p.productname AS product_name, SUM(s.quantity) AS total_quantity_sold, SUM(s.total) AS total_revenue "
+        "FROM sale s JOIN product p ON p.productid = s.productid "
+        "WHERE s.store = ? AND s.sale_date >= ? AND s.sale_date < ? AND s.is_non_stock = 0 "
+        "GROUP BY p.productid ORDER BY total_quantity_sold DESC, total_revenue DESC LIMIT ?",
+        (store_input, start_date, end_date, int(limit_count)),
+    )
+
+def get_slow_moving_products(client, conn, store_input, days_threshold=60):
+    cutoff = (datetime.datetime.now() - datetime.timedelta(days=int(days_threshold))).isoformat()
+    return _rows(
+        conn,
+        "SELECT p.productname AS product_name, MAX(s.sale_date) AS last_sale_date, p.quantity AS total_stock "
+        "FROM product p LEFT JOIN sale s ON s.productid = p.productid "
+        "WHERE p.store = ? AND COALESCE(p.quantity, 0) > 0 GROUP BY p.productid "
+        "HAVING last_sale_date IS NULL OR last_sale_date < ? ORDER BY last_sale_date",
+        (store_input, cutoff),
+    )
+
+def get_expense_summary(client, conn, store_input, start_date, end_date):
+    return _rows(
+        conn,
+        "SELECT expense_type, SUM(amount) AS total_amount, COUNT(*) AS transaction_count FROM operational_expense "
+        "WHERE store = ? AND expense_date >= ? AND expense_date < ? GROUP BY expense_type ORDER BY total_amount DESC",
+        (store_input, start_date, end_date),
+    )
+
+
+# Manajemen supplier, gudang & toko
+
+def get_warehouse_stock_summary(client, conn, p_warehouse_id):
+    return _rows(
+        conn,
+        "SELECT p.productid, p.productname, pw.quantity, p.harga FROM product_warehouse pw JOIN product p ON p.productid = pw.productid "
+        "WHERE pw.warehouseid = ? AND pw.quantity > 0 ORDER BY p.productname",
+        (p_warehouse_id,),
+    )
+
+def migrate_product_stock(client, conn, p_product_id, p_source_warehouse_id, p_target_warehouse_id, p_quantity):
+    quantity = int(p_quantity)
+    _change_stock(conn, p_product_id, p_source_warehouse_id, -quantity)
+    _change_stock(conn, p_product_id, p_target_warehouse_id, quantity)
+    return _result(f"{quantity} unit berhasil dipindahkan.")
+
+def migrate_all_warehouse_stock(client, conn, p_source_warehouse_id, p_target_warehouse_id):
+    stock = _rows(conn, "SELECT productid, quantity FROM product_warehouse WHERE warehouseid = ? AND quantity > 0", (p_source_warehouse_id,))
+    for row in stock:
+        _change_stock(conn, row["productid"], p_source_warehouse_id, -row["quantity"])
+        _change_stock(conn, row["productid"], p_target_warehouse_id, row["quantity"])
+    total = sum(row["quantity"] for row in stock)
+    return _result(f"{total} unit dari {len(stock)} produk berhasil dipindahkan.")
+
+def update_supplier(client, conn, p_supplier_id, p_supplier_name, p_supplier_no=None, p_address=None, p_description=None):
+    conn.execute(
+        "UPDATE supplier SET suppliername = ?, supplierno = ?, address = ?, description = ? WHERE supplierid = ?",
+        (p_supplier_name, p_supplier_no, p_address, p_description, p_supplier_id),
+    )
+    return _result("Supplier berhasil diupdate.")
+
+def delete_supplier_permanent(client, conn, p_supplier_id):
+    name = _one(conn, "SELECT suppliername FROM supplier WHERE supplierid = ?", (p_supplier_id,))
+    if name is None:
+        return _failure("Supplier tidak ditemukan.")
+    conn.execute("DELETE FROM supplier WHERE supplierid = ?", (p_supplier_id,))
+    return _result(f"Supplier '{name}' berhasil dihapus.")
+
+def update_warehouse(client, conn, p_warehouse_id, p_warehouse_name):
+    conn.execute("UPDATE warehouse_list SET name = ? WHERE warehouseid = ?", (p_warehouse_name, p_warehouse_id))
+    return _result("Gudang berhasil diupdate.")
+
+def delete_warehouse_permanent(client, conn, p_warehouse_id, p_force_delete_stock=False):
+    name = _one(conn, "SELECT name FROM warehouse_list WHERE warehouseid = ?", (p_warehouse_id,))
+    if name is None:
+        return _failure("Gudang tidak ditemukan.")
+    stock = _rows(conn, "SELECT productid, quantity FROM product_warehouse WHERE warehouseid = ? AND quantity > 0", (p_warehouse_id,))
+    stock_total = sum(row["quantity"] for row in stock)
+    if stock_total and not p_force_delete_stock:
+        return _failure(f"Gudang '{name}' masih memiliki {stock_total} unit stok.")
+    for row in stock:
+        _change_stock(conn, row["productid"], p_warehouse_id, -row["quantity"])
+    conn.execute("DELETE FROM warehouse_list WHERE warehouseid = ?", (p_warehouse_id,))
+    return _result(f"Gudang '{name}' berhasil dihapus.", stock_deleted=stock_total)
+
+def delete_store_cascade(client, conn, p_store_name):
+    counts = {}
+    for key, table in [
+        ("sales", "sale"), ("purchases", "purchase"), ("products", "product"), ("suppliers", "supplier"),
+        ("warehouses", "warehouse_list"), ("users", "users"),
+    ]:
+        counts[key] = _one(conn, f"SELECT COUNT(*) FROM {table} WHERE store = ?", (p_store_name,))
+    for table in (
+        "sale_return", "purchase_return", "sale", "purchase", "debt", "operational_expense", "pegawai",
+        "product", "supplier", "warehouse_list", "accounts", "users",
+    ):
+        conn.execute(f"DELETE FROM {table} WHERE store = ?", (p_store_name,))
+    return _result(f"Toko '{p_store_name}' berhasil dihapus.", deleted_counts=counts)
+
+
+RPC_FUNCTIONS = {
+    name: function for name, function in globals().items()
+    if callable(function) and not name.startswith("_") and function.__module__ == __name__
+}
@@ -0,0 +1,269 @@
+# Skema SQLite untuk backend lokal. Nama tabel dan kolom mengikuti tabel Supabase
+# yang dipakai halaman-halaman aplikasi.
+
+_NOW = "(strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'))"
+
+DDL = f"""
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    username TEXT NOT NULL UNIQUE,
+    password TEXT NOT NULL,
+    role TEXT NOT NULL DEFAULT 'pegawai',
+    store TEXT
+);
+
+CREATE TABLE IF NOT EXISTS warehouse_list (
+    warehouseid INTEGER PRIMARY KEY AUTOINCREMENT,
+    store TEXT NOT NULL,
+    name TEXT NOT NULL,
+    UNIQUE (store, name)
+);
+
+CREATE TABLE IF NOT EXISTS supplier (
+    supplierid INTEGER PRIMARY KEY AUTOINCREMENT,
+    store TEXT NOT NULL,
+    suppliername TEXT NOT NULL,
+    supplierno TEXT,
+    address TEXT,
+    description TEXT,
+    UNIQUE (store, suppliername)
+);
+
+CREATE TABLE IF NOT EXISTS product (
+    productid INTEGER PRIMARY KEY AUTOINCREMENT,
+    store TEXT NOT NULL,
+    productname TEXT NOT NULL,
+    type TEXT,
+    size TEXT,
+    color TEXT,
+    brand TEXT,
+    description TEXT,
+    harga REAL DEFAULT 0,
+    quantity INTEGER DEFAULT 0,
+    updateat TEXT DEFAULT {_NOW},
+    UNIQUE (store, productname)
+);
+
+CREATE TABLE IF NOT EXISTS product_warehouse (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    productid INTEGER NOT NULL REFERENCES product(productid) ON DELETE CASCADE,
+    warehouseid INTEGER NOT NULL REFERENCES warehouse_list(warehouseid) ON DELETE CASCADE,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (productid, warehouseid)
+);
+
+CREATE TABLE IF NOT EXISTS productsupply (
+    supplyid INTEGER PRIMARY KEY AUTOINCREMENT,
+    productid INTEGER NOT NULL REFERENCES product(productid) ON DELETE CASCADE,
+    supplierid INTEGER NOT NULL REFERENCES supplier(supplierid) ON DELETE CASCADE,
+    price REAL DEFAULT 0,
+    UNIQUE (productid, supplierid)
+);
+
+CREATE TABLE IF NOT EXISTS accounts (
+    account_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    store TEXT NOT NULL,
+    account_name TEXT NOT NULL,
+    account_type TEXT NOT NULL DEFAULT 'cash',
+    bank_name TEXT,
+    account_number TEXT,
+    balance REAL NOT NULL DEFAULT 0,
+    is_default INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (store, account_name)
+);
+
+CREATE TABLE IF NOT EXISTS account_transactions (
+    transaction_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    account_id INTEGER NOT NULL REFERENCES accounts(account_id) ON DELETE CASCADE,
+    transaction_type TEXT NOT NULL,
+    amount REAL NOT NULL,
+    balance_after REAL,
+    description TEXT,
+    transaction_date TEXT NOT NULL DEFAULT {_NOW},
+    created_by TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sale (
+    saleid INTEGER PRIMARY KEY AUTOINCREMENT,
+    store TEXT NOT NULL,
+    transaction_ref INTEGER,
+    productid INTEGER REFERENCES product(productid) ON DELETE SET NULL,
+    warehouseid INTEGER REFERENCES warehouse_list(warehouseid) ON DELETE SET NULL,
+    item_name TEXT,
+    item_type TEXT,
+    customer_name TEXT,
+    quantity INTEGER NOT NULL,
+    price REAL NOT NULL,
+    total REAL NOT NULL,
+    cost REAL NOT NULL DEFAULT 0,
+    payment_type TEXT NOT NULL,
+    description TEXT,
+    sale_date TEXT NOT NULL,
+    invoice_number TEXT,
+    is_non_stock INTEGER NOT NULL DEFAULT 0,
+    created_by TEXT
+);
+
+CREATE TABLE IF NOT EXISTS purchase (
+    purchaseid INTEGER PRIMARY KEY AUTOINCREMENT,
+    store TEXT NOT NULL,
+    transaction_ref INTEGER,
+    productid INTEGER REFERENCES product(productid) ON DELETE SET NULL,
+    supplierid INTEGER REFERENCES supplier(supplierid) ON DELETE SET NULL,
+    warehouseid INTEGER REFERENCES warehouse_list(warehouseid) ON DELETE SET NULL,
+    quantity INTEGER NOT NULL,
+    price REAL NOT NULL,
+    total REAL NOT NULL,
+    payment_type TEXT NOT NULL,
+    description TEXT,
+    purchase_date TEXT NOT NULL,
+    invoice_number TEXT,
+    created_by TEXT
+);
+
+CREATE TABLE IF NOT EXISTS debt (
+    debtid INTEGER PRIMARY KEY AUTOINCREMENT,
+    store TEXT NOT NULL,
+    debt_type TEXT NOT NULL,
+    supplierid INTEGER REFERENCES supplier(supplierid) ON DELETE CASCADE,
+    customer_name TEXT,
+    reference_id INTEGER,
+    total_debt REAL NOT NULL,
+    paid_amount REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'active',
+    description TEXT,
+    debt_date TEXT NOT NULL,
+    due_date TEXT
+);
+
+CREATE TABLE IF NOT EXISTS payment_history (
+    paymentid INTEGER PRIMARY KEY AUTOINCREMENT,
+    debtid INTEGER NOT NULL REFERENCES debt(debtid) ON DELETE CASCADE,
+    paidamount REAL NOT NULL,
+    paidat TEXT NOT NULL,
+    description TEXT
+);
+
+CREATE TABLE IF NOT EXISTS stock_adjustment (
+    adjustmentid INTEGER PRIMARY KEY AUTOINCREMENT,
+    productid INTEGER NOT NULL REFERENCES product(productid) ON DELETE CASCADE,
+    warehouseid INTEGER REFERENCES warehouse_list(warehouseid) ON DELETE SET NULL,
+    adjustment_type TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    description TEXT,
+    adjusted_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS purchase_return (
+    return_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    store TEXT NOT NULL,
+    supplierid INTEGER REFERENCES supplier(supplierid) ON DELETE SET NULL,
+    warehouseid INTEGER REFERENCES warehouse_list(warehouseid) ON DELETE SET NULL,
+    total_amount REAL NOT NULL,
+    return_type TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'completed',
+    reason TEXT,
+    description TEXT,
+    return_date TEXT NOT NULL,
+    invoice_number TEXT,
+    created_by TEXT
+);
+
+CREATE TABLE IF NOT EXISTS purchase_return_item (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    return_id INTEGER NOT NULL REFERENCES purchase_return(return_id) ON DELETE CASCADE,
+    productid INTEGER REFERENCES product(productid) ON DELETE SET NULL,
+    quantity INTEGER NOT NULL,
+    price REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sale_return (
+    return_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    store TEXT NOT NULL,
+    warehouseid INTEGER REFERENCES warehouse_list(warehouseid) ON DELETE SET NULL,
+    customer_name TEXT,
+    total_amount REAL NOT NULL,
+    return_type TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'completed',
+    reason TEXT,
+    description TEXT,
+    return_date TEXT NOT NULL,
+    invoice_number TEXT,
+    created_by TEXT
+);
+
+CREATE TABLE IF NOT EXISTS sale_return_item (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    return_id INTEGER NOT NULL REFERENCES sale_return(return_id) ON DELETE CASCADE,
+    productid INTEGER REFERENCES product(productid) ON DELETE SET NULL,
+    quantity INTEGER NOT NULL,
+    price REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS operational_expense (
+    expense_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    store TEXT NOT NULL,
+    expense_type TEXT NOT NULL,
+    amount REAL NOT NULL,
+    description TEXT,
+    reference_id INTEGER,
+    account_id INTEGER REFERENCES accounts(account_id) ON DELETE SET NULL,
+    expense_date TEXT NOT NULL,
+    created_by TEXT
+);
+
+CREATE TABLE IF NOT EXISTS pegawai (
+    pegawai_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    store TEXT NOT NULL,
+    nama TEXT NOT NULL,
+    posisi TEXT,
+    gaji_bulanan REAL NOT NULL DEFAULT 0,
+    tanggal_pembayaran INTEGER NOT NULL DEFAULT 1,
+    created_at TEXT DEFAULT {_NOW},
+    updated_at TEXT DEFAULT {_NOW}
+);
+
+CREATE TABLE IF NOT EXISTS pegawai_payment (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    pegawai_id INTEGER NOT NULL REFERENCES pegawai(pegawai_id) ON DELETE CASCADE,
+    bulan TEXT NOT NULL,
+    jumlah REAL NOT NULL,
+    paid_at TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'paid'
+);
+
+CREATE INDEX IF NOT EXISTS idx_sale_store_date ON sale (store, sale_date);
+CREATE INDEX IF NOT EXISTS idx_purchase_store_date ON purchase (store, purchase_date);
+CREATE INDEX IF NOT EXISTS idx_account_tx_account_date ON account_transactions (account_id, transaction_date);
+CREATE INDEX IF NOT EXISTS idx_expense_store_date ON operational_expense (store, expense_date);
+CREATE INDEX IF NOT EXISTS idx_product_warehouse_warehouse ON product_warehouse (warehouseid);
+"""
+
+# Kolom boolean disimpan sebagai INTEGER di SQLite, dikonversi balik saat dibaca
+BOOLEAN_COLUMNS = {
+    "accounts": ("is_default",),
+    "sale": ("is_non_stock",),
+}
+
+# Relasi foreign key untuk embedded select, mis. "productsupply(price, supplier(suppliername))"
+# (tabel anak, kolom anak) -> (tabel induk, kolom induk)
+FOREIGN_KEYS = {
+    ("product_warehouse", "productid"): ("product", "productid"),
+    ("product_warehouse", "warehouseid"): ("warehouse_list", "warehouseid"),
+    ("productsupply", "productid"): ("product", "productid"),
+    ("productsupply", "supplierid"): ("supplier", "supplierid"),
+    ("account_transactions", "account_id"): ("accounts", "account_id"),
+    ("sale", "productid"): ("product", "productid"),
+    ("sale", "warehouseid"): ("warehouse_list", "warehouseid"),
+    ("purchase", "productid"): ("product", "productid"),
+    ("purchase", "supplierid"): ("supplier", "supplierid"),
+    ("purchase", "warehouseid"): ("warehouse_list", "warehouseid"),
+    ("debt", "supplierid"): ("supplier", "supplierid"),
+    ("payment_history", "debtid"): ("debt", "debtid"),
+    ("stock_adjustment", "productid"): ("product", "productid"),
+    ("stock_adjustment", "warehouseid"): ("warehouse_list", "warehouseid"),
+    ("purchase_return_item", "return_id"): ("purchase_return", "return_id"),
+    ("sale_return_item", "return_id"): ("sale_return", "return_id"),
+    ("operational_expense", "account_id"): ("accounts", "account_id"),
+    ("pegawai_payment", "pegawai_id"): ("pegawai", "pegawai_id"),
+}
@@ -0,0 +1,446 @@
+# app/outbox.py
+# Outbox lokal (SQLite) untuk RPC tulis di kasir: penjualan, pembelian dan pembayaran.
+# Setiap panggilan disimpan dulu ke disk dengan idempotency key, lalu dikirim oleh worker
+# background sesuai urutan. Jika Supabase lambat atau tidak bisa dihubungi, transaksi
+# tetap tersimpan dan dikirim ulang dengan backoff sampai berhasil.
+import datetime
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from app.db import get_client, invalidate_after_rpc
+
+logger = logging.getLogger(__name__)
+
+OUTBOX_PATH = os.getenv("OUTBOX_PATH", os.path.join("data", "outbox.db"))
+# Lama halaman menunggu hasil sebelum menganggap transaksi "antri"
+ACK_TIMEOUT = 2.0
+RETRY_BASE_DELAY = 2.0
+RETRY_MAX_DELAY = 300.0
+# Entri yang sudah terkirim disimpan sebentar untuk jejak audit, lalu dihapus
+KEEP_DONE_DAYS = 7
+# Lama klaim entri yang sedang dikirim. Harus lebih lama dari timeout satu panggilan RPC;
+# setelah lewat, worker lain (mis. proses yang mati di tengah kiriman) boleh mengambil alih
+CLAIM_LEASE_SECONDS = 300.0
+
+# RPC yang boleh lewat outbox -> parameter teks yang diberi tag idempotency key.
+# Deduplikasi (already_applied) bergantung pada teks ini tersimpan utuh di server dan terbaca
+# kembali: p_description sebagai kolom description di get_sale_history/get_purchase_history
+# (termasuk penjualan lain-lain), p_note sebagai payment_history.description. Halaman riwayat
+# dan pembayaran menampilkan kolom yang sama; worker juga memeriksanya sekali per RPC (lihat
+# OutboxWorker._check_roundtrip).
+OUTBOX_RPCS = {
+    "record_sale_transaction_multi": "p_description",
+    "record_other_sale": "p_description",
+    "record_purchase_transaction_multi": "p_description",
+    "record_customer_payment": "p_note",
+    "record_supplier_payment": "p_note",
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT NOT NULL UNIQUE,
+    rpc TEXT NOT NULL,
+    params TEXT NOT NULL,
+    store TEXT,
+    status TEXT NOT NULL DEFAULT 'pending',
+    owner TEXT,
+    claimed_at REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    result TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status, id);
+"""
+
+PENDING, SENDING, DONE, FAILED = "pending", "sending", "done", "failed"
+# Belum selesai: menunggu giliran atau sedang dikirim oleh salah satu worker
+QUEUED = (PENDING, SENDING)
+
+
+@dataclass
+class OutboxEntry:
+    id: int
+    idempotency_key: str
+    rpc: str
+    params: dict
+    store: Optional[str]
+    status: str
+    attempts: int
+    last_error: Optional[str]
+    result: Any
+    created_at: str
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> "OutboxEntry":
+        return cls(
+            id=row["id"],
+            idempotency_key=row["idempotency_key"],
+            rpc=row["rpc"],
+            params=json.loads(row["params"]),
+            store=row["store"],
+            status=row["status"],
+            attempts=row["attempts"],
+            last_error=row["last_error"],
+            result=json.loads(row["result"]) if row["result"] else None,
+            created_at=row["created_at"],
+        )
+
+
+def _connect() -> sqlite3.Connection:
+    if OUTBOX_PATH != ":memory:":
+        os.makedirs(os.path.dirname(OUTBOX_PATH) or ".", exist_ok=True)
+    conn = sqlite3.connect(OUTBOX_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = FULL")
+    conn.executescript(_SCHEMA)
+    columns = {row["name"] for row in conn.execute("PRAGMA table_info(outbox)")}
+    # Outbox dari versi sebelum ada klaim
+    for column, kind in (("owner", "TEXT"), ("claimed_at", "REAL")):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE outbox ADD COLUMN {column} {kind}")
+    return conn
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat()
+
+def _tag(key: str) -> str:
+    return f"[ref:{key}]"
+
+
+# Klasifikasi error
+
+def is_permanent_error(error: Exception) -> bool:
+    """Error dari database (validasi, stok kurang, constraint) tidak akan berhasil jika diulang."""
+    code = getattr(error, "code", None)
+    if not code:
+        return False
+    code = str(code)
+    return code.startswith(("P0", "22", "23", "42", "PGRST"))
+
+
+# Pengecekan idempotensi: apakah kiriman sebelumnya sebenarnya sudah sampai di server?
+
+def _history_window(entry: OutboxEntry) -> tuple:
+    """Rentang hari [awal, akhir) tempat baris entri mungkin tercatat di server. Tanggal server
+    bisa bergeser sehari dari tanggal lokal (UTC vs jam setempat, sekitar tengah malam), dan
+    tanpa p_transaction_date server memakai waktu kirim: antara entri dibuat dan hari ini."""
+    explicit = entry.params.get("p_transaction_date")
+    first = datetime.date.fromisoformat((explicit or entry.created_at)[:10])
+    last = first if explicit else max(first, datetime.date.today())
+    return first - datetime.timedelta(days=1), last + datetime.timedelta(days=2)
+
+def _history_has_tag(rpc_name: str, entry: OutboxEntry) -> bool:
+    start, end = _history_window(entry)
+    response = get_client().rpc(rpc_name, {
+        "store_input": entry.store,
+        "start_date_input": start.isoformat(),
+        "end_date_input": end.isoformat(),
+    }).ilike("description", f"*{_tag(entry.idempotency_key)}*").limit(1).execute()
+    return bool(response.data)
+
+def _payment_has_tag(entry: OutboxEntry) -> bool:
+    response = get_client().table("payment_history").select("debtid").eq(
+        "debtid", entry.params["p_debtid"]
+    ).ilike("description", f"*{_tag(entry.idempotency_key)}*").limit(1).execute()
+    return bool(response.data)
+
+def already_applied(entry: OutboxEntry) -> bool:
+    if entry.rpc in ("record_sale_transaction_multi", "record_other_sale"):
+        return _history_has_tag("get_sale_history", entry)
+    if entry.rpc == "record_purchase_transaction_multi":
+        return _history_has_tag("get_purchase_history", entry)
+    if entry.rpc in ("record_customer_payment", "record_supplier_payment"):
+        return _payment_has_tag(entry)
+    return False
+
+
+# API untuk halaman
+
+def enqueue(rpc_name: str, params: dict, store: Optional[str]) -> str:
+    """Simpan panggilan RPC ke outbox dan kembalikan idempotency key-nya."""
+    if rpc_name not in OUTBOX_RPCS:
+        raise ValueError(f"RPC {rpc_name} tidak didukung outbox")
+    key = uuid.uuid4().hex[:16]
+    params = dict(params)
+    tag_param = OUTBOX_RPCS[rpc_name]
+    params[tag_param] = f"{params.get(tag_param) or ''} {_tag(key)}".strip()
+
+    conn = _connect()
+    try:
+        now = _now()
+        conn.execute(
+            "INSERT INTO outbox (idempotency_key, rpc, params, store, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, rpc_name, json.dumps(params, default=str), store, now, now),
+        )
+    finally:
+        conn.close()
+    worker.wake()
+    return key
+
+def get_entry(key: str) -> Optional[OutboxEntry]:
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT * FROM outbox WHERE idempotency_key = ?", (key,)).fetchone()
+        return OutboxEntry.from_row(row) if row else None
+    finally:
+        conn.close()
+
+def wait_for(key: str, timeout: float = ACK_TIMEOUT) -> Optional[OutboxEntry]:
+    """Tunggu sampai entri selesai/gagal atau timeout; kembalikan status terakhirnya."""
+    deadline = time.monotonic() + timeout
+    while True:
+        entry = get_entry(key)
+        if entry is None or entry.status not in QUEUED or time.monotonic() >= deadline:
+            return entry
+        with worker.processed:
+            worker.processed.wait(timeout=min(0.5, max(0.0, deadline - time.monotonic())))
+
+def submit(rpc_name: str, params: dict, store: Optional[str], timeout: float = ACK_TIMEOUT) -> OutboxEntry:
+    """Enqueue lalu tunggu sebentar. Status DONE membawa result; PENDING berarti masih antri
+    dan akan dikirim otomatis (begitu pula SENDING); FAILED berarti ditolak server dan sudah dikeluarkan dari antrian."""
+    return submit_many(rpc_name, [params], store, timeout)[0]
+
+def submit_many(rpc_name: str, params_list: list, store: Optional[str], timeout: float = ACK_TIMEOUT) -> list:
+    """Seperti submit() untuk beberapa panggilan berurutan (mis. satu RPC per item keranjang)."""
+    keys = [enqueue(rpc_name, params, store) for params in params_list]
+    deadline = time.monotonic() + timeout
+    entries = [wait_for(key, max(0.0, deadline - time.monotonic())) for key in keys]
+    for entry in entries:
+        if entry.status == FAILED:
+            discard(entry.idempotency_key)
+    return entries
+
+def pending_entries(store: Optional[str] = None) -> list:
+    conn = _connect()
+    try:
+        sql = "SELECT * FROM outbox WHERE status IN (?, ?, ?)"
+        params = [*QUEUED, FAILED]
+        if store is not None:
+            sql += " AND store = ?"
+            params.append(store)
+        return [OutboxEntry.from_row(r) for r in conn.execute(sql + " ORDER BY id", params).fetchall()]
+    finally:
+        conn.close()
+
+def retry(key: str):
+    conn = _connect()
+    try:
+        conn.execute(
+            "UPDATE outbox SET status = ?, next_attempt_at = 0, updated_at = ? WHERE idempotency_key = ? AND status = ?",
+            (PENDING, _now(), key, FAILED),
+        )
+    finally:
+        conn.close()
+    worker.wake()
+
+def discard(key: str):
+    conn = _connect()
+    try:
+        conn.execute("DELETE FROM outbox WHERE idempotency_key = ? AND status NOT IN (?, ?)", (key, DONE, SENDING))
+    finally:
+        conn.close()
+
+
+# Worker
+
+class OutboxWorker:
+    """Thread background yang mengirim entri outbox satu per satu sesuai urutan masuk.
+
+    Beberapa proses aplikasi bisa berbagi satu file outbox. Sebelum mengirim, worker mengklaim
+    entri secara atomik (status 'sending' + owner); entri yang sedang diklaim worker lain tidak
+    disentuh sampai klaimnya lewat CLAIM_LEASE_SECONDS.
+    """
+
+    def __init__(self):
+        self._wake = threading.Event()
+        self.processed = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # RPC yang tag idempotency-nya sudah terbukti terbaca kembali dari server
+        self._roundtrip_checked: set = set()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="outbox-worker", daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self.start()
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                delay = self.process_pending()
+            except Exception as e:
+                logger.error(f"Outbox worker error: {e}")
+                delay = RETRY_BASE_DELAY
+            self._wake.wait(timeout=delay)
+
+    def process_pending(self) -> float:
+        """Kirim entri pending sesuai urutan. Mengembalikan jeda (detik) sebelum putaran berikutnya."""
+        conn = _connect()
+        try:
+            while True:
+                row = conn.execute(
+                    "SELECT * FROM outbox WHERE status IN (?, ?) ORDER BY id LIMIT 1", QUEUED
+                ).fetchone()
+                if row is None:
+                    self._prune(conn)
+                    return 60.0
+                now = time.time()
+                if row["status"] == SENDING:
+                    lease_left = row["claimed_at"] + CLAIM_LEASE_SECONDS - now
+                    if lease_left > 0:
+                        # Sedang dikirim worker lain; entri di belakangnya menunggu agar urutan terjaga
+                        return min(lease_left, RETRY_BASE_DELAY)
+                    logger.warning(f"Outbox [{row['idempotency_key']}]: klaim {row['owner']} kedaluwarsa, diambil alih")
+                else:
+                    wait = row["next_attempt_at"] - now
+                    if wait > 0:
+                        # Entri terdepan belum boleh dicoba; entri di belakangnya ikut menunggu agar urutan terjaga
+                        return wait
+                if not self._claim(conn, row):
+                    continue
+                self._deliver(conn, OutboxEntry.from_row(row))
+                with self.processed:
+                    self.processed.notify_all()
+        finally:
+            conn.close()
+
+    def _claim(self, conn: sqlite3.Connection, row: sqlite3.Row) -> bool:
+        """Tandai entri sedang dikirim oleh worker ini. False jika worker lain lebih dulu
+        (status/klaim berubah sejak dibaca)."""
+        cursor = conn.execute(
+            "UPDATE outbox SET status = ?, owner = ?, claimed_at = ?, updated_at = ? "
+            "WHERE id = ? AND status = ? AND claimed_at IS ?",
+            (SENDING, self.owner, time.time(), _now(), row["id"], row["status"], row["claimed_at"]),
+        )
+        return cursor.rowcount == 1
+
+    def _prune(self, conn: sqlite3.Connection):
+        cutoff = (datetime.datetime.now() - datetime.timedelta(days=KEEP_DONE_DAYS)).isoformat()
+        conn.execute("DELETE FROM outbox WHERE status = ? AND updated_at < ?", (DONE, cutoff))
+
+    def _deliver(self, conn: sqlite3.Connection, entry: OutboxEntry):
+        try:
+            if entry.attempts > 0 and already_applied(entry):
+                self._finish(conn, entry, DONE, None, "sudah tercatat di server")
+                return
+            # Percobaan dicatat ke disk sebelum dikirim: jika proses mati setelah server menyimpan
+            # tetapi sebelum hasilnya dicatat, entri ini dicek dulu (already_applied) saat diambil alih
+            conn.execute("UPDATE outbox SET attempts = attempts + 1, updated_at = ? WHERE id = ?", (_now(), entry.id))
+            result = get_client().rpc(entry.rpc, entry.params).execute().data
+            self._finish(conn, entry, DONE, result, None)
+            self._check_roundtrip(entry)
+        except Exception as e:
+            if is_permanent_error(e):
+                logger.error(f"Outbox {entry.rpc} [{entry.idempotency_key}] ditolak: {e}")
+                self._finish(conn, entry, FAILED, None, str(e))
+                return
+            attempts = entry.attempts + 1
+            delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempts - 1))
+            logger.warning(f"Outbox {entry.rpc} [{entry.idempotency_key}] gagal (percobaan {attempts}), ulang dalam {delay:.0f} detik: {e}")
+            conn.execute(
+                "UPDATE outbox SET status = ?, owner = NULL, claimed_at = NULL, attempts = ?, next_attempt_at = ?, "
+                "last_error = ?, updated_at = ? WHERE id = ? AND owner = ?",
+                (PENDING, attempts, time.time() + delay, str(e), _now(), entry.id, self.owner),
+            )
+
+    def _finish(self, conn: sqlite3.Connection, entry: OutboxEntry, status: str, result: Any, note: Optional[str]):
+        conn.execute(
+            "UPDATE outbox SET status = ?, owner = NULL, claimed_at = NULL, result = ?, last_error = ?, updated_at = ? "
+            "WHERE id = ? AND owner = ?",
+            (status, json.dumps(result, default=str), note if status == FAILED else None, _now(), entry.id, self.owner),
+        )
+        if status == DONE:
+            invalidate_after_rpc(entry.rpc, entry.store, entry.params)
+
+    def _check_roundtrip(self, entry: OutboxEntry):
+        """Sekali per RPC: pastikan tag yang baru terkirim bisa ditemukan already_applied. Jika
+        tidak, kiriman ulang setelah timeout tidak bisa dideduplikasi dan perlu diperbaiki."""
+        if entry.rpc in self._roundtrip_checked:
+            return
+        try:
+            found = already_applied(entry)
+        except Exception as e:
+            logger.warning(f"Outbox {entry.rpc}: tag idempotency belum bisa diperiksa: {e}")
+            return
+        self._roundtrip_checked.add(entry.rpc)
+        if not found:
+            logger.error(
+                f"Outbox {entry.rpc} [{entry.idempotency_key}]: tag {_tag(entry.idempotency_key)} tidak ditemukan "
+                f"kembali di server; kiriman ulang transaksi ini tidak bisa dideduplikasi"
+            )
+
+
+worker = OutboxWorker()
+
+def start_worker():
+    """Mulai worker (aman dipanggil berulang), mis. sekali per sesi setelah login di main.py, agar
+    sisa antrian dari sesi sebelumnya ikut terkirim setelah aplikasi restart."""
+    worker.start()
+    worker.wake()
+
+
+# Tampilan Streamlit
+
+def report_submission(entries: list, success_message: str, error_prefix: str = "Gagal menyimpan transaksi") -> bool:
+    """Tampilkan hasil submit()/submit_many(). True jika keranjang boleh dikosongkan
+    (semua terkirim atau tersimpan di antrian)."""
+    import streamlit as st
+
+    if not isinstance(entries, list):
+        entries = [entries]
+    failed = [e for e in entries if e.status == FAILED]
+    if failed:
+        st.error(f"{error_prefix}: {failed[0].last_error}")
+        if len(failed) < len(entries):
+            st.warning(f"{len(entries) - len(failed)} dari {len(entries)} item tetap tersimpan.")
+        return False
+    if any(e.status in QUEUED for e in entries):
+        # Toast tetap tampil setelah st.rerun()
+        st.toast("Server lambat/tidak terhubung. Transaksi disimpan di antrian dan akan dikirim otomatis.", icon="⏳")
+    else:
+        st.success(success_message)
+    return True
+
+def show_outbox_status(store: Optional[str]):
+    """Ringkasan antrian di sidebar: jumlah transaksi yang belum terkirim dan yang ditolak server."""
+    import streamlit as st
+
+    entries = pending_entries(store)
+    if not entries:
+        return
+    pending = [e for e in entries if e.status in QUEUED]
+    failed = [e for e in entries if e.status == FAILED]
+    with st.sidebar.expander(f"Antrian Transaksi ({len(entries)})", expanded=bool(failed)):
+        if pending:
+            st.caption(f"{len(pending)} transaksi menunggu dikirim ke server.")
+            if pending[0].last_error:
+                st.caption(f"Error terakhir: {pending[0].last_error}")
+        for entry in failed:
+            st.error(f"{entry.rpc} ({entry.created_at[:16]}): {entry.last_error}")
+            col1, col2 = st.columns(2)
+            if col1.button("Coba Lagi", key=f"outbox_retry_{entry.idempotency_key}"):
+                retry(entry.idempotency_key)
+                st.rerun()
+            if col2.button("Buang", key=f"outbox_discard_{entry.idempotency_key}"):
+                discard(entry.idempotency_key)
+                st.rerun()
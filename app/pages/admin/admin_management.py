@@ -1,5 +1,9 @@
 import streamlit as st
-from app.db import get_client
+from app.db import (
+    get_client, invalidate_reference, invalidate_after_rpc,
+    count_staff_by_store, supplier_debt_totals, warehouse_stock_totals,
+)
+from app import rollups, sales_facts
 from app.auth import change_password, reset_password_admin
 import pandas as pd
 import datetime
@@ -80,15 +84,12 @@ def show():
                 stores = sorted(list(set([user['store'] for user in users_resp.data if user['store']])))
                 
                 if stores:
-                    store_data = []
-                    for store in stores:
-                        count_resp = supabase.table("users").select("*", count='exact').eq("store", store).eq("role", "pegawai").execute()
-                        staff_count = count_resp.count if count_resp.count else 0
-                        store_data.append({
-                            "Nama Toko": store,
-                            "Jumlah Staff": staff_count,
-                            "Status": "Aktif"
-                        })
+                    staff_counts = count_staff_by_store()
+                    store_data = [{
+                        "Nama Toko": store,
+                        "Jumlah Staff": staff_counts.get(store, 0),
+                        "Status": "Aktif"
+                    } for store in stores]
                     
                     df = pd.DataFrame(store_data)
                     st.dataframe(df, use_container_width=True, hide_index=True)
@@ -184,6 +185,7 @@ def show():
                                 try:
                                     response = supabase.table("users").update({"store": new_store_name}).eq("store", selected_store).execute()
                                     if response.data:
+                                        invalidate_reference(selected_store)
                                         st.success(f"✅ Nama toko berhasil diubah dari '{selected_store}' ke '{new_store_name}'!")
                                         st.rerun()
                                     else:
@@ -239,6 +241,9 @@ def show():
                                     result = supabase.rpc("delete_store_cascade", {"p_store_name": selected_store_delete}).execute()
                                     data = parse_rpc_result(result)
                                     if data.get('success'):
+                                        invalidate_after_rpc("delete_store_cascade", selected_store_delete)
+                                        rollups.reset(selected_store_delete)
+                                        sales_facts.reset(selected_store_delete)
                                         deleted = data.get('deleted_counts', {})
                                         st.success(f"✅ Toko '{selected_store_delete}' berhasil dihapus!")
                                         st.info(f"""
@@ -256,6 +261,9 @@ def show():
                                 except Exception as e:
                                     parsed = parse_rpc_exception(e)
                                     if parsed and parsed.get('success'):
+                                        invalidate_after_rpc("delete_store_cascade", selected_store_delete)
+                                        rollups.reset(selected_store_delete)
+                                        sales_facts.reset(selected_store_delete)
                                         deleted = parsed.get('deleted_counts', {})
                                         st.success(f"✅ Toko '{selected_store_delete}' berhasil dihapus!")
                                         st.rerun()
@@ -287,13 +295,10 @@ def show():
                         suppliers_resp = supabase.table("supplier").select("supplierid, suppliername, supplierno, address, description").eq("store", selected_store_supplier).order("suppliername").execute()
                         
                         if suppliers_resp.data:
+                            debt_totals = supplier_debt_totals(selected_store_supplier)
                             sup_data = []
                             for sup in suppliers_resp.data:
-                                debt_resp = supabase.rpc("get_supplier_debt_total", {
-                                    "p_store": selected_store_supplier,
-                                    "p_supplier_id": sup['supplierid']
-                                }).execute()
-                                total_debt = debt_resp.data if debt_resp.data else 0
+                                total_debt = debt_totals.get(sup['supplierid'], 0)
                                 
                                 sup_data.append({
                                     'supplierid': sup['supplierid'],
@@ -351,6 +356,7 @@ def show():
                                         }).execute()
                                         data = parse_rpc_result(result)
                                         if data.get('success'):
+                                            invalidate_after_rpc("update_supplier", selected_store_supplier)
                                             st.success("✅ Supplier berhasil diupdate!")
                                             st.rerun()
                                         else:
@@ -358,6 +364,7 @@ def show():
                                     except Exception as e:
                                         parsed = parse_rpc_exception(e)
                                         if parsed and parsed.get('success'):
+                                            invalidate_after_rpc("update_supplier", selected_store_supplier)
                                             st.success("✅ Supplier berhasil diupdate!")
                                             st.rerun()
                                         else:
@@ -377,6 +384,7 @@ def show():
                                     }).execute()
                                     data = parse_rpc_result(result)
                                     if data.get('success'):
+                                        invalidate_after_rpc("delete_supplier_permanent", selected_store_supplier)
                                         st.success(data.get('message'))
                                         st.rerun()
                                     else:
@@ -384,6 +392,7 @@ def show():
                                 except Exception as e:
                                     parsed = parse_rpc_exception(e)
                                     if parsed and parsed.get('success'):
+                                        invalidate_after_rpc("delete_supplier_permanent", selected_store_supplier)
                                         st.success(parsed.get('message', 'Supplier berhasil dihapus!'))
                                         st.rerun()
                                     else:
@@ -416,17 +425,13 @@ def show():
                         warehouses_resp = supabase.table("warehouse_list").select("warehouseid, name").eq("store", selected_store_warehouse).order("name").execute()
                         
                         if warehouses_resp.data:
-                            wh_data = []
-                            for wh in warehouses_resp.data:
-                                stock_resp = supabase.table("product_warehouse").select("quantity").eq("warehouseid", wh['warehouseid']).execute()
-                                total_stock = sum([s['quantity'] for s in (stock_resp.data or [])])
-                                product_count = len([s for s in (stock_resp.data or []) if s['quantity'] > 0])
-                                wh_data.append({
-                                    'warehouseid': wh['warehouseid'],
-                                    'name': wh['name'],
-                                    'product_count': product_count,
-                                    'total_stock': total_stock
-                                })
+                            stock_totals = warehouse_stock_totals([wh['warehouseid'] for wh in warehouses_resp.data])
+                            wh_data = [{
+                                'warehouseid': wh['warehouseid'],
+                                'name': wh['name'],
+                                'product_count': stock_totals[wh['warehouseid']]['product_count'],
+                                'total_stock': stock_totals[wh['warehouseid']]['total_stock']
+                            } for wh in warehouses_resp.data]
                             
                             df_wh = pd.DataFrame(wh_data)
                             st.dataframe(
@@ -509,6 +514,7 @@ def show():
                                             }).execute()
                                             data = parse_rpc_result(result)
                                             if data.get('success'):
+                                                invalidate_after_rpc("migrate_all_warehouse_stock", selected_store_warehouse)
                                                 st.success(data.get('message'))
                                                 st.balloons()
                                                 st.rerun()
@@ -517,6 +523,7 @@ def show():
                                         except Exception as e:
                                             parsed = parse_rpc_exception(e)
                                             if parsed and parsed.get('success'):
+                                                invalidate_after_rpc("migrate_all_warehouse_stock", selected_store_warehouse)
                                                 st.success(parsed.get('message', 'Migrasi stok berhasil!'))
                                                 st.balloons()
                                                 st.rerun()
@@ -548,6 +555,7 @@ def show():
                                             }).execute()
                                             data = parse_rpc_result(result)
                                             if data.get('success'):
+                                                invalidate_after_rpc("migrate_product_stock", selected_store_warehouse)
                                                 st.success(data.get('message'))
                                                 st.rerun()
                                             else:
@@ -555,6 +563,7 @@ def show():
                                         except Exception as e:
                                             parsed = parse_rpc_exception(e)
                                             if parsed and parsed.get('success'):
+                                                invalidate_after_rpc("migrate_product_stock", selected_store_warehouse)
                                                 st.success(parsed.get('message', 'Migrasi stok berhasil!'))
                                                 st.rerun()
                                             else:
@@ -581,9 +590,9 @@ def show():
                             
                             wh_id = warehouse_options[selected_warehouse]
                             
-                            stock_resp = supabase.table("product_warehouse").select("quantity").eq("warehouseid", wh_id).execute()
-                            total_stock = sum([s['quantity'] for s in (stock_resp.data or [])])
-                            product_count = len([s for s in (stock_resp.data or []) if s['quantity'] > 0])
+                            wh_totals = warehouse_stock_totals([wh_id])[wh_id]
+                            total_stock = wh_totals['total_stock']
+                            product_count = wh_totals['product_count']
                             
                             st.info(f"Gudang ini memiliki **{product_count} jenis produk** dengan total **{total_stock} unit** stok.")
                             
@@ -600,6 +609,7 @@ def show():
                                             }).execute()
                                             data = parse_rpc_result(result)
                                             if data.get('success'):
+                                                invalidate_after_rpc("update_warehouse", selected_store_warehouse)
                                                 st.success("✅ Gudang berhasil diupdate!")
                                                 st.rerun()
                                             else:
@@ -608,6 +618,7 @@ def show():
                                             # Coba parse JSON dari exception
                                             parsed = parse_rpc_exception(e)
                                             if parsed and parsed.get('success'):
+                                                invalidate_after_rpc("update_warehouse", selected_store_warehouse)
                                                 st.success("✅ Gudang berhasil diupdate!")
                                                 st.rerun()
                                             else:
@@ -642,6 +653,7 @@ def show():
                                     }).execute()
                                     data = parse_rpc_result(result)
                                     if data.get('success'):
+                                        invalidate_after_rpc("delete_warehouse_permanent", selected_store_warehouse)
                                         st.success(data.get('message'))
                                         if force_delete:
                                             st.warning(f"Stok yang dihapus: {data.get('stock_deleted', 0)} unit")
@@ -651,6 +663,7 @@ def show():
                                 except Exception as e:
                                     parsed = parse_rpc_exception(e)
                                     if parsed and parsed.get('success'):
+                                        invalidate_after_rpc("delete_warehouse_permanent", selected_store_warehouse)
                                         st.success(parsed.get('message', 'Gudang berhasil dihapus!'))
                                         if force_delete:
                                             st.warning(f"Stok yang dihapus: {parsed.get('stock_deleted', 0)} unit")
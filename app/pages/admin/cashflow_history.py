@@ -1,6 +1,6 @@
 import streamlit as st
 from app.db import get_client
-import pandas as pd
+from app.utils.tables import typed_frame, money_column, datetime_column
 import datetime
 
 def show():
@@ -53,7 +53,10 @@ def show():
             if not history:
                 st.info("Tidak ada transaksi pada periode ini untuk rekening yang dipilih.")
             else:
-                df = pd.DataFrame(history)
+                df = typed_frame(
+                    history, numeric=("amount", "balance_after"), datetimes=("transaction_date",),
+                    categories=("transaction_type",),
+                )
                 
                 # Extract No. Nota 
                 def extract_nota(desc):
@@ -111,10 +114,11 @@ def show():
                         }
                         return type_labels.get(tx_type, f"{tx_type}")
                     
-                    df['Jenis'] = df['transaction_type'].apply(get_type_label)
+                    # Dipetakan per kategori, bukan per baris
+                    df['Jenis'] = df['transaction_type'].map(get_type_label).astype("category")
                     
-                    df['Debit'] = df['amount'].apply(lambda x: x if x > 0 else None)
-                    df['Kredit'] = df['amount'].apply(lambda x: -x if x < 0 else None)
+                    df['Debit'] = df['amount'].where(df['amount'] > 0)
+                    df['Kredit'] = (-df['amount']).where(df['amount'] < 0)
                     
                     df = df.rename(columns={
                         "transaction_date": "Tanggal",
@@ -122,20 +126,21 @@ def show():
                         "balance_after": "Saldo Akhir"
                     })
                     
-                    df['Tanggal'] = pd.to_datetime(df['Tanggal'], format="mixed").dt.strftime('%Y-%m-%d %H:%M')
-                    
-                    for col in ['Debit', 'Kredit', 'Saldo Akhir']:
-                        df[col] = df[col].apply(lambda x: f"Rp {x:,.0f}" if pd.notna(x) else "")
-                    
                     st.dataframe(
                         df[['Tanggal', 'Jenis', 'No. Nota', 'Keterangan', 'Debit', 'Kredit', 'Saldo Akhir']],
                         use_container_width=True,
-                        hide_index=True
+                        hide_index=True,
+                        column_config={
+                            "Tanggal": datetime_column(),
+                            "Debit": money_column(),
+                            "Kredit": money_column(),
+                            "Saldo Akhir": money_column(),
+                        }
                     )
                     
                     # Summary
-                    total_debit = df['Debit'].apply(lambda x: float(x.replace('Rp ', '').replace(',', '')) if x else 0).sum()
-                    total_kredit = df['Kredit'].apply(lambda x: float(x.replace('Rp ', '').replace(',', '')) if x else 0).sum()
+                    total_debit = df['Debit'].sum()
+                    total_kredit = df['Kredit'].sum()
                     
                     col_summary1, col_summary2, col_summary3 = st.columns(3)
                     with col_summary1:
@@ -1,7 +1,423 @@
 import streamlit as st
+from app import db, rollups, sales_facts
 from app.db import get_client
+from app.utils.parallel import ParallelQueries, QueryTimeout
+from app.utils.downsample import MAX_CHART_POINTS, downsample
+from app.utils.tables import money_column
 import pandas as pd
 import datetime
+import logging
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Batas waktu per RPC dashboard (detik)
+QUERY_TIMEOUT = 20
+# Jumlah produk di daftar terlaris/paling sedikit terjual, dan batas hari produk lambat terjual
+PRODUCT_LIMIT = 10
+SLOW_MOVING_DAYS = 60
+# Pilihan periode grafik tren; Otomatis memakai rollups.trend_bucket menurut panjang rentang
+TREND_BUCKET_OPTIONS = {"Otomatis": None, "Harian": "day", "Mingguan": "week", "Bulanan": "month"}
+TREND_BUCKET_LABELS = {"day": "harian", "week": "mingguan", "month": "bulanan"}
+
+ALL_STORES = "Semua Toko"
+# Jumlah toko yang dihitung bersamaan pada mode Semua Toko. Pool query dipakai bersama semua
+# sesi (app/utils/parallel.py), jadi satu admin tidak boleh memenuhi seluruh worker.
+COMPARISON_MAX_IN_FLIGHT = 4
+# Kolom hasil performa yang dibandingkan antar toko
+COMPARISON_COLUMNS = {
+    "total_revenue": "Pendapatan",
+    "gross_profit": "Laba Kotor",
+    "total_expenses": "Biaya Operasional",
+    "net_profit": "Laba Bersih",
+    "transaction_count": "Transaksi",
+}
+
+def range_params(store: str, start_date: datetime.date, end_date: datetime.date) -> dict:
+    """Parameter RPC untuk rentang [start_date, end_date] (end_date ikut dihitung)."""
+    return {
+        "store_input": store,
+        "start_date": start_date.isoformat(),
+        "end_date": (end_date + datetime.timedelta(days=1)).isoformat()
+    }
+
+def local_query(supabase, name: str, rpc_name: Optional[str], params: dict, compute, *args):
+    """Query dashboard yang dihitung lokal (rollup harian di app/rollups.py atau fakta penjualan
+    di app/sales_facts.py), lewat cache dashboard (db.cached_dashboard_query). Jika perhitungan
+    lokal gagal atau rentangnya belum lengkap di rollup (rollups.RollupPending), RPC aslinya yang
+    dipanggil. Tanpa start_date di params, hasilnya disimpan sebagai query tanpa rentang."""
+    store, start, end = params["store_input"], params.get("start_date"), params.get("end_date")
+
+    def run():
+        try:
+            return compute(*args)
+        except Exception as e:
+            if rpc_name is None:
+                raise
+            if isinstance(e, rollups.RollupPending):
+                logger.info(f"{e}; {rpc_name} memakai RPC")
+            else:
+                logger.warning(f"Perhitungan lokal {rpc_name} untuk {store} gagal, memakai RPC: {e}")
+            return supabase.rpc(rpc_name, params).execute().data
+
+    return lambda: db.cached_dashboard_query(store, name, start, end, run)
+
+def performance_query(supabase, params: dict):
+    args = (params["store_input"], params["start_date"], params["end_date"])
+    return local_query(supabase, "performance", "get_store_business_performance_v2", params, rollups.store_performance, *args)
+
+def fetch_dashboard_queries(supabase, store: str, start_date: datetime.date, end_date: datetime.date,
+                            trend_bucket: str = "day") -> ParallelQueries:
+    """Siapkan semua query dashboard; parameternya sama dan tidak saling bergantung.
+    Hasilnya disimpan di cache dashboard sehingga render ulang untuk toko dan rentang yang
+    sama tidak menghitung ulang sampai ada transaksi baru."""
+    params = range_params(store, start_date, end_date)
+    args = (store, params["start_date"], params["end_date"])
+    top_params = {**params, "limit_count": PRODUCT_LIMIT}
+    slow_params = {"store_input": store, "days_threshold": SLOW_MOVING_DAYS}
+
+    batch = ParallelQueries(timeout=QUERY_TIMEOUT)
+    batch.add("performance", performance_query(supabase, params))
+    batch.add("kpis", local_query(supabase, "kpis", "get_store_kpis", params, rollups.store_kpis, *args))
+    batch.add("top_products", local_query(supabase, "top_products", "get_top_selling_products", top_params,
+                                          sales_facts.top_selling_products, *args, PRODUCT_LIMIT))
+    batch.add("bottom_products", local_query(supabase, "bottom_products", None, params,
+                                             sales_facts.bottom_selling_products, *args, PRODUCT_LIMIT))
+    batch.add("slow_products", local_query(supabase, "slow_products", "get_slow_moving_products", slow_params,
+                                           sales_facts.slow_moving_products, store, SLOW_MOVING_DAYS))
+    batch.add("expenses", local_query(supabase, "expenses", "get_expense_summary", params, rollups.expense_summary, *args))
+    batch.add("trend", local_query(supabase, f"trend_{trend_bucket}", None, params, rollups.sales_trend, *args, trend_bucket))
+    return batch
+
+def fetch_store_comparison(supabase, stores: list, start_date: datetime.date, end_date: datetime.date) -> ParallelQueries:
+    """Query performa semua toko; memakai entri cache yang sama dengan dashboard per toko."""
+    batch = ParallelQueries(timeout=QUERY_TIMEOUT, max_in_flight=COMPARISON_MAX_IN_FLIGHT)
+    for store in stores:
+        batch.add(store, performance_query(supabase, range_params(store, start_date, end_date)))
+    return batch
+
+def comparison_frame(performance: dict) -> pd.DataFrame:
+    """{toko: baris performa} menjadi tabel perbandingan berperingkat menurut laba bersih."""
+    rows = [
+        {"Toko": store, **{label: perf.get(key) or 0 for key, label in COMPARISON_COLUMNS.items()}}
+        for store, perf in performance.items()
+    ]
+    df = pd.DataFrame(rows, columns=["Toko", *COMPARISON_COLUMNS.values()])
+    df["Margin (%)"] = (df["Laba Bersih"] / df["Pendapatan"].where(df["Pendapatan"] > 0) * 100).fillna(0)
+    df["Porsi Pendapatan (%)"] = (df["Pendapatan"] / (df["Pendapatan"].sum() or 1) * 100)
+    df = df.sort_values(["Laba Bersih", "Pendapatan"], ascending=False, ignore_index=True)
+    df.insert(0, "Peringkat", pd.array(range(1, len(df) + 1), dtype="Int64"))
+    return df
+
+def render_store_comparison(df: pd.DataFrame, failed: dict):
+    totals = df[list(COMPARISON_COLUMNS.values())].sum()
+    total_margin = totals["Laba Bersih"] / totals["Pendapatan"] * 100 if totals["Pendapatan"] > 0 else 0
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Total Pendapatan", f"Rp {totals['Pendapatan']:,.0f}")
+    with col2:
+        st.metric("Total Laba Kotor", f"Rp {totals['Laba Kotor']:,.0f}")
+    with col3:
+        st.metric("Total Laba Bersih", f"Rp {totals['Laba Bersih']:,.0f}", delta=f"Margin: {total_margin:.1f}%")
+    with col4:
+        st.metric("Total Transaksi", f"{totals['Transaksi']:,.0f}")
+
+    if failed:
+        st.warning(f"Data {len(failed)} toko belum tersedia: " + ", ".join(f"{store} ({error})" for store, error in failed.items()))
+    if df.empty:
+        return
+
+    total_row = {"Toko": "Total", **totals.to_dict(), "Margin (%)": total_margin, "Porsi Pendapatan (%)": 100.0 if totals["Pendapatan"] > 0 else 0}
+    table = pd.concat([df, pd.DataFrame([total_row])], ignore_index=True)
+    st.dataframe(
+        table,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "Peringkat": st.column_config.NumberColumn("Peringkat", format="%d", width="small"),
+            **{label: money_column() for label in ("Pendapatan", "Laba Kotor", "Biaya Operasional", "Laba Bersih")},
+            "Transaksi": st.column_config.NumberColumn("Transaksi", format="%d"),
+            "Margin (%)": st.column_config.NumberColumn("Margin (%)", format="%.1f%%"),
+            "Porsi Pendapatan (%)": st.column_config.ProgressColumn("Porsi Pendapatan", format="%.1f%%", min_value=0, max_value=100),
+        }
+    )
+    st.bar_chart(df.set_index("Toko")[["Laba Bersih"]])
+
+def show_store_comparison(supabase, stores: list, start_date: datetime.date, end_date: datetime.date):
+    """Mode Semua Toko: performa setiap toko dihitung paralel lalu dibandingkan."""
+    progress = st.progress(0.0, text="Memuat data toko...")
+    performance, failed = {}, {}
+    for done, result in enumerate(fetch_store_comparison(supabase, stores, start_date, end_date).as_completed(), start=1):
+        if result.ok:
+            performance[result.name] = result.data[0] if result.data else {}
+        else:
+            failed[result.name] = result.error
+        progress.progress(done / len(stores), text=f"Memuat data toko... {done}/{len(stores)}")
+    progress.empty()
+
+    render_store_comparison(comparison_frame(performance), failed)
+
+def render_performance(perf_data, start_date, end_date):
+    perf = perf_data[0] if perf_data else {}
+
+    # Modal & HPP
+    st.markdown("#### Modal")
+    col_m1, col_m2 = st.columns(2)
+    with col_m1:
+        total_modal = perf.get('total_modal', 0) or 0
+        st.metric(
+            "Modal (Total Pembelian)",
+            f"Rp {total_modal:,.0f}",
+            help="Total nilai pembelian barang sepanjang waktu"
+        )
+    with col_m2:
+        hpp = perf.get('hpp', 0) or 0
+        st.metric(
+            "HPP (Harga Pokok Penjualan)",
+            f"Rp {hpp:,.0f}",
+            help="Biaya pokok dari barang yang terjual dalam periode ini"
+        )
+
+    st.divider()
+
+    # Revenue & Profit
+    st.markdown("#### Pendapatan & Laba")
+
+    stock_revenue = perf.get('stock_revenue', 0) or 0
+    non_stock_revenue = perf.get('non_stock_revenue', 0) or 0
+    total_revenue = perf.get('total_revenue', 0) or 0
+    stock_tx_count = perf.get('stock_transaction_count', 0) or 0
+    non_stock_tx_count = perf.get('non_stock_transaction_count', 0) or 0
+
+    col_s1, col_s2, col_s3 = st.columns(3)
+    with col_s1:
+        st.metric(
+            "Penjualan Stok",
+            f"Rp {stock_revenue:,.0f}",
+            delta=f"{stock_tx_count} transaksi",
+            help="Pendapatan dari penjualan barang dengan stok"
+        )
+    with col_s2:
+        st.metric(
+            "Penjualan Non-Stok",
+            f"Rp {non_stock_revenue:,.0f}",
+            delta=f"{non_stock_tx_count} transaksi",
+            help="Pendapatan dari penjualan tanpa stok "
+        )
+    with col_s3:
+        st.metric(
+            "Total Penjualan",
+            f"Rp {total_revenue:,.0f}",
+            help="Total pendapatan = Penjualan Stok + Penjualan Non-Stok"
+        )
+
+    # Baris 2: Profit
+    col_r1, col_r2, col_r3 = st.columns(3)
+    with col_r1:
+        stock_profit = stock_revenue - hpp  # Laba dari stok
+        st.metric(
+            "Laba Penjualan Stok",
+            f"Rp {stock_profit:,.0f}",
+            delta=f"Margin: {(stock_profit/stock_revenue*100):.1f}%" if stock_revenue > 0 else "0%",
+            help="Laba Penjualan Stok = Penjualan Stok - HPP"
+        )
+    with col_r2:
+        gross_profit = perf.get('gross_profit', 0) or 0
+        st.metric(
+            "Gross Profit (Total)",
+            f"Rp {gross_profit:,.0f}",
+            delta=f"Margin: {(gross_profit/total_revenue*100):.1f}%" if total_revenue > 0 else "0%",
+            help="Laba Kotor = (Penjualan Stok - HPP) + Penjualan Non-Stok"
+        )
+    with col_r3:
+        net_profit = perf.get('net_profit', 0) or 0
+        profit_margin = perf.get('profit_margin', 0) or 0
+        st.metric(
+            "Laba Bersih",
+            f"Rp {net_profit:,.0f}",
+            delta=f"Margin: {profit_margin:.1f}%",
+            help="Laba Bersih = Gross Profit - Biaya Operasional"
+        )
+
+    st.divider()
+
+    # Expenses
+    st.markdown("#### Biaya Operasional")
+    col_e1, col_e2, col_e3 = st.columns(3)
+    with col_e1:
+        total_expenses = perf.get('total_expenses', 0) or 0
+        st.metric(
+            "Total Biaya",
+            f"Rp {total_expenses:,.0f}",
+            help="Total biaya operasional dalam periode"
+        )
+    with col_e2:
+        salary_expense = perf.get('salary_expense', 0) or 0
+        st.metric(
+            "Gaji Karyawan",
+            f"Rp {salary_expense:,.0f}",
+            help="Total gaji yang dibayarkan"
+        )
+    with col_e3:
+        other_expense = perf.get('other_expense', 0) or 0
+        st.metric(
+            "Biaya Lainnya",
+            f"Rp {other_expense:,.0f}",
+            help="Biaya operasional selain gaji"
+        )
+
+    st.divider()
+
+    # Transaction Summary
+    st.markdown("#### Ringkasan Transaksi")
+    col_t1, col_t2, col_t3 = st.columns(3)
+    with col_t1:
+        tx_count = perf.get('transaction_count', 0) or 0
+        st.metric("Jumlah Transaksi", f"{tx_count} transaksi")
+    with col_t2:
+        avg_tx = (total_revenue / tx_count) if tx_count > 0 else 0
+        st.metric("Rata-rata Transaksi", f"Rp {avg_tx:,.0f}")
+    with col_t3:
+        period_days = (end_date - start_date).days
+        st.metric("Periode Analisis", f"{period_days} hari")
+
+def render_kpis(kpis, start_date, end_date):
+    """Ringkasan sederhana, dipakai jika get_store_business_performance_v2 gagal."""
+    total_revenue = kpis.get('total_revenue', 0)
+    total_cost = kpis.get('total_cost', 0)
+    gross_profit = kpis.get('gross_profit', 0)
+    profit_margin = (gross_profit / total_revenue * 100) if total_revenue > 0 else 0
+
+    kpi_cols = st.columns(4)
+    with kpi_cols[0]:
+        st.metric("Total Pendapatan", f"Rp {total_revenue:,.0f}")
+    with kpi_cols[1]:
+        st.metric("Total Biaya", f"Rp {total_cost:,.0f}")
+    with kpi_cols[2]:
+        st.metric("Laba Kotor", f"Rp {gross_profit:,.0f}")
+    with kpi_cols[3]:
+        st.metric("Margin Laba", f"{profit_margin:.1f}%")
+
+    trans_cols = st.columns(3)
+    with trans_cols[0]:
+        st.metric("Jumlah Transaksi", f"{kpis.get('sale_count', 0)}")
+    with trans_cols[1]:
+        avg_transaction = (total_revenue / kpis.get('sale_count', 1)) if kpis.get('sale_count', 0) > 0 else 0
+        st.metric("Rata-rata Transaksi", f"Rp {avg_transaction:,.0f}")
+    with trans_cols[2]:
+        st.metric("Periode Analisis", f"{(end_date - start_date).days} hari")
+
+def render_trend(trend, bucket: str):
+    """Grafik tren dari rollups.sales_trend; seri yang terlalu panjang diperkecil dengan LTTB."""
+    if not trend or not any(row["revenue"] or row["expenses"] for row in trend):
+        st.info("Tidak ada transaksi pada rentang tanggal ini.")
+        return
+    df = pd.DataFrame(trend)
+    df.index = pd.to_datetime(df.pop("period"))
+    df = df.rename(columns={
+        "revenue": "Pendapatan",
+        "gross_profit": "Laba Kotor",
+        "net_profit": "Laba Bersih",
+        "expenses": "Biaya Operasional",
+    })
+    chart = downsample(df, "Pendapatan")
+    st.line_chart(chart[["Pendapatan", "Laba Kotor", "Laba Bersih"]])
+
+    caption = f"Per periode {TREND_BUCKET_LABELS[bucket]}, {len(df)} titik"
+    if len(chart) < len(df):
+        caption += f" (ditampilkan {len(chart)} titik; maks. {MAX_CHART_POINTS})"
+    st.caption(caption)
+
+def query_failure_message(what: str, result) -> str:
+    """Pesan untuk query dashboard yang gagal/timeout, agar tidak tampil seperti 'tidak ada data'."""
+    reason = "melewati batas waktu" if isinstance(result.error, QueryTimeout) else str(result.error)
+    return f"Data {what} gagal dimuat ({reason}). Muat ulang halaman untuk mencoba lagi."
+
+def render_top_products(top_products):
+    st.subheader("Produk Terlaris")
+    if top_products:
+        df_top = pd.DataFrame(top_products).rename(columns={
+            "product_name": "Nama Produk",
+            "total_quantity_sold": "Jml Terjual",
+            "total_revenue": "Pendapatan",
+            "sell_through": "Sell-Through",
+        })
+        columns = [c for c in ('Nama Produk', 'Jml Terjual', 'Pendapatan', 'Sell-Through') if c in df_top]
+        st.dataframe(df_top[columns], use_container_width=True, hide_index=True, column_config={
+            "Pendapatan": money_column(),
+            "Sell-Through": st.column_config.NumberColumn(format="%.1f%%", help="Terjual / (terjual + sisa stok saat ini)"),
+        })
+
+        st.bar_chart(df_top.set_index('Nama Produk')['Pendapatan'])
+    else:
+        st.info("Tidak ada data penjualan pada rentang tanggal ini.")
+
+def render_slow_products(slow_products):
+    st.subheader("Produk Lambat Terjual")
+    if slow_products:
+        df_slow = pd.DataFrame(slow_products).rename(columns={
+            "product_name": "Nama Produk",
+            "last_sale_date": "Terakhir Terjual",
+            "days_since_last_sale": "Hari Sejak Terjual",
+            "total_stock": "Sisa Stok"
+        })
+        columns = [c for c in ('Nama Produk', 'Terakhir Terjual', 'Hari Sejak Terjual', 'Sisa Stok') if c in df_slow]
+        st.dataframe(df_slow[columns], use_container_width=True, hide_index=True)
+    else:
+        st.success("Tidak ada produk yang lambat terjual.")
+
+def render_bottom_products(bottom_products):
+    with st.expander("Produk Berstok dengan Penjualan Paling Sedikit (periode ini)"):
+        if bottom_products:
+            df_bottom = pd.DataFrame(bottom_products).rename(columns={
+                "product_name": "Nama Produk",
+                "total_quantity_sold": "Jml Terjual",
+                "total_revenue": "Pendapatan",
+                "total_stock": "Sisa Stok",
+                "sell_through": "Sell-Through",
+            })
+            st.dataframe(df_bottom, use_container_width=True, hide_index=True, column_config={
+                "Pendapatan": money_column(),
+                "Sell-Through": st.column_config.NumberColumn(format="%.1f%%"),
+            })
+        else:
+            st.info("Tidak ada produk berstok.")
+
+def render_expenses(expenses):
+    if expenses:
+        expense_labels = {
+            'salary': 'Gaji Karyawan',
+            'rent': 'Sewa',
+            'utility': 'Listrik/Air',
+            'maintenance': 'Perawatan',
+            'supplies': 'Perlengkapan',
+            'transport': 'Transportasi',
+            'other': 'Lainnya'
+        }
+
+        df_expense = pd.DataFrame(expenses)
+        df_expense['expense_type'] = df_expense['expense_type'].map(expense_labels)
+        df_expense = df_expense.rename(columns={
+            'expense_type': 'Jenis Biaya',
+            'total_amount': 'Total',
+            'transaction_count': 'Jumlah'
+        })
+        df_expense['Total'] = df_expense['Total'].apply(lambda x: f"Rp {x:,.0f}")
+
+        st.dataframe(df_expense, use_container_width=True, hide_index=True)
+    else:
+        st.info("Belum ada data biaya operasional untuk periode ini.")
+
+def render_kpis_fallback(slot, perf_result, kpis_result, start_date, end_date):
+    """Ganti ringkasan performa dengan KPI sederhana jika RPC performa gagal."""
+    with slot.container():
+        st.warning(f"Data belum tersedia. SQL ({perf_result.error})")
+        if kpis_result.ok and kpis_result.data:
+            try:
+                render_kpis(kpis_result.data, start_date, end_date)
+            except Exception:
+                pass
 
 def show():
     st.title("Dashboard Analisis")
@@ -9,20 +425,22 @@ def show():
     supabase = get_client()
 
     try:
-        # Filter 
+        # Filter
         users_resp = supabase.table("users").select("store").neq("role", "admin").execute()
         stores = sorted(list(set([user['store'] for user in users_resp.data])))
-        
+
         if not stores:
             st.info("Belum ada toko yang terdaftar. Buat toko di menu Manajemen Toko & User.")
             return
 
-        col1, col2 = st.columns([0.7, 0.3])
+        col1, col2, col3 = st.columns([0.5, 0.25, 0.25])
         with col1:
-            selected_store = st.selectbox("Pilih Toko untuk Dianalisis", options=stores)
+            selected_store = st.selectbox("Pilih Toko untuk Dianalisis", options=[ALL_STORES, *stores], index=1)
         with col2:
-            date_range_option = st.selectbox("Rentang Waktu", 
-                                             ["30 Hari Terakhir", "Bulan Ini", "Bulan Lalu", "Custom"])
+            date_range_option = st.selectbox("Rentang Waktu",
+                                             ["30 Hari Terakhir", "Bulan Ini", "Bulan Lalu", "12 Bulan Terakhir", "Custom"])
+        with col3:
+            trend_option = st.selectbox("Periode Grafik Tren", list(TREND_BUCKET_OPTIONS))
 
         today = datetime.date.today()
         if date_range_option == "30 Hari Terakhir":
@@ -35,280 +453,103 @@ def show():
             last_month_end = today.replace(day=1) - datetime.timedelta(days=1)
             start_date = last_month_end.replace(day=1)
             end_date = last_month_end
-        else: 
-            start_date, end_date = st.date_input("Pilih rentang tanggal custom", 
+        elif date_range_option == "12 Bulan Terakhir":
+            start_date = today - datetime.timedelta(days=365)
+            end_date = today
+        else:
+            start_date, end_date = st.date_input("Pilih rentang tanggal custom",
                                                  [today - datetime.timedelta(days=7), today],
                                                  key="custom_date_range")
 
+        if selected_store == ALL_STORES and start_date and end_date:
+            st.info(f"Membandingkan **{len(stores)} toko** dari tanggal **{start_date.strftime('%d %b %Y')}** hingga **{end_date.strftime('%d %b %Y')}**.")
+            st.markdown("---")
+            show_store_comparison(supabase, stores, start_date, end_date)
+            return
+
         st.info(f"Menampilkan analisis untuk **{selected_store}** dari tanggal **{start_date.strftime('%d %b %Y')}** hingga **{end_date.strftime('%d %b %Y')}**.")
         st.markdown("---")
 
         if selected_store and start_date and end_date:
-            # Business Performance Summary
+            # Semua RPC dijalankan paralel; layout disiapkan dulu dengan placeholder
+            # lalu setiap bagian diisi begitu datanya tiba.
+            trend_bucket = TREND_BUCKET_OPTIONS[trend_option] or rollups.trend_bucket(start_date.isoformat(), end_date.isoformat())
+            batch = fetch_dashboard_queries(supabase, selected_store, start_date, end_date, trend_bucket)
+
             st.markdown("<h3 style='color: var(--accent);'>Ringkasan Performa Bisnis</h3>", unsafe_allow_html=True)
-            
-            try:
-                perf_resp = supabase.rpc("get_store_business_performance_v2", {
-                    "store_input": selected_store,
-                    "start_date": start_date.isoformat(),
-                    "end_date": (end_date + datetime.timedelta(days=1)).isoformat()
-                }).execute()
-                
-                perf = perf_resp.data[0] if perf_resp.data else {}
-                
-                # Modal & HPP
-                st.markdown("#### Modal")
-                col_m1, col_m2 = st.columns(2)
-                with col_m1:
-                    total_modal = perf.get('total_modal', 0) or 0
-                    st.metric(
-                        "Modal (Total Pembelian)", 
-                        f"Rp {total_modal:,.0f}",
-                        help="Total nilai pembelian barang sepanjang waktu"
-                    )
-                with col_m2:
-                    hpp = perf.get('hpp', 0) or 0
-                    st.metric(
-                        "HPP (Harga Pokok Penjualan)", 
-                        f"Rp {hpp:,.0f}",
-                        help="Biaya pokok dari barang yang terjual dalam periode ini"
-                    )
-                
-                st.divider()
-                
-                # Revenue & Profit
-                st.markdown("#### Pendapatan & Laba")
-                
-                stock_revenue = perf.get('stock_revenue', 0) or 0
-                non_stock_revenue = perf.get('non_stock_revenue', 0) or 0
-                total_revenue = perf.get('total_revenue', 0) or 0
-                stock_tx_count = perf.get('stock_transaction_count', 0) or 0
-                non_stock_tx_count = perf.get('non_stock_transaction_count', 0) or 0
-                
-                col_s1, col_s2, col_s3 = st.columns(3)
-                with col_s1:
-                    st.metric(
-                        "Penjualan Stok", 
-                        f"Rp {stock_revenue:,.0f}",
-                        delta=f"{stock_tx_count} transaksi",
-                        help="Pendapatan dari penjualan barang dengan stok"
-                    )
-                with col_s2:
-                    st.metric(
-                        "Penjualan Non-Stok", 
-                        f"Rp {non_stock_revenue:,.0f}",
-                        delta=f"{non_stock_tx_count} transaksi",
-                        help="Pendapatan dari penjualan tanpa stok "
-                    )
-                with col_s3:
-                    st.metric(
-                        "Total Penjualan", 
-                        f"Rp {total_revenue:,.0f}",
-                        help="Total pendapatan = Penjualan Stok + Penjualan Non-Stok"
-                    )
-                
-                # Baris 2: Profit
-                col_r1, col_r2, col_r3 = st.columns(3)
-                with col_r1:
-                    stock_profit = stock_revenue - hpp  # Laba dari stok
-                    st.metric(
-                        "Laba Penjualan Stok", 
-                        f"Rp {stock_profit:,.0f}",
-                        delta=f"Margin: {(stock_profit/stock_revenue*100):.1f}%" if stock_revenue > 0 else "0%",
-                        help="Laba Penjualan Stok = Penjualan Stok - HPP"
-                    )
-                with col_r2:
-                    gross_profit = perf.get('gross_profit', 0) or 0
-                    st.metric(
-                        "Gross Profit (Total)", 
-                        f"Rp {gross_profit:,.0f}",
-                        delta=f"Margin: {(gross_profit/total_revenue*100):.1f}%" if total_revenue > 0 else "0%",
-                        help="Laba Kotor = (Penjualan Stok - HPP) + Penjualan Non-Stok"
-                    )
-                with col_r3:
-                    net_profit = perf.get('net_profit', 0) or 0
-                    profit_margin = perf.get('profit_margin', 0) or 0
-                    st.metric(
-                        "Laba Bersih", 
-                        f"Rp {net_profit:,.0f}",
-                        delta=f"Margin: {profit_margin:.1f}%",
-                        help="Laba Bersih = Gross Profit - Biaya Operasional"
-                    )
-                
-                st.divider()
-                
-                # Expenses
-                st.markdown("#### Biaya Operasional")
-                col_e1, col_e2, col_e3 = st.columns(3)
-                with col_e1:
-                    total_expenses = perf.get('total_expenses', 0) or 0
-                    st.metric(
-                        "Total Biaya", 
-                        f"Rp {total_expenses:,.0f}",
-                        help="Total biaya operasional dalam periode"
-                    )
-                with col_e2:
-                    salary_expense = perf.get('salary_expense', 0) or 0
-                    st.metric(
-                        "Gaji Karyawan", 
-                        f"Rp {salary_expense:,.0f}",
-                        help="Total gaji yang dibayarkan"
-                    )
-                with col_e3:
-                    other_expense = perf.get('other_expense', 0) or 0
-                    st.metric(
-                        "Biaya Lainnya", 
-                        f"Rp {other_expense:,.0f}",
-                        help="Biaya operasional selain gaji"
-                    )
-                
-                st.divider()
-                
-                # Transaction Summary
-                st.markdown("#### Ringkasan Transaksi")
-                col_t1, col_t2, col_t3 = st.columns(3)
-                with col_t1:
-                    tx_count = perf.get('transaction_count', 0) or 0
-                    st.metric("Jumlah Transaksi", f"{tx_count} transaksi")
-                with col_t2:
-                    avg_tx = (total_revenue / tx_count) if tx_count > 0 else 0
-                    st.metric("Rata-rata Transaksi", f"Rp {avg_tx:,.0f}")
-                with col_t3:
-                    period_days = (end_date - start_date).days
-                    st.metric("Periode Analisis", f"{period_days} hari")
-                    
-            except Exception as e:
-                st.warning(f"Data belum tersedia. SQL ({e})")
-                
-                try:
-                    kpis_resp = supabase.rpc("get_store_kpis", {
-                        "store_input": selected_store,
-                        "start_date": start_date.isoformat(),
-                        "end_date": (end_date + datetime.timedelta(days=1)).isoformat()
-                    }).execute()
-                    
-                    kpis = kpis_resp.data
-                    
-                    total_revenue = kpis.get('total_revenue', 0)
-                    total_cost = kpis.get('total_cost', 0)
-                    gross_profit = kpis.get('gross_profit', 0)
-                    profit_margin = (gross_profit / total_revenue * 100) if total_revenue > 0 else 0
-                    
-                    kpi_cols = st.columns(4)
-                    with kpi_cols[0]:
-                        st.metric("Total Pendapatan", f"Rp {total_revenue:,.0f}")
-                    with kpi_cols[1]:
-                        st.metric("Total Biaya", f"Rp {total_cost:,.0f}")
-                    with kpi_cols[2]:
-                        st.metric("Laba Kotor", f"Rp {gross_profit:,.0f}")
-                    with kpi_cols[3]:
-                        st.metric("Margin Laba", f"{profit_margin:.1f}%")
-                    
-                    trans_cols = st.columns(3)
-                    with trans_cols[0]:
-                        st.metric("Jumlah Transaksi", f"{kpis.get('sale_count', 0)}")
-                    with trans_cols[1]:
-                        avg_transaction = (total_revenue / kpis.get('sale_count', 1)) if kpis.get('sale_count', 0) > 0 else 0
-                        st.metric("Rata-rata Transaksi", f"Rp {avg_transaction:,.0f}")
-                    with trans_cols[2]:
-                        st.metric("Periode Analisis", f"{(end_date - start_date).days} hari")
-                except:
-                    pass
+            perf_slot = st.empty()
+            st.divider()
 
+            st.markdown("<h3 style='color: var(--accent);'>Tren Pendapatan & Laba</h3>", unsafe_allow_html=True)
+            trend_slot = st.empty()
             st.divider()
 
-            # Product Analysis
             st.markdown("<h3 style='color: var(--accent);'>Analisis Produk</h3>", unsafe_allow_html=True)
-            
-            try:
-                top_products_resp = supabase.rpc("get_top_selling_products", {
-                    "end_date": (end_date + datetime.timedelta(days=1)).isoformat(),
-                    "limit_count": 10,
-                    "start_date": start_date.isoformat(),
-                    "store_input": selected_store
-                }).execute()
-                slow_products_resp = supabase.rpc("get_slow_moving_products", {
-                    "store_input": selected_store, "days_threshold": 60
-                }).execute()
-
-                top_products = top_products_resp.data
-                slow_products = slow_products_resp.data
-            except:
-                top_products = []
-                slow_products = []
-            
             col_top, col_slow = st.columns(2)
-            
             with col_top:
-                st.subheader("Produk Terlaris")
-                if top_products:
-                    df_top = pd.DataFrame(top_products).rename(columns={
-                        "product_name": "Nama Produk", 
-                        "total_quantity_sold": "Jml Terjual",
-                        "total_revenue": "Pendapatan"
-                    })
-                    df_top['Pendapatan'] = df_top['Pendapatan'].apply(lambda x: f"Rp {x:,.0f}")
-                    st.dataframe(df_top[['Nama Produk', 'Jml Terjual', 'Pendapatan']], 
-                               use_container_width=True, hide_index=True)
-                    
-                    chart_data = pd.DataFrame(top_products)
-                    if not chart_data.empty:
-                        st.bar_chart(chart_data.set_index('product_name')['total_revenue'])
-                else:
-                    st.info("Tidak ada data penjualan pada rentang tanggal ini.")
-
+                top_slot = st.empty()
             with col_slow:
-                st.subheader("Produk Lambat Terjual")
-                if slow_products:
-                    df_slow = pd.DataFrame(slow_products).rename(columns={
-                        "product_name": "Nama Produk", 
-                        "last_sale_date": "Terakhir Terjual",
-                        "total_stock": "Sisa Stok"
-                    })
-                    st.dataframe(df_slow[['Nama Produk', 'Terakhir Terjual', 'Sisa Stok']], 
-                               use_container_width=True, hide_index=True)
-                else:
-                    st.success("Tidak ada produk yang lambat terjual.")
-
+                slow_slot = st.empty()
+            bottom_slot = st.empty()
             st.divider()
-            
-            # Expense Breakdown
+
             st.markdown("<h3 style='color: var(--accent);'>Rincian Biaya Operasional</h3>", unsafe_allow_html=True)
-            
-            try:
-                expense_resp = supabase.rpc("get_expense_summary", {
-                    "store_input": selected_store,
-                    "start_date": start_date.isoformat(),
-                    "end_date": (end_date + datetime.timedelta(days=1)).isoformat()
-                }).execute()
-                
-                expenses = expense_resp.data
-                
-                if expenses:
-                    expense_labels = {
-                        'salary': 'Gaji Karyawan',
-                        'rent': 'Sewa',
-                        'utility': 'Listrik/Air',
-                        'maintenance': 'Perawatan',
-                        'supplies': 'Perlengkapan',
-                        'transport': 'Transportasi',
-                        'other': 'Lainnya'
-                    }
-                    
-                    df_expense = pd.DataFrame(expenses)
-                    df_expense['expense_type'] = df_expense['expense_type'].map(expense_labels)
-                    df_expense = df_expense.rename(columns={
-                        'expense_type': 'Jenis Biaya',
-                        'total_amount': 'Total',
-                        'transaction_count': 'Jumlah'
-                    })
-                    df_expense['Total'] = df_expense['Total'].apply(lambda x: f"Rp {x:,.0f}")
-                    
-                    st.dataframe(df_expense, use_container_width=True, hide_index=True)
-                else:
-                    st.info("Belum ada data biaya operasional untuk periode ini.")
-            except Exception as e:
-                st.info(f"Data biaya operasional belum tersedia. SQL.")
+            expense_slot = st.empty()
+
+            for slot in (perf_slot, trend_slot, top_slot, slow_slot, expense_slot):
+                slot.caption("⏳ Memuat data...")
+
+            results = {}
+            for result in batch.as_completed():
+                results[result.name] = result
+
+                if result.name == "performance":
+                    if result.ok:
+                        try:
+                            with perf_slot.container():
+                                render_performance(result.data, start_date, end_date)
+                        except Exception as e:
+                            result.error = e
+                    if not result.ok and "kpis" in results:
+                        render_kpis_fallback(perf_slot, result, results["kpis"], start_date, end_date)
+                elif result.name == "kpis":
+                    perf_result = results.get("performance")
+                    if perf_result is not None and not perf_result.ok:
+                        render_kpis_fallback(perf_slot, perf_result, result, start_date, end_date)
+                elif result.name == "top_products":
+                    with top_slot.container():
+                        if result.ok:
+                            render_top_products(result.data)
+                        else:
+                            st.subheader("Produk Terlaris")
+                            st.warning(query_failure_message("produk terlaris", result))
+                elif result.name == "slow_products":
+                    with slow_slot.container():
+                        if result.ok:
+                            render_slow_products(result.data)
+                        else:
+                            st.subheader("Produk Lambat Terjual")
+                            st.warning(query_failure_message("produk lambat terjual", result))
+                elif result.name == "bottom_products":
+                    if result.ok:
+                        with bottom_slot.container():
+                            render_bottom_products(result.data)
+                    else:
+                        bottom_slot.warning(query_failure_message("produk dengan penjualan paling sedikit", result))
+                elif result.name == "trend":
+                    if result.ok:
+                        with trend_slot.container():
+                            render_trend(result.data, trend_bucket)
+                    elif isinstance(result.error, rollups.RollupPending):
+                        trend_slot.info("Data tren untuk rentang ini sedang disiapkan. Muat ulang halaman sebentar lagi.")
+                    else:
+                        trend_slot.info(f"Data tren belum tersedia. ({result.error})")
+                elif result.name == "expenses":
+                    if result.ok:
+                        with expense_slot.container():
+                            render_expenses(result.data)
+                    else:
+                        expense_slot.info("Data biaya operasional belum tersedia. SQL.")
 
     except Exception as e:
         st.error(f"Terjadi kesalahan saat memuat dashboard: {e}")
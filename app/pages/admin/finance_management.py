@@ -1,5 +1,5 @@
 import streamlit as st
-from app.db import get_client
+from app.db import get_client, invalidate_reference, invalidate_after_rpc
 import pandas as pd
 import datetime
 
@@ -20,6 +20,7 @@ def show():
 
     if selected_store:
         supabase.rpc("create_default_cash_account", {"p_store_name": selected_store}).execute()
+        invalidate_after_rpc("create_default_cash_account", selected_store)
         
         accounts_resp = supabase.table("accounts").select("*").eq("store", selected_store).order("is_default", desc=True).execute()
         accounts = accounts_resp.data or []
@@ -54,6 +55,7 @@ def show():
                         }).execute()
                         
                         if response.data:
+                            invalidate_reference(selected_store, "accounts")
                             st.success("Rekening bank berhasil ditambahkan!")
                             st.rerun()
                         else:
@@ -84,6 +86,7 @@ def show():
                         "p_user": admin_user,
                         "p_transaction_date": adj_date.isoformat()
                     }).execute()
+                    invalidate_after_rpc("adjust_account_balance", selected_store)
                     st.success("Saldo berhasil disesuaikan!")
                     st.rerun()
 
@@ -115,5 +118,6 @@ def show():
                                 "p_user": admin_user,
                                 "p_transaction_date": transfer_date.isoformat()
                             }).execute()
+                            invalidate_after_rpc("transfer_funds", selected_store)
                             st.success("Transfer dana berhasil!")
                             st.rerun()
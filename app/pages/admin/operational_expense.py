@@ -1,5 +1,6 @@
 import streamlit as st
-from app.db import get_client
+from app.db import get_client, fetch_reference, invalidate_after_rpc
+from app.utils.formatters import format_currency_series, format_datetime_series
 import pandas as pd
 import datetime
 
@@ -58,8 +59,8 @@ def show():
                 )
                 
                 # Account selection
-                accounts_resp = supabase.table("accounts").select("account_id, account_name, balance").eq("store", selected_store).execute()
-                account_map = {f"{acc['account_name']} (Saldo: Rp {acc['balance']:,.0f})": acc['account_id'] for acc in accounts_resp.data or []}
+                accounts = fetch_reference("accounts", selected_store, "account_id, account_name, balance")
+                account_map = {f"{acc['account_name']} (Saldo: Rp {acc['balance']:,.0f})": acc['account_id'] for acc in accounts}
                 
                 selected_account = None
                 if account_map:
@@ -89,7 +90,7 @@ def show():
                     expense_datetime = datetime.datetime.combine(expense_date, expense_time)
                     
                     try:
-                        result = supabase.rpc("record_operational_expense", {
+                        expense_params = {
                             "p_store": selected_store,
                             "p_expense_type": expense_type.strip().lower(),
                             "p_amount": amount,
@@ -98,7 +99,9 @@ def show():
                             "p_account_id": selected_account,
                             "p_expense_date": expense_datetime.isoformat(),
                             "p_created_by": st.session_state.get("username", "admin")
-                        }).execute()
+                        }
+                        result = supabase.rpc("record_operational_expense", expense_params).execute()
+                        invalidate_after_rpc("record_operational_expense", selected_store, expense_params)
                         
                         st.session_state.expense_success = f"✅ Biaya '{expense_type}' sebesar Rp {amount:,.0f} berhasil dicatat!"
                         st.session_state.expense_form_key += 1
@@ -141,8 +144,8 @@ def show():
                             'created_by': 'Oleh'
                         })
                         df['Jenis'] = df['Jenis'].str.capitalize()
-                        df['Jumlah'] = df['Jumlah'].apply(lambda x: f"Rp {x:,.0f}")
-                        df['Tanggal'] = pd.to_datetime(df['Tanggal']).dt.strftime('%Y-%m-%d %H:%M')
+                        df['Jumlah'] = format_currency_series(df['Jumlah'], decimals=0)
+                        df['Tanggal'] = format_datetime_series(df['Tanggal'], '%Y-%m-%d %H:%M')
                         
                         st.dataframe(df[['ID', 'Tanggal', 'Jenis', 'Jumlah', 'Keterangan']], 
                                    use_container_width=True, hide_index=True)
@@ -154,7 +157,7 @@ def show():
                         }).reset_index()
                         summary_df.columns = ['Jenis', 'Total', 'Jumlah Transaksi']
                         summary_df['Jenis'] = summary_df['Jenis'].str.capitalize()
-                        summary_df['Total'] = summary_df['Total'].apply(lambda x: f"Rp {x:,.0f}")
+                        summary_df['Total'] = format_currency_series(summary_df['Total'], decimals=0)
                         st.dataframe(summary_df, use_container_width=True, hide_index=True)
                         
                         total = sum([r['amount'] for r in results])
@@ -207,8 +210,8 @@ def show():
                     note = st.text_input("Catatan", placeholder="Contoh: Gaji Januari 2026")
                     
                     # Account selection
-                    accounts_resp = supabase.table("accounts").select("account_id, account_name, balance").eq("store", selected_store).execute()
-                    account_map = {f"{acc['account_name']} (Saldo: Rp {acc['balance']:,.0f})": acc['account_id'] for acc in accounts_resp.data or []}
+                    accounts = fetch_reference("accounts", selected_store, "account_id, account_name, balance")
+                    account_map = {f"{acc['account_name']} (Saldo: Rp {acc['balance']:,.0f})": acc['account_id'] for acc in accounts}
                     
                     selected_account = None
                     if account_map:
@@ -228,7 +231,7 @@ def show():
                         pay_datetime = datetime.datetime.combine(pay_date, pay_time)
                         
                         try:
-                            result = supabase.rpc("record_operational_expense", {
+                            salary_params = {
                                 "p_store": selected_store,
                                 "p_expense_type": "salary",
                                 "p_amount": salary_amount,
@@ -237,7 +240,9 @@ def show():
                                 "p_account_id": selected_account,
                                 "p_expense_date": pay_datetime.isoformat(),
                                 "p_created_by": st.session_state.get("username", "admin")
-                            }).execute()
+                            }
+                            result = supabase.rpc("record_operational_expense", salary_params).execute()
+                            invalidate_after_rpc("record_operational_expense", selected_store, salary_params)
 
                             try:
                                 supabase.table("pegawai_payment").insert({
@@ -1,5 +1,5 @@
 import streamlit as st
-from app.db import get_client
+from app.db import get_client, invalidate_reference
 
 def show():
     st.title("➕ Tambahkan Supplier Baru")
@@ -50,6 +50,7 @@ def show():
                 response = supabase.table("supplier").insert(data_to_insert).execute()
                 
                 if response.data:
+                    invalidate_reference(store, "supplier")
                     st.success(f"✅ Supplier '{supplier_name}' berhasil ditambahkan.")
                     st.session_state.add_supplier_form_key += 1
                     st.rerun()
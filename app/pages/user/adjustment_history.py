@@ -1,6 +1,7 @@
 import streamlit as st
-from app.db import get_client
-import pandas as pd
+from app.db import search_filter
+from app.utils.pagination import start_history, get_history, needs_reload, show_load_more
+from app.utils.tables import typed_frame, datetime_column
 import datetime
 
 def show():
@@ -12,8 +13,6 @@ def show():
         return
 
     try:
-        supabase = get_client()
-
         st.subheader("Filter Riwayat")
         
         col1, col2 = st.columns(2)
@@ -24,24 +23,34 @@ def show():
         
         search_term = st.text_input("Cari berdasarkan Nama Produk")
 
-        if st.button("Tampilkan Riwayat", type="primary"):
-            end_date_param = (end_date + datetime.timedelta(days=1))
-            
-            response = supabase.rpc("get_stock_adjustment_history", {
-                "store_input": store,
-                "start_date_input": str(start_date),
-                "end_date_input": str(end_date_param)
-            }).execute()
+        params = {
+            "store_input": store,
+            "start_date_input": str(start_date),
+            "end_date_input": str(end_date + datetime.timedelta(days=1))
+        }
+        # Filter dijalankan di server; pandas di bawah hanya dipakai jika server menolak filter
+        filters = [search_filter(search_term, ("productname",))] if search_term.strip() else []
+
+        if st.button("Tampilkan Riwayat", type="primary") or needs_reload("adjustment_history", params, filters):
+            start_history("adjustment_history", "get_stock_adjustment_history", params, filters)
 
-            results = response.data
+        history = get_history("adjustment_history", params, filters)
+        if history is not None:
+            results = history["rows"]
             
             if not results:
-                st.info("Tidak ada data penyesuaian stok yang ditemukan untuk periode yang dipilih.")
+                if filters and history["filtered"]:
+                    st.info(f"Tidak ada hasil yang cocok dengan pencarian '{search_term}'.")
+                else:
+                    st.info("Tidak ada data penyesuaian stok yang ditemukan untuk periode yang dipilih.")
             else:
-                df = pd.DataFrame(results)
+                df = typed_frame(
+                    results, numeric=("quantity",), datetimes=("adjusted_at",),
+                    categories=("warehouse_name", "adjustment_type"),
+                )
                 
-                if search_term:
-                    df = df[df['productname'].str.contains(search_term, case=False, na=False)]
+                if search_term and not history["filtered"]:
+                    df = df[df['productname'].str.contains(search_term, case=False, na=False, regex=False)]
 
                 if df.empty:
                     st.warning(f"Tidak ada hasil yang cocok dengan pencarian '{search_term}'.")
@@ -53,14 +62,15 @@ def show():
                         "adjusted_at": "Waktu"
                     })
                     
-                    df['Waktu'] = pd.to_datetime(df['Waktu']).dt.strftime('%Y-%m-%d %H:%M')
-
                     st.data_editor(
                         df,
                         use_container_width=True,
                         hide_index=True,
-                        disabled=True
+                        disabled=True,
+                        column_config={"Waktu": datetime_column()}
                     )
 
+            show_load_more("adjustment_history")
+
     except Exception as e:
         st.error(f"Terjadi kesalahan: {e}")
@@ -1,11 +1,38 @@
 import streamlit as st
-from app.db import get_client
+from app.db import fetch_reference
+from app import stock_import
 import pandas as pd
+import hashlib
 import io
 import datetime
 
+def show_validation_report(report, key):
+    """Ringkasan pesan validasi, contoh baris, dan unduhan laporan lengkap."""
+    summary = report.groupby(["Tingkat", "Kolom", "Pesan"], observed=True).size().reset_index(name="Jumlah Baris")
+    st.dataframe(summary, use_container_width=True, hide_index=True)
+    st.markdown(f"**Detail ({min(len(report), stock_import.PREVIEW_ROWS)} dari {len(report)} baris):**")
+    st.dataframe(report.head(stock_import.PREVIEW_ROWS), use_container_width=True, hide_index=True)
+
+    col_xlsx, col_csv = st.columns(2)
+    with col_xlsx:
+        st.download_button(
+            "Unduh Laporan (.xlsx)",
+            data=stock_import.report_file(report, "xlsx"),
+            file_name="laporan_validasi_impor.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            key=f"{key}_xlsx",
+        )
+    with col_csv:
+        st.download_button(
+            "Unduh Laporan (.csv)",
+            data=stock_import.report_file(report, "csv"),
+            file_name="laporan_validasi_impor.csv",
+            mime="text/csv",
+            key=f"{key}_csv",
+        )
+
 def show():
-    st.title("Impor Produk dari Excel")
+    st.title("Impor Produk dari File")
 
     store = st.session_state.get("store")
     username = st.session_state.get("username", "system")
@@ -13,15 +40,9 @@ def show():
         st.warning("Sesi toko tidak valid. Silakan login kembali.")
         return
 
-    supabase = get_client()
-
-    warehouses = supabase.table("warehouse_list").select("warehouseid, name").eq("store", store).execute()
-    suppliers = supabase.table("supplier").select("supplierid, suppliername").eq("store", store).execute()
-    accounts = supabase.table("accounts").select("account_id, account_name, balance").eq("store", store).execute()
-    
-    warehouse_list = warehouses.data if warehouses.data else []
-    supplier_list = suppliers.data if suppliers.data else []
-    account_list = accounts.data if accounts.data else []
+    warehouse_list = fetch_reference("warehouse_list", store, "warehouseid, name")
+    supplier_list = fetch_reference("supplier", store, "supplierid, suppliername")
+    account_list = fetch_reference("accounts", store, "account_id, account_name, balance")
     
     warehouse_names = [w['name'] for w in warehouse_list]
     supplier_names = [s['suppliername'] for s in supplier_list]
@@ -40,22 +61,22 @@ def show():
         default_warehouse = st.selectbox(
             "Gudang Default",
             options=list(warehouse_options.keys()),
-            help="Digunakan jika kolom Gudang di Excel kosong"
+            help="Digunakan jika kolom Gudang di file kosong"
         )
         default_warehouse_id = warehouse_options[default_warehouse]
         
         # Default Supplier
         if supplier_list:
             supplier_options = {s['suppliername']: s['supplierid'] for s in supplier_list}
-            supplier_options["-- Tidak ada default (wajib isi di Excel) --"] = None
+            supplier_options["-- Tidak ada default (wajib isi di file) --"] = None
             default_supplier = st.selectbox(
                 "Supplier Default",
                 options=list(supplier_options.keys()),
-                help="Digunakan jika kolom Supplier di Excel kosong. Supplier baru akan dibuat otomatis."
+                help="Digunakan jika kolom Supplier di file kosong. Supplier baru akan dibuat otomatis."
             )
             default_supplier_id = supplier_options[default_supplier]
         else:
-            st.info("Belum ada supplier. Supplier baru akan dibuat otomatis dari Excel.")
+            st.info("Belum ada supplier. Supplier baru akan dibuat otomatis dari file.")
             default_supplier_id = None
     
     with col_set2:
@@ -147,135 +168,143 @@ def show():
 
     # Upload File
     st.markdown("---")
-    st.subheader("2. Unggah File Excel yang Sudah Diisi")
-    
-    uploaded_file = st.file_uploader("Pilih file .xlsx", type=["xlsx"])
+    st.subheader("2. Unggah File yang Sudah Diisi")
+    st.caption(
+        "Format: Excel (.xlsx), CSV atau Parquet. Header ekspor lain juga dikenali, mis. "
+        "`qty`/`quantity` untuk Jumlah, `price`/`harga` untuk Harga Beli, `warehouse` untuk Gudang."
+    )
+
+    uploaded_file = st.file_uploader("Pilih file", type=list(stock_import.IMPORT_FILE_TYPES))
 
     if uploaded_file is not None:
-        try:
-            df = pd.read_excel(uploaded_file)
-            
-            required_columns = ["Nama Produk"]
-            optional_purchase_cols = ["Jumlah", "Harga Beli"]
-            missing_cols = [col for col in required_columns if col not in df.columns]
-            
-            if missing_cols:
-                st.error(f"❌ File Excel tidak valid. Kolom berikut tidak ditemukan: **{', '.join(missing_cols)}**")
-            else:
-                if "Jumlah" not in df.columns:
-                    df["Jumlah"] = 0
-                if "Harga Beli" not in df.columns:
-                    df["Harga Beli"] = 0
-                if "Gudang" not in df.columns:
-                    df["Gudang"] = ""
-                if "Supplier" not in df.columns:
-                    df["Supplier"] = ""
-                
-                df = df.dropna(subset=["Nama Produk"])
-                df = df[df["Nama Produk"].astype(str).str.strip() != ""]
-                
-                if len(df) == 0:
-                    st.warning("File tidak berisi data produk yang valid.")
-                    return
-                
-                st.success(f"✅ File valid! Ditemukan **{len(df)} produk** untuk diimpor.")
-                
-                df_warehouses = df["Gudang"].dropna().unique().tolist()
-                df_warehouses = [w for w in df_warehouses if str(w).strip() != ""]
-                invalid_warehouses = [w for w in df_warehouses if str(w).strip().lower() not in [wh.lower() for wh in warehouse_names]]
-                
-                if invalid_warehouses:
-                    st.error(f"❌ Gudang tidak valid ditemukan di file: **{', '.join(invalid_warehouses)}**")
-                    return
-                
-                # Analyze data
-                df["Jumlah"] = pd.to_numeric(df["Jumlah"], errors="coerce").fillna(0).astype(int)
-                df["Harga Beli"] = pd.to_numeric(df["Harga Beli"], errors="coerce").fillna(0)
-                
-                register_only = df[df["Jumlah"] == 0]
-                with_purchase = df[df["Jumlah"] > 0]
-                
-                # Show preview
-                st.markdown("**Preview Data:**")
-                st.dataframe(df, use_container_width=True)
-                
-                # Summary
-                st.markdown("**Ringkasan Import:**")
-                col_sum1, col_sum2, col_sum3, col_sum4 = st.columns(4)
-                with col_sum1:
-                    st.metric("Total Baris", len(df))
-                with col_sum2:
-                    st.metric("Daftar Saja (qty=0)", len(register_only))
-                with col_sum3:
-                    st.metric("Dengan Pembelian (qty>0)", len(with_purchase))
-                with col_sum4:
-                    total_value = (with_purchase["Jumlah"] * with_purchase["Harga Beli"]).sum()
-                    st.metric("Total Nilai Beli", f"Rp {total_value:,.0f}")
+        file_bytes = uploaded_file.getvalue()
+        file_key = (hashlib.sha256(file_bytes).hexdigest(), tuple(warehouse_names), tuple(supplier_names), default_supplier_id is not None)
+        cached = st.session_state.get("import_scan")
+        if cached and cached[0] == file_key:
+            scan = cached[1]
+        else:
+            try:
+                with st.spinner("Membaca file..."):
+                    validator = stock_import.ImportValidator(warehouse_names, supplier_names, default_supplier_id is not None)
+                    chunks = stock_import.iter_file_chunks(io.BytesIO(file_bytes), uploaded_file.name, stock_import.SCAN_CHUNK_SIZE)
+                    scan = stock_import.scan(chunks, validator)
+            except Exception as e:
+                st.error(f"Gagal membaca file. Detail error: {e}")
+                return
+            st.session_state["import_scan"] = (file_key, scan)
+
+        if scan.missing_columns:
+            st.error(f"❌ File tidak valid. Kolom berikut tidak ditemukan: **{', '.join(scan.missing_columns)}**")
+            return
+        if scan.total_rows == 0:
+            st.warning("File tidak berisi data produk yang valid.")
+            return
+
+        errors = scan.errors
+        if len(errors):
+            st.error(
+                f"❌ Ditemukan **{len(errors)} kesalahan** di {errors['Baris'].nunique()} baris. "
+                "Perbaiki file sesuai laporan di bawah lalu unggah ulang."
+            )
+            show_validation_report(scan.report, "import_errors")
+            return
 
-                # Import Process
-                st.markdown("---")
-                st.subheader("3. Mulai Proses Impor")
-                
-                if len(register_only) > 0:
-                    st.caption(f"{len(register_only)} produk akan didaftarkan tanpa stok")
-                if len(with_purchase) > 0:
-                    st.caption(f"{len(with_purchase)} produk akan diimpor sebagai pembelian")
-                
-                confirm = st.checkbox("✅ Data sudah benar dan siap diimpor")
-                
-                if st.button(f"Impor {len(df)} Produk", use_container_width=True, type="primary"):
-                    if not confirm:
-                        st.error("Harap centang konfirmasi terlebih dahulu!")
-                    else:
-                        df_clean = df.fillna("")
-                        
-                        products_list = []
-                        for _, row in df_clean.iterrows():
-                            product = {
-                                "productname": str(row['Nama Produk']).strip(),
-                                "type": str(row.get('Jenis', 'Umum')).strip() or 'Umum',
-                                "size": str(row.get('Ukuran', '')).strip() or None,
-                                "color": str(row.get('Warna', '')).strip() or None,
-                                "brand": str(row.get('Merek', '')).strip() or None,
-                                "harga": float(row.get('Harga Beli', 0) or 0),
-                                "quantity": int(float(row.get('Jumlah', 0) or 0)),
-                                "description": str(row.get('Deskripsi', '')).strip() or None
-                            }
-                            products_list.append(product)
-                        
-                        import json
-                        products_json = json.dumps(products_list)
-                        
-                        total_amount = sum(p['harga'] * p['quantity'] for p in products_list)
-                        
-                        with st.spinner("Sedang mengimpor data ke database..."):
-                            try:
-                                params = {
-                                    "p_store": store,
-                                    "p_supplier_id": default_supplier_id,
-                                    "p_warehouse_id": default_warehouse_id,
-                                    "p_products": products_json,
-                                    "p_account_id": selected_account_id,
-                                    "p_payment_type": payment_type,
-                                    "p_payment_amount": total_amount if payment_type == 'cash' else None,
-                                    "p_import_date": datetime.datetime.now().isoformat(),
-                                    "p_created_by": username,
-                                    "p_due_date": due_date.isoformat() if due_date else None
-                                }
-                                result = supabase.rpc("bulk_import_smart", params).execute()
-                                
-                                if result.data:
-                                    res = result.data[0] if isinstance(result.data, list) else result.data
-                                    new_count = res.get('new_count', 0)
-                                    existing_count = res.get('existing_count', 0)
-                                    total_count = res.get('total_count', 0)
-                                    
-                                    st.success(f"✅ Berhasil mengimpor {total_count} produk! ({new_count} baru, {existing_count} diupdate)")
-                                    st.info("Cek **Riwayat Pembelian** untuk transaksi dan **Lihat Stok** untuk stok produk.")
-                                else:
-                                    st.error(f"Terjadi kesalahan saat impor: {result.data}")
-                            except Exception as e:
-                                st.error(f"Gagal menjalankan impor: {str(e)}")
+        st.success(f"✅ File valid! Ditemukan **{scan.total_rows} produk** untuk diimpor.")
+        if len(scan.warnings):
+            st.warning(f"⚠️ {len(scan.warnings)} peringatan. Impor tetap bisa dilanjutkan.")
+            with st.expander("Lihat Peringatan"):
+                show_validation_report(scan.warnings, "import_warnings")
 
-        except Exception as e:
-            st.error(f"Gagal membaca file Excel. Detail error: {e}")
+        # Show preview
+        st.markdown(f"**Preview Data ({len(scan.preview)} baris pertama):**")
+        st.dataframe(scan.preview, use_container_width=True, hide_index=True)
+
+        # Summary
+        st.markdown("**Ringkasan Import:**")
+        col_sum1, col_sum2, col_sum3, col_sum4 = st.columns(4)
+        with col_sum1:
+            st.metric("Total Baris", scan.total_rows)
+        with col_sum2:
+            st.metric("Daftar Saja (qty=0)", scan.register_only)
+        with col_sum3:
+            st.metric("Dengan Pembelian (qty>0)", scan.with_purchase)
+        with col_sum4:
+            st.metric("Total Nilai Beli", f"Rp {scan.total_value:,.0f}")
+
+        # Import Process
+        st.markdown("---")
+        st.subheader("3. Mulai Proses Impor")
+
+        if scan.register_only > 0:
+            st.caption(f"{scan.register_only} produk akan didaftarkan tanpa stok")
+        if scan.with_purchase > 0:
+            st.caption(f"{scan.with_purchase} produk akan diimpor sebagai pembelian")
+
+        params = {
+            "p_store": store,
+            "p_supplier_id": default_supplier_id,
+            "p_warehouse_id": default_warehouse_id,
+            "p_account_id": selected_account_id,
+            "p_payment_type": payment_type,
+            "p_created_by": username,
+            "p_due_date": due_date.isoformat() if due_date else None,
+        }
+        job_id = stock_import.job_id_for(file_bytes, store, params)
+        job = stock_import.get_job(job_id)
+        chunk_count = scan.chunk_count
+
+        if job is not None and job.status == stock_import.DONE:
+            st.info(f"File ini dengan pengaturan yang sama sudah selesai diimpor pada {job.import_date[:16].replace('T', ' ')}.")
+            if st.button("Impor Ulang sebagai Impor Baru"):
+                stock_import.discard_job(job_id)
+                st.rerun()
+            return
+        if job is not None and job.done_chunks:
+            st.warning(
+                f"Impor file ini sebelumnya terhenti: {job.done_chunks} dari {chunk_count} bagian "
+                f"({job.done_rows} produk) sudah masuk. Impor akan dilanjutkan dari bagian berikutnya."
+            )
+        elif chunk_count > 1:
+            st.caption(f"Impor dikirim dalam {chunk_count} bagian @ {stock_import.IMPORT_CHUNK_SIZE} baris.")
+        if payment_type == "credit" and chunk_count > 1:
+            st.caption("Setiap bagian dicatat sebagai satu transaksi pembelian kredit.")
+
+        confirm = st.checkbox("✅ Data sudah benar dan siap diimpor")
+        label = "Lanjutkan Impor" if job is not None and job.done_chunks else f"Impor {scan.total_rows} Produk"
+
+        if st.button(label, use_container_width=True, type="primary"):
+            if not confirm:
+                st.error("Harap centang konfirmasi terlebih dahulu!")
+                return
+
+            job = stock_import.start_job(job_id, store, uploaded_file.name)
+            bar = st.progress(0.0, text="Memulai impor...")
+
+            def on_progress(progress):
+                bar.progress(
+                    (progress.chunk_index + 1) / chunk_count,
+                    text=f"Bagian {progress.chunk_index + 1}/{chunk_count} · {progress.rows_done}/{scan.total_rows} produk",
+                )
+
+            try:
+                result = stock_import.run_import(
+                    job, stock_import.iter_file_chunks(io.BytesIO(file_bytes), uploaded_file.name), params, username, on_progress
+                )
+            except stock_import.ImportInterrupted as e:
+                st.error(f"Gagal mengimpor bagian {e.chunk_index + 1}: {e.error}")
+                if e.permanent:
+                    st.info("Bagian sebelumnya sudah tersimpan. Perbaiki data lalu unggah ulang file yang sama untuk melanjutkan.")
+                else:
+                    st.info("Bagian sebelumnya sudah tersimpan. Tekan **Lanjutkan Impor** untuk mencoba lagi dari bagian ini.")
+                return
+            except Exception as e:
+                st.error(f"Gagal menjalankan impor: {str(e)}")
+                return
+
+            bar.progress(1.0, text="Impor selesai")
+            skipped = f", {result.skipped_chunks} bagian sudah masuk sebelumnya" if result.skipped_chunks else ""
+            st.success(
+                f"✅ Berhasil mengimpor {result.rows_done} produk! "
+                f"({result.new_count} baru, {result.existing_count} diupdate{skipped})"
+            )
+            st.info("Cek **Riwayat Pembelian** untuk transaksi dan **Lihat Stok** untuk stok produk.")
@@ -1,5 +1,7 @@
 import streamlit as st
-from app.db import get_client
+from app.db import get_client, fetch_reference, product_index, stock_matrix
+from app.utils.product_search import product_picker
+from app.outbox import submit, report_submission
 import datetime
 import json
 
@@ -28,11 +30,11 @@ def show_regular_purchase(supabase, store):
 
     st.markdown("### 1️⃣ Pilih Supplier & Gudang")
     
-    supplier_resp = supabase.table("supplier").select("supplierid, suppliername").eq("store", store).order("suppliername").execute()
-    warehouse_resp = supabase.table("warehouse_list").select("warehouseid, name").eq("store", store).order("name").execute()
+    suppliers = fetch_reference("supplier", store, "supplierid, suppliername", order="suppliername")
+    warehouses = fetch_reference("warehouse_list", store, "warehouseid, name", order="name")
     
-    supplier_map = {s['suppliername']: s['supplierid'] for s in supplier_resp.data or []}
-    warehouse_map = {w['name']: w['warehouseid'] for w in warehouse_resp.data or []}
+    supplier_map = {s['suppliername']: s['supplierid'] for s in suppliers}
+    warehouse_map = {w['name']: w['warehouseid'] for w in warehouses}
 
     if not supplier_map:
         st.error("Belum ada supplier terdaftar. Silakan daftar supplier terlebih dahulu.")
@@ -53,37 +55,16 @@ def show_regular_purchase(supabase, store):
 
     st.markdown("### 2️⃣ Tambah Barang ke Keranjang")
     
-    products_resp = supabase.table("product").select("productid, productname, type, size, brand, quantity").eq("store", store).order("productname").execute()
-    products = products_resp.data or []
+    products = product_index(store)
     
     if not products:
         st.info("Pastikan data produk sudah terdaftar di menu 'Daftar Stok'.")
         return
     
-    def product_label(p):
-        name = p['productname']
-        size = p.get('size', '')
-        ptype = p.get('type', '')
-        stock = p.get('quantity', 0)
-        label = name
-        if size:
-            label += f" ({size})"
-        if ptype:
-            label += f" - {ptype}"
-        label += f" [Stok: {stock}]"
-        return label
-    
-    product_map = {product_label(p): p for p in products}
-    
     col_prod, col_qty, col_price = st.columns([3, 1, 2])
     
     with col_prod:
-        selected_product_label = st.selectbox(
-            "Pilih Produk",
-            options=product_map.keys(),
-            key="purch_product_select",
-            placeholder="Cari produk..."
-        )
+        product_data = product_picker(products, "Pilih Produk", key="purch_product", stock=stock_matrix(store))
     
     with col_qty:
         quantity = st.number_input("Jumlah", min_value=1, value=1, key="purch_qty")
@@ -94,8 +75,7 @@ def show_regular_purchase(supabase, store):
     col_add, col_clear = st.columns([3, 1])
     with col_add:
         if st.button("➕ Tambah ke Keranjang", use_container_width=True, type="primary"):
-            if selected_product_label and quantity > 0:
-                product_data = product_map[selected_product_label]
+            if product_data and quantity > 0:
                 new_item = {
                     'product_id': product_data['productid'],
                     'name': product_data['productname'],
@@ -152,8 +132,8 @@ def show_regular_purchase(supabase, store):
             payment_type = st.radio("Metode Pembayaran", ["Cash", "Credit"], horizontal=True, key="purch_payment_type")
             payment_type_value = "cash" if "Cash" in payment_type else "credit"
         
-        accounts_resp = supabase.table("accounts").select("account_id, account_name").eq("store", store).execute()
-        account_map = {acc['account_name']: acc['account_id'] for acc in accounts_resp.data or []}
+        accounts = fetch_reference("accounts", store, "account_id, account_name")
+        account_map = {acc['account_name']: acc['account_id'] for acc in accounts}
         
         selected_account_name = None
         due_date = None
@@ -197,7 +177,7 @@ def show_regular_purchase(supabase, store):
                 } for item in cart]
                 
                 try:
-                    result = supabase.rpc("record_purchase_transaction_multi", {
+                    entry = submit("record_purchase_transaction_multi", {
                         "p_store": store,
                         "p_supplier_id": supplier_map[selected_supplier_name],
                         "p_warehouse_id": warehouse_map[selected_warehouse_name],
@@ -209,10 +189,10 @@ def show_regular_purchase(supabase, store):
                         "p_transaction_date": transaction_datetime.isoformat(),
                         "p_created_by": st.session_state.get("username", "system"),
                         "p_invoice_number": invoice_number if invoice_number else None
-                    }).execute()
+                    }, store)
                     
-                    st.success(f"✅ Transaksi pembelian berhasil dicatat! ID: {result.data}")
-                    st.session_state.purchase_cart = []
-                    st.rerun()
+                    if report_submission(entry, f"✅ Transaksi pembelian berhasil dicatat! ID: {entry.result}"):
+                        st.session_state.purchase_cart = []
+                        st.rerun()
                 except Exception as e:
                     st.error(f"Gagal menyimpan transaksi: {e}")
@@ -1,6 +1,7 @@
 import streamlit as st
-from app.db import get_client
-import pandas as pd
+from app.db import search_filter, contains_filter
+from app.utils.pagination import start_history, get_history, needs_reload, show_load_more, summary_metric
+from app.utils.tables import typed_frame, money_column, datetime_column
 import datetime
 
 def show():
@@ -12,8 +13,6 @@ def show():
         return
 
     try:
-        supabase = get_client()
-
         st.subheader("Filter Riwayat Pembelian")
         
         col1, col2 = st.columns(2)
@@ -28,32 +27,47 @@ def show():
         with col_invoice:
             search_invoice = st.text_input("Cari No. Nota", placeholder="Contoh: PO-001")
 
-        if st.button("Tampilkan Riwayat", type="primary"):
-            end_date_param = (end_date + datetime.timedelta(days=1)).isoformat()
-            
-            response = supabase.rpc("get_purchase_history", {
-                "store_input": store,
-                "start_date_input": start_date.isoformat(),
-                "end_date_input": end_date_param
-            }).execute()
+        params = {
+            "store_input": store,
+            "start_date_input": start_date.isoformat(),
+            "end_date_input": (end_date + datetime.timedelta(days=1)).isoformat()
+        }
+        # Filter dijalankan di server; pandas di bawah hanya dipakai jika server menolak filter
+        filters = []
+        if search_term.strip():
+            filters.append(search_filter(search_term, ("product_name", "supplier_name")))
+        if search_invoice.strip():
+            filters.append(contains_filter("invoice_number", search_invoice))
+
+        if st.button("Tampilkan Riwayat", type="primary") or needs_reload("purchase_history", params, filters):
+            start_history("purchase_history", "get_purchase_history", params, filters)
 
-            results = response.data
+        history = get_history("purchase_history", params, filters)
+        if history is not None:
+            results = history["rows"]
             
             if not results:
-                st.info("Tidak ada riwayat pembelian untuk periode yang dipilih.")
+                if filters and history["filtered"]:
+                    st.info("Tidak ada hasil yang cocok dengan filter yang dipilih.")
+                else:
+                    st.info("Tidak ada riwayat pembelian untuk periode yang dipilih.")
             else:
-                df = pd.DataFrame(results)
+                df = typed_frame(
+                    results, numeric=("quantity", "price", "total"), datetimes=("purchase_date",),
+                    categories=("warehouse_name", "payment_type"),
+                )
                 
-                if search_term:
-                    term = search_term.lower()
-                    df = df[
-                        df['product_name'].str.lower().str.contains(term, na=False) |
-                        df['supplier_name'].str.lower().str.contains(term, na=False)
-                    ]
-                
-                if search_invoice:
-                    invoice_term = search_invoice.lower()
-                    df = df[df['invoice_number'].str.lower().str.contains(invoice_term, na=False)]
+                if not history["filtered"]:
+                    if search_term:
+                        term = search_term.lower()
+                        df = df[
+                            df['product_name'].str.lower().str.contains(term, na=False) |
+                            df['supplier_name'].str.lower().str.contains(term, na=False)
+                        ]
+                    
+                    if search_invoice:
+                        invoice_term = search_invoice.lower()
+                        df = df[df['invoice_number'].str.lower().str.contains(invoice_term, na=False)]
 
                 if df.empty:
                     st.warning(f"Tidak ada riwayat yang cocok dengan filter yang dipilih.")
@@ -68,10 +82,6 @@ def show():
                     }
                     df = df.rename(columns=rename_cols)
 
-                    df['Harga Satuan'] = df['Harga Satuan'].apply(lambda x: f"Rp {x:,.0f}")
-                    df['Total Harga'] = df['Total Harga'].apply(lambda x: f"Rp {x:,.0f}")
-                    df['Tanggal'] = pd.to_datetime(df['Tanggal']).dt.strftime('%Y-%m-%d %H:%M')
-                    
                     if 'No. Nota' in df.columns:
                         df['No. Nota'] = df['No. Nota'].fillna('-')
                     else:
@@ -83,10 +93,22 @@ def show():
                     ]
                     display_cols = [col for col in display_cols if col in df.columns]
 
-                    st.data_editor(df[display_cols], use_container_width=True, hide_index=True, disabled=True)
+                    st.data_editor(
+                        df[display_cols],
+                        use_container_width=True,
+                        hide_index=True,
+                        disabled=True,
+                        column_config={
+                            "Tanggal": datetime_column(),
+                            "Harga Satuan": money_column(),
+                            "Total Harga": money_column(),
+                        }
+                    )
                 
-                    total_purchase = df['Total Harga'].str.replace('Rp ', '').str.replace(',', '').astype(float).sum()
-                    st.metric("Total Pembelian", f"Rp {total_purchase:,.0f}")
+                    total_purchase = df['Total Harga'].sum()
+                    summary_metric("purchase_history", "Total Pembelian", f"Rp {total_purchase:,.0f}")
+
+            show_load_more("purchase_history")
 
     except Exception as e:
         st.error(f"Terjadi kesalahan: {e}")
@@ -1,5 +1,6 @@
 import streamlit as st
-from app.db import get_client
+from app.db import get_client, fetch_reference, product_index, stock_matrix, invalidate_after_rpc
+from app.utils.product_search import product_picker
 import datetime
 import json
 
@@ -22,8 +23,8 @@ def show():
         col_sup, col_wh, col_invoice = st.columns(3)
         
         with col_sup:
-            supplier_resp = supabase.table("supplier").select("supplierid, suppliername").eq("store", store).order("suppliername").execute()
-            supplier_map = {s['suppliername']: s['supplierid'] for s in supplier_resp.data or []}
+            suppliers = fetch_reference("supplier", store, "supplierid, suppliername", order="suppliername")
+            supplier_map = {s['suppliername']: s['supplierid'] for s in suppliers}
             
             if not supplier_map:
                 st.error("Belum ada supplier terdaftar untuk toko ini.")
@@ -37,8 +38,8 @@ def show():
             )
         
         with col_wh:
-            warehouse_resp = supabase.table("warehouse_list").select("warehouseid, name").eq("store", store).order("name").execute()
-            warehouse_map = {w['name']: w['warehouseid'] for w in warehouse_resp.data or []}
+            warehouses = fetch_reference("warehouse_list", store, "warehouseid, name", order="name")
+            warehouse_map = {w['name']: w['warehouseid'] for w in warehouses}
             
             if not warehouse_map:
                 st.error("Belum ada gudang terdaftar untuk toko ini.")
@@ -58,37 +59,16 @@ def show():
         # Add Items to Cart
         st.markdown("### 2️⃣ Tambah Barang ke Retur")
         
-        products_resp = supabase.table("product").select("productid, productname, type, size, brand, quantity").eq("store", store).order("productname").execute()
-        products = products_resp.data or []
+        products = product_index(store)
         
         if not products:
             st.info("Belum ada produk terdaftar di toko ini.")
             return
         
-        def product_label(p):
-            name = p['productname']
-            size = p.get('size', '')
-            ptype = p.get('type', '')
-            stock = p.get('quantity', 0)
-            label = name
-            if size:
-                label += f" ({size})"
-            if ptype:
-                label += f" - {ptype}"
-            label += f" [Stok: {stock}]"
-            return label
-        
-        product_map = {product_label(p): p for p in products}
-        
         col_prod, col_qty, col_price = st.columns([3, 1, 2])
         
         with col_prod:
-            selected_product_label = st.selectbox(
-                "Pilih Produk",
-                options=product_map.keys(),
-                key="pr_product_select",
-                placeholder="Cari produk..."
-            )
+            product_data = product_picker(products, "Pilih Produk", key="pr_product", stock=stock_matrix(store))
         
         with col_qty:
             quantity = st.number_input("Jumlah", min_value=1, value=1, key="pr_qty")
@@ -99,14 +79,8 @@ def show():
         col_add, col_clear = st.columns([3, 1])
         with col_add:
             if st.button("➕ Tambah ke Daftar Retur", use_container_width=True, type="primary"):
-                if selected_product_label and quantity > 0:
-                    product_data = product_map[selected_product_label]
-                    
-                    stock_resp = supabase.table("product_warehouse").select("quantity").eq(
-                        "productid", product_data['productid']
-                    ).eq("warehouseid", warehouse_map[selected_warehouse_name]).execute()
-                    
-                    current_stock = stock_resp.data[0]['quantity'] if stock_resp.data else 0
+                if product_data and quantity > 0:
+                    current_stock = stock_matrix(store).get(product_data['productid'], warehouse_map[selected_warehouse_name])
                     
                     if quantity > current_stock:
                         st.error(f"Stok tidak mencukupi! Stok tersedia: {current_stock}")
@@ -217,8 +191,8 @@ def show():
                 with col_time:
                     return_time = st.time_input("Waktu", value=datetime.datetime.now().time())
                 
-                accounts_resp = supabase.table("accounts").select("account_id, account_name").eq("store", store).execute()
-                account_map = {acc['account_name']: acc['account_id'] for acc in accounts_resp.data or []}
+                accounts = fetch_reference("accounts", store, "account_id, account_name")
+                account_map = {acc['account_name']: acc['account_id'] for acc in accounts}
                 
                 selected_account = None
                 if return_type == "refund" and account_map:
@@ -252,7 +226,7 @@ def show():
                     } for item in cart])
                     
                     try:
-                        result = supabase.rpc("record_purchase_return", {
+                        params = {
                             "p_store": store,
                             "p_supplier_id": supplier_map[selected_supplier_name],
                             "p_warehouse_id": warehouse_map[selected_warehouse_name],
@@ -264,8 +238,10 @@ def show():
                             "p_return_date": return_datetime.isoformat(),
                             "p_created_by": st.session_state.get("username", "system"),
                             "p_invoice_number": invoice_number if invoice_number else None
-                        }).execute()
+                        }
+                        result = supabase.rpc("record_purchase_return", params).execute()
                         
+                        invalidate_after_rpc("record_purchase_return", store, params)
                         st.success(f"✅ Retur pembelian berhasil dicatat! ID: {result.data}")
                         st.session_state.purchase_return_cart = []
                         st.rerun()
@@ -1,5 +1,5 @@
 import streamlit as st
-from app.db import get_client
+from app.db import get_client, invalidate_reference
 
 def show():
     st.title("Register Stock")
@@ -48,6 +48,7 @@ def show():
                 response = supabase.table("product").insert(data_to_insert).execute()
                 
                 if response.data:
+                    invalidate_reference(store, "product")
                     st.success(f"✅ Produk '{product_name}' berhasil didaftarkan!")
                     st.session_state.register_stock_form_key += 1
                     st.rerun()
@@ -1,5 +1,5 @@
 import streamlit as st
-from app.db import get_client
+from app.db import get_client, invalidate_reference
 
 def show():
     st.title("Tambahkan Gudang Baru")
@@ -37,6 +37,7 @@ def show():
                 response = supabase.table("warehouse_list").insert({"store": store, "name": warehouse_name.strip()}).execute()
                 
                 if response.data:
+                    invalidate_reference(store, "warehouse_list")
                     st.success(f"✅ Gudang '{warehouse_name}' berhasil ditambahkan.")
                     st.session_state.register_warehouse_form_key += 1
                     st.rerun()
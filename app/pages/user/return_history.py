@@ -1,6 +1,6 @@
 import streamlit as st
-from app.db import get_client
-import pandas as pd
+from app.utils.pagination import start_history, get_history, show_load_more, summary_metric
+from app.utils.tables import typed_frame, money_column, datetime_column
 import datetime
 
 def show():
@@ -12,8 +12,6 @@ def show():
         return
 
     try:
-        supabase = get_client()
-
         tab1, tab2 = st.tabs(["Retur Pembelian", "Retur Penjualan"])
 
         # Purchase Return History
@@ -26,20 +24,39 @@ def show():
             with col2:
                 end_date_pr = st.date_input("Sampai Tanggal", value=datetime.date.today(), key="pr_end")
 
-            if st.button("Tampilkan Riwayat Retur Pembelian", key="btn_pr", type="primary"):
-                try:
-                    response = supabase.rpc("get_purchase_return_history", {
-                        "store_input": store,
-                        "start_date_input": start_date_pr.isoformat(),
-                        "end_date_input": (end_date_pr + datetime.timedelta(days=1)).isoformat()
-                    }).execute()
+            params_pr = {
+                "store_input": store,
+                "start_date_input": start_date_pr.isoformat(),
+                "end_date_input": (end_date_pr + datetime.timedelta(days=1)).isoformat()
+            }
+            try:
+                if st.button("Tampilkan Riwayat Retur Pembelian", key="btn_pr", type="primary"):
+                    start_history("purchase_return_history", "get_purchase_return_history", params_pr)
 
-                    results = response.data
+                history = get_history("purchase_return_history", params_pr)
+                if history is not None:
+                    results = history["rows"]
                     
                     if not results:
                         st.info("Tidak ada riwayat retur pembelian untuk periode yang dipilih.")
                     else:
-                        df = pd.DataFrame(results)
+                        df = typed_frame(
+                            results, numeric=("total_amount", "item_count"), datetimes=("return_date",),
+                            categories=("warehouse_name",),
+                            labels={
+                                "return_type": {
+                                    'refund': 'Refund',
+                                    'replacement': 'Tukar',
+                                    'credit_note': 'Credit Note'
+                                },
+                                "status": {
+                                    'pending': 'Pending',
+                                    'approved': 'Approved',
+                                    'completed': 'Selesai',
+                                    'rejected': 'Ditolak'
+                                },
+                            },
+                        )
                         df = df.rename(columns={
                             "return_id": "ID",
                             "supplier_name": "Supplier",
@@ -52,40 +69,28 @@ def show():
                             "item_count": "Jml Item"
                         })
                         
-                        df['Total'] = df['Total'].apply(lambda x: f"Rp {x:,.0f}")
-                        df['Tanggal'] = pd.to_datetime(df['Tanggal']).dt.strftime('%Y-%m-%d %H:%M')
-                        df['Jenis'] = df['Jenis'].map({
-                            'refund': 'Refund',
-                            'replacement': 'Tukar',
-                            'credit_note': 'Credit Note'
-                        })
-                        df['Status'] = df['Status'].map({
-                            'pending': 'Pending',
-                            'approved': 'Approved',
-                            'completed': 'Selesai',
-                            'rejected': 'Ditolak'
-                        })
-                        
                         st.dataframe(
                             df[['ID', 'Tanggal', 'Supplier', 'Gudang', 'Jml Item', 'Total', 'Jenis', 'Status', 'Alasan']],
                             use_container_width=True,
-                            hide_index=True
+                            hide_index=True,
+                            column_config={"Tanggal": datetime_column(), "Total": money_column()}
                         )
                         
                         # Summary
                         st.markdown("---")
                         col_s1, col_s2, col_s3 = st.columns(3)
                         with col_s1:
-                            st.metric("Total Retur", len(results))
+                            st.metric("Total Retur", history["total"])
                         with col_s2:
-                            total_value = sum([r['total_amount'] for r in results])
-                            st.metric("Total Nilai", f"Rp {total_value:,.0f}")
+                            total_value = df['Total'].sum()
+                            summary_metric("purchase_return_history", "Total Nilai", f"Rp {total_value:,.0f}")
                         with col_s3:
-                            total_items = sum([r['item_count'] for r in results])
-                            st.metric("Total Item", total_items)
-                            
-                except Exception as e:
-                    st.error(f"Gagal memuat riwayat: {e}")
+                            summary_metric("purchase_return_history", "Total Item", int(df['Jml Item'].sum()))
+
+                    show_load_more("purchase_return_history")
+
+            except Exception as e:
+                st.error(f"Gagal memuat riwayat: {e}")
 
         # Sale Return History
         with tab2:
@@ -97,20 +102,39 @@ def show():
             with col2:
                 end_date_sr = st.date_input("Sampai Tanggal", value=datetime.date.today(), key="sr_end")
 
-            if st.button("Tampilkan Riwayat Retur Penjualan", key="btn_sr", type="primary"):
-                try:
-                    response = supabase.rpc("get_sale_return_history", {
-                        "store_input": store,
-                        "start_date_input": start_date_sr.isoformat(),
-                        "end_date_input": (end_date_sr + datetime.timedelta(days=1)).isoformat()
-                    }).execute()
+            params_sr = {
+                "store_input": store,
+                "start_date_input": start_date_sr.isoformat(),
+                "end_date_input": (end_date_sr + datetime.timedelta(days=1)).isoformat()
+            }
+            try:
+                if st.button("Tampilkan Riwayat Retur Penjualan", key="btn_sr", type="primary"):
+                    start_history("sale_return_history", "get_sale_return_history", params_sr)
 
-                    results = response.data
+                history = get_history("sale_return_history", params_sr)
+                if history is not None:
+                    results = history["rows"]
                     
                     if not results:
                         st.info("Tidak ada riwayat retur penjualan untuk periode yang dipilih.")
                     else:
-                        df = pd.DataFrame(results)
+                        df = typed_frame(
+                            results, numeric=("total_amount", "item_count"), datetimes=("return_date",),
+                            categories=("warehouse_name",),
+                            labels={
+                                "return_type": {
+                                    'refund': 'Refund',
+                                    'replacement': 'Tukar',
+                                    'store_credit': 'Store Credit'
+                                },
+                                "status": {
+                                    'pending': 'Pending',
+                                    'approved': 'Approved',
+                                    'completed': 'Selesai',
+                                    'rejected': 'Ditolak'
+                                },
+                            },
+                        )
                         df = df.rename(columns={
                             "return_id": "ID",
                             "customer_name": "Pelanggan",
@@ -123,41 +147,30 @@ def show():
                             "item_count": "Jml Item"
                         })
                         
-                        df['Total'] = df['Total'].apply(lambda x: f"Rp {x:,.0f}")
-                        df['Tanggal'] = pd.to_datetime(df['Tanggal']).dt.strftime('%Y-%m-%d %H:%M')
                         df['Pelanggan'] = df['Pelanggan'].fillna('Tanpa Nama')
-                        df['Jenis'] = df['Jenis'].map({
-                            'refund': 'Refund',
-                            'replacement': 'Tukar',
-                            'store_credit': 'Store Credit'
-                        })
-                        df['Status'] = df['Status'].map({
-                            'pending': 'Pending',
-                            'approved': 'Approved',
-                            'completed': 'Selesai',
-                            'rejected': 'Ditolak'
-                        })
                         
                         st.dataframe(
                             df[['ID', 'Tanggal', 'Pelanggan', 'Gudang', 'Jml Item', 'Total', 'Jenis', 'Status', 'Alasan']],
                             use_container_width=True,
-                            hide_index=True
+                            hide_index=True,
+                            column_config={"Tanggal": datetime_column(), "Total": money_column()}
                         )
                         
                         # Summary
                         st.markdown("---")
                         col_s1, col_s2, col_s3 = st.columns(3)
                         with col_s1:
-                            st.metric("Total Retur", len(results))
+                            st.metric("Total Retur", history["total"])
                         with col_s2:
-                            total_value = sum([r['total_amount'] for r in results])
-                            st.metric("Total Nilai", f"Rp {total_value:,.0f}")
+                            total_value = df['Total'].sum()
+                            summary_metric("sale_return_history", "Total Nilai", f"Rp {total_value:,.0f}")
                         with col_s3:
-                            total_items = sum([r['item_count'] for r in results])
-                            st.metric("Total Item", total_items)
-                            
-                except Exception as e:
-                    st.error(f"Gagal memuat riwayat: {e}")
+                            summary_metric("sale_return_history", "Total Item", int(df['Jml Item'].sum()))
+
+                    show_load_more("sale_return_history")
+
+            except Exception as e:
+                st.error(f"Gagal memuat riwayat: {e}")
 
     except Exception as e:
         st.error(f"Terjadi kesalahan: {e}")
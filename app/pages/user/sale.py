@@ -1,5 +1,7 @@
 import streamlit as st
-from app.db import get_client
+from app.db import get_client, fetch_reference, product_index, stock_matrix
+from app.utils.product_search import product_label, product_picker
+from app.outbox import FAILED, submit, submit_many, report_submission
 import datetime
 import json
 
@@ -39,8 +41,8 @@ def show_regular_sale(supabase, store):
     # Warehouse Selection
     st.markdown("### 1️⃣ Pilih Gudang & Pelanggan")
     
-    warehouse_resp = supabase.table("warehouse_list").select("warehouseid, name").eq("store", store).order("name").execute()
-    warehouse_map = {w['name']: w['warehouseid'] for w in warehouse_resp.data or []}
+    warehouses = fetch_reference("warehouse_list", store, "warehouseid, name", order="name")
+    warehouse_map = {w['name']: w['warehouseid'] for w in warehouses}
     
     if not warehouse_map:
         st.error("Belum ada gudang terdaftar.")
@@ -59,86 +61,20 @@ def show_regular_sale(supabase, store):
     # Add Items to Cart
     st.markdown("### 2️⃣ Tambah Barang ke Keranjang")
     
-    products_resp = supabase.table("product").select("productid, productname, type, size, brand, harga").eq("store", store).order("productname").execute()
-    products = products_resp.data or []
+    products = product_index(store)
     
     if not products:
         st.info("Belum ada produk yang terdaftar untuk toko ini.")
         return
     
-    def product_label(p):
-        name = p['productname']
-        size = p.get('size', '')
-        ptype = p.get('type', '')
-        label = name
-        if size:
-            label += f" ({size})"
-        if ptype:
-            label += f" - {ptype}"
-        return label
+    # Stok dari matriks stok toko (tanpa query per produk); divalidasi ulang oleh server saat transaksi disimpan
+    stock = stock_matrix(store)
+    warehouse_id = warehouse_map[selected_warehouse_name]
     
-    product_map = {product_label(p): p for p in products}
-    
-    col_prod, col_qty, col_price = st.columns([3, 1, 2])
-    
-    with col_prod:
-        selected_product_label = st.selectbox(
-            "Pilih Produk",
-            options=product_map.keys(),
-            key="sale_product_select",
-            placeholder="Cari produk..."
-        )
-    
-    # Get stock for selected product
-    selected_product_stock = 0
-    if selected_product_label:
-        product_data = product_map[selected_product_label]
-        stock_resp = supabase.table("product_warehouse").select("quantity").eq(
-            "productid", product_data['productid']
-        ).eq("warehouseid", warehouse_map[selected_warehouse_name]).execute()
-        selected_product_stock = stock_resp.data[0]['quantity'] if stock_resp.data else 0
-        
-        # Show stock info
-        if selected_product_stock > 0:
-            st.info(f"Stok tersedia di gudang: **{selected_product_stock} unit**")
-        else:
-            st.warning("⚠️ Stock tidak ada di gudang.")
-    
-    with col_qty:
-        quantity = st.number_input("Jumlah", min_value=1, value=1, max_value=max(1, selected_product_stock), key="sale_qty")
-    
-    with col_price:
-        default_price = product_map[selected_product_label].get('harga', 0) if selected_product_label else 0
-        price = st.number_input("Harga Jual (Rp)", min_value=0, value=int(default_price or 0), step=100, key="sale_price")
-    
-    col_add, col_clear = st.columns([3, 1])
-    with col_add:
-        if st.button("➕ Tambah ke Keranjang", use_container_width=True, type="primary", key="sale_add_btn"):
-            if selected_product_label and quantity > 0 and selected_product_stock > 0:
-                product_data = product_map[selected_product_label]
-                
-                total_in_cart = sum([item['qty'] for item in st.session_state.sale_cart if item['product_id'] == product_data['productid']])
-                if total_in_cart + quantity > selected_product_stock:
-                    st.error(f"Stok tidak mencukupi! Tersedia: {selected_product_stock}, di keranjang: {total_in_cart}")
-                else:
-                    new_item = {
-                        'product_id': product_data['productid'],
-                        'name': product_data['productname'],
-                        'type': product_data.get('type', '-'),
-                        'qty': quantity,
-                        'price': price,
-                        'subtotal': quantity * price
-                    }
-                    st.session_state.sale_cart.append(new_item)
-                    st.success(f"✅ {product_data['productname']} ditambahkan!")
-                    st.rerun()
-            elif selected_product_stock == 0:
-                st.error("Tidak bisa menambahkan produk dengan stok 0!")
-    
-    with col_clear:
-        if st.button("Kosongkan", use_container_width=True, key="sale_clear_btn"):
-            st.session_state.sale_cart = []
-            st.rerun()
+    if st.toggle("Mode Scan Barcode", key="sale_scan_mode", help="Scan kode produk dengan scanner; setiap scan langsung masuk keranjang"):
+        show_scan_input(products, stock, warehouse_id)
+    else:
+        show_manual_add(products, stock, warehouse_id)
 
     st.divider()
 
@@ -181,8 +117,8 @@ def show_regular_sale(supabase, store):
             payment_type = st.radio("Metode Pembayaran", ["Cash", "Credit"], horizontal=True, key="sale_payment_type")
             payment_type_value = "cash" if "Cash" in payment_type else "credit"
         
-        accounts_resp = supabase.table("accounts").select("account_id, account_name").eq("store", store).execute()
-        account_map = {acc['account_name']: acc['account_id'] for acc in accounts_resp.data or []}
+        accounts = fetch_reference("accounts", store, "account_id, account_name")
+        account_map = {acc['account_name']: acc['account_id'] for acc in accounts}
         
         selected_account_name = None
         due_date = None
@@ -227,7 +163,7 @@ def show_regular_sale(supabase, store):
                 } for item in cart]
                 
                 try:
-                    result = supabase.rpc("record_sale_transaction_multi", {
+                    entry = submit("record_sale_transaction_multi", {
                         "p_store": store,
                         "p_warehouse_id": warehouse_map[selected_warehouse_name],
                         "p_items": json.dumps(items_list),
@@ -239,15 +175,136 @@ def show_regular_sale(supabase, store):
                         "p_transaction_date": transaction_datetime.isoformat(),
                         "p_created_by": st.session_state.get("username", "system"),
                         "p_invoice_number": invoice_number if invoice_number else None
-                    }).execute()
+                    }, store)
                     
-                    st.success(f"✅ Transaksi penjualan berhasil dicatat! ID: {result.data}")
-                    st.session_state.sale_cart = []
-                    st.rerun()
+                    if report_submission(entry, f"✅ Transaksi penjualan berhasil dicatat! ID: {entry.result}"):
+                        st.session_state.sale_cart = []
+                        st.rerun()
                 except Exception as e:
                     st.error(f"Gagal menyimpan transaksi: {e}")
 
 
+def show_clear_cart_button():
+    if st.button("Kosongkan", use_container_width=True, key="sale_clear_btn"):
+        st.session_state.sale_cart = []
+        st.rerun()
+
+
+def show_manual_add(products, stock, warehouse_id):
+    """Tambah barang lewat pencarian produk."""
+    col_prod, col_qty, col_price = st.columns([3, 1, 2])
+    
+    with col_prod:
+        product_data = product_picker(products, "Pilih Produk", key="sale_product")
+    
+    # Get stock for selected product
+    selected_product_stock = 0
+    if product_data:
+        selected_product_stock = stock.get(product_data['productid'], warehouse_id)
+        
+        # Show stock info
+        if selected_product_stock > 0:
+            st.info(f"Stok tersedia di gudang: **{selected_product_stock} unit**")
+        else:
+            st.warning("⚠️ Stock tidak ada di gudang.")
+    
+    with col_qty:
+        quantity = st.number_input("Jumlah", min_value=1, value=1, max_value=max(1, selected_product_stock), key="sale_qty")
+    
+    with col_price:
+        default_price = product_data.get('harga', 0) if product_data else 0
+        price = st.number_input("Harga Jual (Rp)", min_value=0, value=int(default_price or 0), step=100, key="sale_price")
+    
+    col_add, col_clear = st.columns([3, 1])
+    with col_add:
+        if st.button("➕ Tambah ke Keranjang", use_container_width=True, type="primary", key="sale_add_btn"):
+            if product_data and quantity > 0 and selected_product_stock > 0:
+                total_in_cart = sum([item['qty'] for item in st.session_state.sale_cart if item['product_id'] == product_data['productid']])
+                if total_in_cart + quantity > selected_product_stock:
+                    st.error(f"Stok tidak mencukupi! Tersedia: {selected_product_stock}, di keranjang: {total_in_cart}")
+                else:
+                    new_item = {
+                        'product_id': product_data['productid'],
+                        'name': product_data['productname'],
+                        'type': product_data.get('type', '-'),
+                        'qty': quantity,
+                        'price': price,
+                        'subtotal': quantity * price
+                    }
+                    st.session_state.sale_cart.append(new_item)
+                    st.success(f"✅ {product_data['productname']} ditambahkan!")
+                    st.rerun()
+            elif selected_product_stock == 0:
+                st.error("Tidak bisa menambahkan produk dengan stok 0!")
+    
+    with col_clear:
+        show_clear_cart_button()
+
+
+def add_scanned_item(products, stock, warehouse_id):
+    """Callback scan: cari kode di index, cek stok di matriks stok, lalu tambah 1 baris/unit ke keranjang."""
+    code = st.session_state.sale_scan_code.strip()
+    # Kosongkan input agar scan berikutnya langsung bisa masuk
+    st.session_state.sale_scan_code = ""
+    if not code:
+        return
+
+    product = products.lookup(code)
+    if product is None:
+        st.session_state.sale_scan_message = ("error", f"Kode '{code}' tidak ditemukan.")
+        return
+
+    quantity = st.session_state.get("sale_scan_qty", 1)
+    available = stock.get(product['productid'], warehouse_id)
+    cart = st.session_state.sale_cart
+    total_in_cart = sum(item['qty'] for item in cart if item['product_id'] == product['productid'])
+    if total_in_cart + quantity > available:
+        st.session_state.sale_scan_message = (
+            "error", f"Stok {product['productname']} tidak mencukupi! Tersedia: {available}, di keranjang: {total_in_cart}"
+        )
+        return
+
+    price = product.get('harga') or 0
+    for item in cart:
+        if item['product_id'] == product['productid'] and item['price'] == price:
+            item['qty'] += quantity
+            item['subtotal'] = item['qty'] * item['price']
+            break
+    else:
+        cart.append({
+            'product_id': product['productid'],
+            'name': product['productname'],
+            'type': product.get('type', '-'),
+            'qty': quantity,
+            'price': price,
+            'subtotal': quantity * price
+        })
+    st.session_state.sale_scan_message = ("success", f"✅ {product_label(product)} +{quantity}")
+
+
+def show_scan_input(products, stock, warehouse_id):
+    """Mode scan: scanner (keyboard wedge) mengetik kode lalu Enter ke kotak input."""
+    col_code, col_qty, col_clear = st.columns([4, 1, 1])
+    with col_code:
+        st.text_input(
+            "Scan Kode Produk",
+            key="sale_scan_code",
+            placeholder="Arahkan scanner ke barcode...",
+            on_change=add_scanned_item,
+            args=(products, stock, warehouse_id),
+        )
+    with col_qty:
+        st.number_input("Jumlah per Scan", min_value=1, value=1, key="sale_scan_qty")
+    with col_clear:
+        st.write("")
+        show_clear_cart_button()
+
+    message = st.session_state.pop("sale_scan_message", None)
+    if message:
+        level, text = message
+        getattr(st, level)(text)
+
+
 def show_other_sale(supabase, store):
     
     if 'other_sale_cart' not in st.session_state:
@@ -337,8 +394,8 @@ def show_other_sale(supabase, store):
             other_payment_type = st.radio("Metode Pembayaran", ["Cash", "Credit"], horizontal=True, key="other_sale_payment_type")
             other_payment_type_value = "cash" if "Cash" in other_payment_type else "credit"
         
-        accounts_resp = supabase.table("accounts").select("account_id, account_name").eq("store", store).execute()
-        account_map = {acc['account_name']: acc['account_id'] for acc in accounts_resp.data or []}
+        accounts = fetch_reference("accounts", store, "account_id, account_name")
+        account_map = {acc['account_name']: acc['account_id'] for acc in accounts}
         
         other_selected_account_name = None
         other_due_date = None
@@ -376,25 +433,26 @@ def show_other_sale(supabase, store):
                 other_transaction_datetime = datetime.datetime.combine(other_transaction_date, other_transaction_time)
                 
                 try:
-                    for item in cart:
-                        result = supabase.rpc("record_other_sale", {
-                            "p_store": store,
-                            "p_customer_name": other_customer_name if other_customer_name else None,
-                            "p_item_name": item['name'],
-                            "p_item_type": item['type'],
-                            "p_quantity": item['qty'],
-                            "p_price": item['price'],
-                            "p_payment_type": other_payment_type_value,
-                            "p_due_date": other_due_date.isoformat() if other_due_date else None,
-                            "p_account_id": account_map.get(other_selected_account_name) if other_selected_account_name else None,
-                            "p_description": other_description,
-                            "p_transaction_date": other_transaction_datetime.isoformat(),
-                            "p_created_by": st.session_state.get("username", "system"),
-                            "p_invoice_number": other_invoice_number if other_invoice_number else None
-                        }).execute()
+                    entries = submit_many("record_other_sale", [{
+                        "p_store": store,
+                        "p_customer_name": other_customer_name if other_customer_name else None,
+                        "p_item_name": item['name'],
+                        "p_item_type": item['type'],
+                        "p_quantity": item['qty'],
+                        "p_price": item['price'],
+                        "p_payment_type": other_payment_type_value,
+                        "p_due_date": other_due_date.isoformat() if other_due_date else None,
+                        "p_account_id": account_map.get(other_selected_account_name) if other_selected_account_name else None,
+                        "p_description": other_description,
+                        "p_transaction_date": other_transaction_datetime.isoformat(),
+                        "p_created_by": st.session_state.get("username", "system"),
+                        "p_invoice_number": other_invoice_number if other_invoice_number else None
+                    } for item in cart], store)
                     
-                    st.success(f"✅ Penjualan lainnya berhasil dicatat!")
-                    st.session_state.other_sale_cart = []
-                    st.rerun()
+                    if report_submission(entries, "✅ Penjualan lainnya berhasil dicatat!"):
+                        st.session_state.other_sale_cart = []
+                        st.rerun()
+                    # Item yang sudah tersimpan dikeluarkan agar tidak tercatat dua kali saat disimpan ulang
+                    st.session_state.other_sale_cart = [item for item, entry in zip(cart, entries) if entry.status == FAILED]
                 except Exception as e:
                     st.error(f"Gagal menyimpan transaksi: {e}")
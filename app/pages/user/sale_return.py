@@ -1,5 +1,6 @@
 import streamlit as st
-from app.db import get_client
+from app.db import get_client, fetch_reference, product_index, stock_matrix, invalidate_after_rpc
+from app.utils.product_search import product_picker
 import datetime
 import json
 
@@ -31,8 +32,8 @@ def show():
             )
         
         with col_wh:
-            warehouse_resp = supabase.table("warehouse_list").select("warehouseid, name").eq("store", store).order("name").execute()
-            warehouse_map = {w['name']: w['warehouseid'] for w in warehouse_resp.data or []}
+            warehouses = fetch_reference("warehouse_list", store, "warehouseid, name", order="name")
+            warehouse_map = {w['name']: w['warehouseid'] for w in warehouses}
             
             if not warehouse_map:
                 st.error("Belum ada gudang terdaftar untuk toko ini.")
@@ -53,37 +54,16 @@ def show():
         #  Add Items to Cart 
         st.markdown("### 2️⃣ Tambah Barang yang Diretur")
         
-        products_resp = supabase.table("product").select("productid, productname, type, size, brand, harga, quantity").eq("store", store).order("productname").execute()
-        products = products_resp.data or []
+        products = product_index(store)
         
         if not products:
             st.info("Belum ada produk terdaftar di toko ini.")
             return
         
-        def product_label(p):
-            name = p['productname']
-            size = p.get('size', '')
-            ptype = p.get('type', '')
-            stock = p.get('quantity', 0)
-            label = name
-            if size:
-                label += f" ({size})"
-            if ptype:
-                label += f" - {ptype}"
-            label += f" [Stok: {stock}]"
-            return label
-        
-        product_map = {product_label(p): p for p in products}
-        
         col_prod, col_qty, col_price = st.columns([3, 1, 2])
         
         with col_prod:
-            selected_product_label = st.selectbox(
-                "Pilih Produk yang Diretur",
-                options=product_map.keys(),
-                key="sr_product_select",
-                placeholder="Cari produk..."
-            )
+            product_data = product_picker(products, "Pilih Produk yang Diretur", key="sr_product", stock=stock_matrix(store))
         
         with col_qty:
             quantity = st.number_input("Jumlah", min_value=1, value=1, key="sr_qty")
@@ -91,15 +71,14 @@ def show():
         with col_price:
             # Auto-fill dengan harga jual jika ada
             default_price = 0
-            if selected_product_label:
-                default_price = product_map[selected_product_label].get('harga', 0) or 0
+            if product_data:
+                default_price = product_data.get('harga', 0) or 0
             price = st.number_input("Harga Satuan (Rp)", min_value=0, value=int(default_price), step=100, key="sr_price")
         
         col_add, col_clear = st.columns([3, 1])
         with col_add:
             if st.button("➕ Tambah ke Daftar Retur", use_container_width=True, type="primary", key="sr_add"):
-                if selected_product_label and quantity > 0:
-                    product_data = product_map[selected_product_label]
+                if product_data and quantity > 0:
                     new_item = {
                         'product_id': product_data['productid'],
                         'name': product_data['productname'],
@@ -186,8 +165,8 @@ def show():
                     return_time = st.time_input("Waktu", value=datetime.datetime.now().time())
                 
                 # Account selection for refund
-                accounts_resp = supabase.table("accounts").select("account_id, account_name").eq("store", store).execute()
-                account_map = {acc['account_name']: acc['account_id'] for acc in accounts_resp.data or []}
+                accounts = fetch_reference("accounts", store, "account_id, account_name")
+                account_map = {acc['account_name']: acc['account_id'] for acc in accounts}
                 
                 selected_account = None
                 if return_type == "refund" and account_map:
@@ -221,7 +200,7 @@ def show():
                     } for item in cart])
                     
                     try:
-                        result = supabase.rpc("record_sale_return", {
+                        params = {
                             "p_store": store,
                             "p_warehouse_id": warehouse_map[selected_warehouse_name],
                             "p_customer_name": customer_name if customer_name else None,
@@ -233,8 +212,10 @@ def show():
                             "p_return_date": return_datetime.isoformat(),
                             "p_created_by": st.session_state.get("username", "system"),
                             "p_invoice_number": invoice_number if invoice_number else None
-                        }).execute()
+                        }
+                        result = supabase.rpc("record_sale_return", params).execute()
                         
+                        invalidate_after_rpc("record_sale_return", store, params)
                         st.success(f"✅ Retur penjualan berhasil dicatat! ID: {result.data}")
                         st.session_state.sale_return_cart = []
                         st.rerun()
@@ -1,6 +1,7 @@
 import streamlit as st
-from app.db import get_client
-import pandas as pd
+from app.db import search_filter, contains_filter, equals_filter
+from app.utils.pagination import start_history, get_history, needs_reload, show_load_more, summary_metric
+from app.utils.tables import typed_frame, money_column, datetime_column
 import datetime
 
 def show():
@@ -12,8 +13,6 @@ def show():
         return
 
     try:
-        supabase = get_client()
-
         st.subheader("Filter Riwayat Penjualan")
         
         col1, col2 = st.columns(2)
@@ -31,37 +30,56 @@ def show():
         # Filter jenis penjualan
         sale_type_filter = st.radio("Jenis Penjualan", ["Semua", "Penjualan Stok", "Penjualan Lainnya"], horizontal=True)
 
-        if st.button("Tampilkan Riwayat", type="primary"):
-            end_date_param = (end_date + datetime.timedelta(days=1)).isoformat()
-            
-            response = supabase.rpc("get_sale_history", {
-                "store_input": store,
-                "start_date_input": start_date.isoformat(),
-                "end_date_input": end_date_param
-            }).execute()
+        params = {
+            "store_input": store,
+            "start_date_input": start_date.isoformat(),
+            "end_date_input": (end_date + datetime.timedelta(days=1)).isoformat()
+        }
+        # Filter dijalankan di server; pandas di bawah hanya dipakai jika server menolak filter
+        filters = []
+        if search_term.strip():
+            filters.append(search_filter(search_term, ("product_name", "customer_name")))
+        if search_invoice.strip():
+            filters.append(contains_filter("invoice_number", search_invoice))
+        if sale_type_filter == "Penjualan Stok":
+            filters.append(equals_filter("is_non_stock", False))
+        elif sale_type_filter == "Penjualan Lainnya":
+            filters.append(equals_filter("is_non_stock", True))
+
+        if st.button("Tampilkan Riwayat", type="primary") or needs_reload("sale_history", params, filters):
+            start_history("sale_history", "get_sale_history", params, filters)
 
-            results = response.data
+        history = get_history("sale_history", params, filters)
+        if history is not None:
+            results = history["rows"]
             
             if not results:
-                st.info("Tidak ada riwayat penjualan untuk periode yang dipilih.")
+                if filters and history["filtered"]:
+                    st.info("Tidak ada hasil yang cocok dengan filter yang dipilih.")
+                else:
+                    st.info("Tidak ada riwayat penjualan untuk periode yang dipilih.")
             else:
-                df = pd.DataFrame(results)
+                df = typed_frame(
+                    results, numeric=("quantity", "price", "total"), datetimes=("sale_date",),
+                    categories=("warehouse_name", "payment_type"),
+                )
                 
-                if sale_type_filter == "Penjualan Stok":
-                    df = df[df.get('is_non_stock', False) == False]
-                elif sale_type_filter == "Penjualan Lainnya":
-                    df = df[df.get('is_non_stock', False) == True]
+                if not history["filtered"]:
+                    if sale_type_filter == "Penjualan Stok":
+                        df = df[df.get('is_non_stock', False) == False]
+                    elif sale_type_filter == "Penjualan Lainnya":
+                        df = df[df.get('is_non_stock', False) == True]
 
-                if search_term:
-                    term = search_term.lower()
-                    df = df[
-                        df['product_name'].str.lower().str.contains(term, na=False) |
-                        df['customer_name'].str.lower().str.contains(term, na=False)
-                    ]
-                
-                if search_invoice:
-                    invoice_term = search_invoice.lower()
-                    df = df[df['invoice_number'].str.lower().str.contains(invoice_term, na=False)]
+                    if search_term:
+                        term = search_term.lower()
+                        df = df[
+                            df['product_name'].str.lower().str.contains(term, na=False) |
+                            df['customer_name'].str.lower().str.contains(term, na=False)
+                        ]
+                    
+                    if search_invoice:
+                        invoice_term = search_invoice.lower()
+                        df = df[df['invoice_number'].str.lower().str.contains(invoice_term, na=False)]
 
                 if df.empty:
                     st.info(f"Tidak ada hasil yang cocok dengan filter yang dipilih.")
@@ -76,17 +94,13 @@ def show():
                     }
                     df = df.rename(columns=rename_cols)
 
-                    df['Harga Satuan'] = df['Harga Satuan'].apply(lambda x: f"Rp {x:,.0f}")
-                    df['Total Harga'] = df['Total Harga'].apply(lambda x: f"Rp {x:,.0f}")
-                    df['Tanggal'] = pd.to_datetime(df['Tanggal'], format='ISO8601').dt.strftime('%Y-%m-%d %H:%M')
-                    
                     if 'No. Nota' in df.columns:
                         df['No. Nota'] = df['No. Nota'].fillna('-')
                     else:
                         df['No. Nota'] = '-'
                     
                     if 'Jenis' in df.columns:
-                        df['Jenis'] = df['Jenis'].apply(lambda x: '📦 Lainnya' if x else '🛒 Stok')
+                        df['Jenis'] = df['Jenis'].eq(True).map({True: '📦 Lainnya', False: '🛒 Stok'}).astype("category")
                     else:
                         df['Jenis'] = '🛒 Stok'
 
@@ -96,11 +110,21 @@ def show():
                     ]
                     display_cols = [col for col in display_cols if col in df.columns]
                     
-                    st.dataframe(df[display_cols], use_container_width=True)
+                    st.dataframe(
+                        df[display_cols],
+                        use_container_width=True,
+                        column_config={
+                            "Tanggal": datetime_column(),
+                            "Harga Satuan": money_column(),
+                            "Total Harga": money_column(),
+                        }
+                    )
                     
                     # Summary
-                    total_sales = df['Total Harga'].str.replace('Rp ', '').str.replace(',', '').astype(float).sum()
-                    st.metric("Total Penjualan", f"Rp {total_sales:,.0f}")
+                    total_sales = df['Total Harga'].sum()
+                    summary_metric("sale_history", "Total Penjualan", f"Rp {total_sales:,.0f}")
+
+            show_load_more("sale_history")
 
     except Exception as e:
         st.error(f"Terjadi kesalahan: {e}")
@@ -1,5 +1,6 @@
 import streamlit as st
-from app.db import get_client
+from app.db import get_client, fetch_reference, product_index, stock_matrix, invalidate_after_rpc
+from app.utils.product_search import product_label, product_picker
 import datetime
 
 def show():
@@ -17,54 +18,31 @@ def show():
     try:
         supabase = get_client()
 
-        product_res = supabase.table("product").select("productid, productname, size, type").eq("store", store).order("productname").execute()
-        products = product_res.data or []
+        products = product_index(store)
 
         if not products:
             st.info("Belum ada produk yang terdaftar untuk toko ini.")
             return
 
-        def product_label(p):
-            name = p['productname']
-            size = p.get('size', '')
-            ptype = p.get('type', '')
-            label = name
-            if size:
-                label += f" ({size})"
-            if ptype:
-                label += f" - {ptype}"
-            return label
-        
-        product_map = {product_label(p): p['productid'] for p in products}
-        selected_product_name = st.selectbox("Pilih Produk yang Akan Disesuaikan", options=product_map.keys(), key=f"adj_product_{st.session_state.stock_adj_form_key}")
+        selected_product = product_picker(products, "Pilih Produk yang Akan Disesuaikan", key=f"adj_product_{st.session_state.stock_adj_form_key}")
 
-        if selected_product_name:
-            product_id = product_map[selected_product_name]
+        if selected_product:
+            product_id = selected_product['productid']
             
-            stock_resp = supabase.table("product_warehouse").select(
-                "quantity, warehouse_list(warehouseid, name)"
-            ).eq("productid", product_id).execute()
-            
-            stock_data = stock_resp.data or []
-
-            warehouse_options = {
-                f"{item['warehouse_list']['name']} (Stok: {item['quantity']})": {
-                    "id": item['warehouse_list']['warehouseid'],
-                    "qty": item['quantity']
-                } for item in stock_data
-            }
-            all_warehouses_resp = supabase.table("warehouse_list").select("warehouseid, name").eq("store", store).execute()
-            for wh in all_warehouses_resp.data:
-                label = f"{wh['name']} (Stok: 0)"
-                if label not in warehouse_options:
-                    warehouse_options[label] = {"id": wh['warehouseid'], "qty": 0}
+            # Stok produk di setiap gudang dari matriks stok toko (gudang tanpa stok bernilai 0)
+            stock_by_warehouse = stock_matrix(store).for_product(product_id)
+            all_warehouses = fetch_reference("warehouse_list", store, "warehouseid, name", order="name")
+            warehouse_options = {}
+            for wh in all_warehouses:
+                qty = stock_by_warehouse.get(wh['warehouseid'], 0)
+                warehouse_options[f"{wh['name']} (Stok: {qty})"] = {"id": wh['warehouseid'], "qty": qty}
 
             if not warehouse_options:
                 st.warning("Tidak ada gudang terdaftar. Silakan daftarkan gudang terlebih dahulu.")
                 return
 
             with st.form(f"adjustment_form_{st.session_state.stock_adj_form_key}"):
-                st.subheader(f"Menyesuaikan: {selected_product_name}")
+                st.subheader(f"Menyesuaikan: {product_label(selected_product)}")
                 
                 selected_warehouse_label = st.selectbox("Pilih Gudang", options=warehouse_options.keys())
                 
@@ -116,6 +94,7 @@ def show():
                             "p_transaction_date": transaction_datetime.isoformat()
                         }
                         supabase.rpc("record_stock_adjustment", params).execute()
+                        invalidate_after_rpc("record_stock_adjustment", store, params)
                         st.success("✅ Penyesuaian stok berhasil disimpan.")
                         # Reset form by incrementing key
                         st.session_state.stock_adj_form_key += 1
@@ -1,5 +1,7 @@
 import streamlit as st
-from app.db import get_client
+from app.db import get_client, fetch_reference
+from app.outbox import submit, report_submission
+from app.utils.formatters import format_currency_series, format_datetime_series
 import pandas as pd
 import datetime
 
@@ -131,8 +133,8 @@ def show():
                                 payment_amount = st.number_input("Jumlah Pembayaran (Rp)", min_value=0, max_value=int(sisa_utang), step=1000, format="%d", key=f"pay_amt_{row['debtid']}_1")
                                 
                                 # Account selection for arus kas
-                                accounts_resp = supabase.table("accounts").select("account_id, account_name").eq("store", store).execute()
-                                account_options = {acc['account_name']: acc['account_id'] for acc in accounts_resp.data or []}
+                                accounts = fetch_reference("accounts", store, "account_id, account_name")
+                                account_options = {acc['account_name']: acc['account_id'] for acc in accounts}
                                 if account_options:
                                     selected_account = st.selectbox("Bayar dari Rekening", options=list(account_options.keys()), key=f"pay_acc_{row['debtid']}_1")
                                 else:
@@ -153,15 +155,15 @@ def show():
                                     else:
                                         payment_datetime = datetime.datetime.combine(payment_date, payment_time)
                                         try:
-                                            supabase.rpc("record_supplier_payment", {
+                                            entry = submit("record_supplier_payment", {
                                                 "p_debtid": row['debtid'],
                                                 "p_amount": payment_amount,
                                                 "p_note": payment_note,
                                                 "p_transaction_date": payment_datetime.isoformat(),
                                                 "p_account_id": account_options.get(selected_account)
-                                            }).execute()
-                                            st.success("✅ Pembayaran berhasil dicatat!")
-                                            st.rerun()
+                                            }, store)
+                                            if report_submission(entry, "✅ Pembayaran berhasil dicatat!", "Gagal mencatat pembayaran"):
+                                                st.rerun()
                                         except Exception as e:
                                             st.error(f"Gagal mencatat pembayaran: {e}")
                             
@@ -169,8 +171,8 @@ def show():
                             history_resp = supabase.table("payment_history").select("*").eq("debtid", row['debtid']).order("paidat", desc=True).execute()
                             if history_resp.data:
                                 df_hist = pd.DataFrame(history_resp.data)[['paidat', 'paidamount', 'description']].rename(columns={'paidat': 'Tgl Bayar', 'paidamount': 'Jumlah', 'description': 'Catatan'})
-                                df_hist['Jumlah'] = df_hist['Jumlah'].apply(lambda x: f"Rp {x:,.0f}")
-                                df_hist['Tgl Bayar'] = pd.to_datetime(df_hist['Tgl Bayar']).dt.strftime('%Y-%m-%d %H:%M')
+                                df_hist['Jumlah'] = format_currency_series(df_hist['Jumlah'], decimals=0)
+                                df_hist['Tgl Bayar'] = format_datetime_series(df_hist['Tgl Bayar'], '%Y-%m-%d %H:%M')
                                 st.dataframe(df_hist, use_container_width=True, hide_index=True)
                             else:
                                 st.info("Belum ada riwayat pembayaran.")
@@ -1,6 +1,8 @@
 import streamlit as st
-import pandas as pd
 from app.db import get_client
+from app.utils.formatters import format_currency_series
+from app.utils.pagination import jump_to_position, show_page_controls
+from app.utils.stock_frame import STOCK_SELECT, flatten_stock
 
 def show():
     st.markdown("<h1 style='color: #1f77b4;'>Daftar Stok Produk</h1>", unsafe_allow_html=True)
@@ -26,47 +28,11 @@ def show():
         
         st.divider()
 
-        response = supabase.table("product").select(
-            "productid, productname, type, size, color, brand, description, updateat, harga, "
-            "productsupply(price, supplier(suppliername)), "
-            "product_warehouse(quantity, warehouse_list(name))"
-        ).eq("store", store).execute()
+        response = supabase.table("product").select(STOCK_SELECT).eq("store", store).execute()
 
-        rows = []
-        for p in response.data:
-            supplies = p.get("productsupply", []) or []
-            supplier_names = set()
-            for s in supplies:
-                if s and s.get("supplier") and s["supplier"].get("suppliername"):
-                    supplier_names.add(s["supplier"]["suppliername"])
-            
-            avg_price = p.get("harga") or 0
-
-            warehouses = p.get("product_warehouse", []) or []
-            total_quantity = sum(w.get("quantity", 0) for w in warehouses if w)
-            warehouse_names = set()
-            for w in warehouses:
-                if w and w.get("warehouse_list") and w["warehouse_list"].get("name"):
-                    warehouse_names.add(w["warehouse_list"]["name"])
+        df = flatten_stock(response.data or [])
 
-            rows.append({
-                "ID": p["productid"],
-                "Nama Produk": p["productname"] or "-",
-                "Jenis": p.get("type") or "-",
-                "Ukuran": p.get("size") or "-",
-                "Warna": p.get("color") or "-",
-                "Merek": p.get("brand") or "-",
-                "Harga Rata-rata": round(avg_price, 2),
-                "Total Kuantitas": total_quantity,
-                "Supplier": ", ".join(sorted(supplier_names)) if supplier_names else "-",
-                "Gudang": ", ".join(sorted(warehouse_names)) if warehouse_names else "-",
-                "Deskripsi": p.get("description") or "-",
-                "Update Terakhir": pd.to_datetime(p["updateat"]).strftime('%Y-%m-%d %H:%M') if p.get("updateat") else "-"
-            })
-
-        if rows:
-            df = pd.DataFrame(rows)
-            
+        if not df.empty:
             # Apply search filter
             if search_text:
                 term = search_text.lower()
@@ -103,7 +69,7 @@ def show():
             st.markdown("<h3>Daftar Produk</h3>", unsafe_allow_html=True)
             
             display_df = df[['ID', 'Nama Produk', 'Jenis', 'Ukuran', 'Total Kuantitas', 'Harga Rata-rata', 'Supplier', 'Gudang']].copy()
-            display_df['Harga Rata-rata'] = display_df['Harga Rata-rata'].apply(lambda x: f"Rp {x:,.0f}")
+            display_df['Harga Rata-rata'] = format_currency_series(display_df['Harga Rata-rata'], decimals=0)
             
             st.dataframe(
                 display_df,
@@ -123,22 +89,54 @@ def show():
             
             # Optional: Show detailed view
             if st.checkbox("Tampilkan Detail Lengkap"):
-                for _, row in df.iterrows():
-                    with st.expander(f"{row['Nama Produk']}"):
-                        col1, col2 = st.columns(2)
-                        with col1:
-                            st.write(f"**Jenis**: {row['Jenis']}")
-                            st.write(f"**Ukuran**: {row['Ukuran']}")
-                            st.write(f"**Warna**: {row['Warna']}")
-                            st.write(f"**Merek**: {row['Merek']}")
-                        with col2:
-                            st.write(f"**Harga Rata-rata**: Rp {row['Harga Rata-rata']:,.0f}")
-                            st.write(f"**Total Stok**: {row['Total Kuantitas']} unit")
-                            st.write(f"**Supplier**: {row['Supplier']}")
-                            st.write(f"**Gudang**: {row['Gudang']}")
-                        st.write(f"**Deskripsi**: {row['Deskripsi']}")
-                        st.write(f"**Update Terakhir**: {row['Update Terakhir']}")
+                show_stock_details(df)
         else:
             st.info("Tidak ada produk yang terdaftar untuk toko ini.")
     except Exception as e:
-        st.error(f"Terjadi kesalahan: {e}")
\ No newline at end of file
+        st.error(f"Terjadi kesalahan: {e}")
+
+
+DETAIL_KEY = "stock_detail"
+
+def jump_to_product(df):
+    """Callback "Lompat ke produk": ID persis atau potongan nama, lalu buka halamannya."""
+    term = st.session_state.get(f"{DETAIL_KEY}_jump", "").strip()
+    st.session_state[f"{DETAIL_KEY}_target"] = None
+    if not term:
+        return
+    matches = (df['ID'].astype(str) == term).to_numpy()
+    if not matches.any():
+        matches = df['Nama Produk'].str.contains(term, case=False, regex=False).to_numpy()
+    if not matches.any():
+        st.session_state[f"{DETAIL_KEY}_target"] = "not_found"
+        return
+    position = int(matches.argmax())
+    st.session_state[f"{DETAIL_KEY}_target"] = df['ID'].iloc[position:position + 1].tolist()[0]
+    jump_to_position(DETAIL_KEY, position)
+
+def show_stock_details(df):
+    """Detail produk per halaman: hanya produk di halaman aktif yang dibuat expander-nya."""
+    st.text_input(
+        "Lompat ke produk", key=f"{DETAIL_KEY}_jump", placeholder="ID atau nama produk lalu Enter",
+        on_change=jump_to_product, args=(df,),
+    )
+    target = st.session_state.get(f"{DETAIL_KEY}_target")
+    if target == "not_found":
+        st.caption("Produk tidak ditemukan di daftar yang sedang difilter.")
+
+    start, stop = show_page_controls(DETAIL_KEY, len(df))
+    for _, row in df.iloc[start:stop].iterrows():
+        with st.expander(f"{row['Nama Produk']}", expanded=row['ID'] == target):
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write(f"**Jenis**: {row['Jenis']}")
+                st.write(f"**Ukuran**: {row['Ukuran']}")
+                st.write(f"**Warna**: {row['Warna']}")
+                st.write(f"**Merek**: {row['Merek']}")
+            with col2:
+                st.write(f"**Harga Rata-rata**: Rp {row['Harga Rata-rata']:,.0f}")
+                st.write(f"**Total Stok**: {row['Total Kuantitas']} unit")
+                st.write(f"**Supplier**: {row['Supplier']}")
+                st.write(f"**Gudang**: {row['Gudang']}")
+            st.write(f"**Deskripsi**: {row['Deskripsi']}")
+            st.write(f"**Update Terakhir**: {row['Update Terakhir']}")
@@ -0,0 +1,378 @@
+# app/rollups.py
+# Rollup harian per toko untuk dashboard admin. Setiap hari disimpan sebagai hasil RPC dashboard
+# yang sudah ada (get_store_business_performance_v2, get_store_kpis dan get_expense_summary)
+# untuk rentang satu hari [hari, hari + 1). Ringkasan rentang apa pun dijumlahkan dari hari-
+# harinya (paling banyak satu baris per hari per metrik), sehingga rentang satu tahun sama
+# murahnya dengan satu minggu.
+#
+# Rollup tidak membaca tabel sale/purchase/operational_expense secara langsung, jadi tidak
+# bergantung pada kolom tabel (mis. cara server menghitung HPP atau jumlah transaksi) dan tidak
+# butuh migrasi. Asumsinya hanya bahwa RPC tersebut menjumlahkan baris menurut tanggal dalam
+# [start_date, end_date): hasil rentang = jumlah hasil per hari. total_modal dihitung server
+# sepanjang waktu (tidak tergantung rentang), jadi diambil dari hari yang paling baru diambil.
+# Kecocokan dengan RPC rentang bisa diperiksa terhadap backend mana pun dengan
+# benchmarks/rollup_parity.py.
+#
+# Kesegaran: hari transaksi yang ditulis proses ini (db.invalidate_after_rpc) diambil ulang
+# sebelum dibaca lagi. Transaksi dari proses/host lain masuk lewat verifikasi ulang di
+# background: hari dalam ROLLUP_RECENT_DAYS terakhir setelah ROLLUP_RECENT_TTL detik (sama
+# dengan cache dashboard untuk rentang yang mencakup hari ini), hari yang lebih lama setelah
+# ROLLUP_REVERIFY_HOURS.
+import datetime
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Optional
+
+import pandas as pd
+
+from app.db import get_client, pop_changed_days
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_PATH = os.getenv("ROLLUP_PATH", os.path.join("data", "rollups.db"))
+ROLLUP_RECENT_DAYS = 14
+ROLLUP_RECENT_TTL = 300
+ROLLUP_REVERIFY_HOURS = 24
+# Hari yang belum ada sebanyak ini diambil saat itu juga; lebih dari itu, rentangnya dijawab
+# RPC rentang (RollupPending) sementara hari yang kurang diisi di background
+ROLLUP_SYNC_DAYS = 3
+# Rentang yang lebih panjang tidak diisi ke rollup (ValueError): ringkasan memakai RPC rentang
+ROLLUP_MAX_DAYS = 3660
+# Worker pengisi rollup terpisah dari pool query (app/utils/parallel.py) agar backfill yang
+# panjang tidak menahan query dashboard
+ROLLUP_FILL_WORKERS = 2
+ROLLUP_SCHEMA_VERSION = 2
+
+# Kolom hasil get_store_business_performance_v2 / get_store_kpis yang dijumlahkan per hari
+PERFORMANCE_SUMS = (
+    "hpp", "stock_revenue", "non_stock_revenue", "total_revenue", "stock_transaction_count",
+    "non_stock_transaction_count", "transaction_count", "gross_profit", "total_expenses",
+    "salary_expense", "other_expense", "net_profit",
+)
+KPI_SUMS = ("total_revenue", "total_cost", "gross_profit", "sale_count")
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS rollup_days (
+    store TEXT NOT NULL,
+    day TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    changed_at REAL NOT NULL DEFAULT 0,
+    total_modal REAL NOT NULL DEFAULT 0,
+    {", ".join(f"{c} REAL NOT NULL DEFAULT 0" for c in PERFORMANCE_SUMS)},
+    {", ".join(f"kpi_{c} REAL NOT NULL DEFAULT 0" for c in KPI_SUMS)},
+    PRIMARY KEY (store, day)
+);
+CREATE TABLE IF NOT EXISTS daily_expenses (
+    store TEXT NOT NULL,
+    day TEXT NOT NULL,
+    expense_type TEXT NOT NULL,
+    total_amount REAL NOT NULL DEFAULT 0,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (store, day, expense_type)
+);
+"""
+
+ROLLUP_TABLES = ("rollup_days", "daily_expenses")
+
+
+class RollupPending(Exception):
+    """Rentang belum lengkap di rollup; pemanggil memakai RPC rentang aslinya."""
+
+
+_store_locks: dict = {}
+_locks_guard = threading.Lock()
+# Hari yang menunggu diisi di background per toko; toko ada di _filling selama pengisinya berjalan
+_fill_queue: dict = {}
+_filling: set = set()
+_fill_guard = threading.Lock()
+_fill_executor: Optional[ThreadPoolExecutor] = None
+
+
+def _connect() -> sqlite3.Connection:
+    if ROLLUP_PATH != ":memory:":
+        os.makedirs(os.path.dirname(ROLLUP_PATH) or ".", exist_ok=True)
+    conn = sqlite3.connect(ROLLUP_PATH, timeout=60, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    if conn.execute("PRAGMA user_version").fetchone()[0] != ROLLUP_SCHEMA_VERSION:
+        # File dari versi lama (rollup dari baris tabel sumber): dibuang lalu diisi ulang dari RPC
+        for (table,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall():
+            conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+        conn.execute(f"PRAGMA user_version = {ROLLUP_SCHEMA_VERSION}")
+    conn.executescript(_SCHEMA)
+    return conn
+
+@contextmanager
+def _write(conn):
+    """Transaksi tulis singkat. Tidak ada panggilan jaringan di dalamnya, jadi lock tulis SQLite
+    hanya ditahan selama menulis ke rollup."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+def _store_lock(store: str) -> threading.Lock:
+    with _locks_guard:
+        return _store_locks.setdefault(store, threading.Lock())
+
+def _day_range(start_date: str, end_date: str) -> list:
+    start, end = datetime.date.fromisoformat(start_date), datetime.date.fromisoformat(end_date)
+    return [(start + datetime.timedelta(days=i)).isoformat() for i in range((end - start).days)]
+
+
+# Mengambil satu hari dari RPC
+
+def _fetch_day(store: str, day: str) -> tuple:
+    next_day = (datetime.date.fromisoformat(day) + datetime.timedelta(days=1)).isoformat()
+    params = {"store_input": store, "start_date": day, "end_date": next_day}
+    client = get_client()
+    performance = client.rpc("get_store_business_performance_v2", params).execute().data
+    kpis = client.rpc("get_store_kpis", params).execute().data
+    expenses = client.rpc("get_expense_summary", params).execute().data
+    return (performance[0] if performance else {}), kpis or {}, expenses or []
+
+def _refresh_day(conn, store: str, day: str):
+    """Ambil ulang satu hari lalu ganti barisnya. fetched_at dicatat sebelum RPC dipanggil, jadi
+    transaksi yang masuk selama pengambilan (changed_at lebih baru) membuat hari itu diambil lagi."""
+    fetched_at = time.time()
+    performance, kpis, expenses = _fetch_day(store, day)
+    columns = ("store", "day", "fetched_at", "total_modal", *PERFORMANCE_SUMS, *(f"kpi_{c}" for c in KPI_SUMS))
+    values = (
+        store, day, fetched_at, float(performance.get("total_modal") or 0),
+        *(float(performance.get(c) or 0) for c in PERFORMANCE_SUMS),
+        *(float(kpis.get(c) or 0) for c in KPI_SUMS),
+    )
+    with _write(conn):
+        conn.execute(
+            f"INSERT INTO rollup_days ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+            f"ON CONFLICT (store, day) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in columns[2:])}",
+            values,
+        )
+        conn.execute("DELETE FROM daily_expenses WHERE store = ? AND day = ?", (store, day))
+        conn.executemany(
+            "INSERT INTO daily_expenses (store, day, expense_type, total_amount, transaction_count) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (store, day, expense_type) DO UPDATE SET total_amount = total_amount + excluded.total_amount, "
+            "transaction_count = transaction_count + excluded.transaction_count",
+            [(store, day, row.get("expense_type") or "", float(row.get("total_amount") or 0), int(row.get("transaction_count") or 0))
+             for row in expenses],
+        )
+
+def _apply_changed_days(conn, store: str):
+    """Tandai hari yang ditulis proses ini (db.pop_changed_days) agar diambil ulang."""
+    changed = pop_changed_days(store)
+    if changed == {}:
+        return
+    with _write(conn):
+        if changed is None:
+            conn.execute("UPDATE rollup_days SET changed_at = ? WHERE store = ?", (time.time(), store))
+        else:
+            conn.executemany(
+                "UPDATE rollup_days SET changed_at = MAX(changed_at, ?) WHERE store = ? AND day = ?",
+                [(changed_at, store, day) for day, changed_at in changed.items()],
+            )
+
+
+# Pengisian di background
+
+def _get_fill_executor() -> ThreadPoolExecutor:
+    global _fill_executor
+    with _fill_guard:
+        if _fill_executor is None:
+            _fill_executor = ThreadPoolExecutor(max_workers=ROLLUP_FILL_WORKERS, thread_name_prefix="rollup-fill")
+        return _fill_executor
+
+def _next_fill_day(store: str) -> Optional[str]:
+    with _fill_guard:
+        queued = _fill_queue.get(store)
+        if not queued:
+            _fill_queue.pop(store, None)
+            _filling.discard(store)
+            return None
+        # Hari terbaru lebih dulu: paling sering dibaca dan paling mungkin berubah
+        day = max(queued)
+        queued.discard(day)
+        return day
+
+def _fill(store: str):
+    conn = _connect()
+    try:
+        while (day := _next_fill_day(store)) is not None:
+            try:
+                with _store_lock(store):
+                    _refresh_day(conn, store, day)
+            except Exception as e:
+                logger.warning(f"Rollup {store} {day} gagal diambil: {e}")
+    finally:
+        conn.close()
+
+def _schedule_fill(store: str, days):
+    with _fill_guard:
+        _fill_queue.setdefault(store, set()).update(days)
+        if store in _filling:
+            return
+        _filling.add(store)
+    _get_fill_executor().submit(_fill, store)
+
+
+# Kesiapan rentang
+
+def _pending_days(conn, store: str, days: list) -> tuple:
+    """(hari yang harus diambil sebelum dibaca, hari yang boleh dibaca tetapi perlu diverifikasi ulang)."""
+    rows = {
+        row["day"]: row for row in conn.execute(
+            "SELECT day, fetched_at, changed_at FROM rollup_days WHERE store = ? AND day >= ? AND day <= ?",
+            (store, days[0], days[-1]),
+        )
+    }
+    now = time.time()
+    recent = (datetime.date.today() - datetime.timedelta(days=ROLLUP_RECENT_DAYS)).isoformat()
+    missing, stale = [], []
+    for day in days:
+        row = rows.get(day)
+        if row is None or row["changed_at"] >= row["fetched_at"]:
+            missing.append(day)
+        elif now - row["fetched_at"] > (ROLLUP_RECENT_TTL if day >= recent else ROLLUP_REVERIFY_HOURS * 3600):
+            stale.append(day)
+    return missing, stale
+
+def _ensure_range(conn, store: str, start_date: str, end_date: str):
+    """Pastikan semua hari [start_date, end_date) bisa dibaca dari rollup, atau raise RollupPending
+    (sebagian besar hari belum ada) / ValueError (rentang lebih dari ROLLUP_MAX_DAYS)."""
+    days = _day_range(start_date, end_date)
+    if not days:
+        return
+    if len(days) > ROLLUP_MAX_DAYS:
+        raise ValueError(f"Rentang {len(days)} hari melebihi batas rollup {ROLLUP_MAX_DAYS} hari")
+    _apply_changed_days(conn, store)
+    missing, stale = _pending_days(conn, store, days)
+    if len(missing) > ROLLUP_SYNC_DAYS:
+        _schedule_fill(store, missing + stale)
+        raise RollupPending(f"Rollup {store}: {len(missing)} hari belum tersedia, diisi di background")
+    if missing:
+        with _store_lock(store):
+            # Query dashboard lain untuk toko yang sama mungkin sudah mengambilnya
+            missing, _ = _pending_days(conn, store, missing)
+            for day in missing:
+                _refresh_day(conn, store, day)
+    if stale:
+        _schedule_fill(store, stale)
+
+def _read(store: str, start_date: str, end_date: str, read):
+    conn = _connect()
+    try:
+        _ensure_range(conn, store, start_date, end_date)
+        return read(conn)
+    finally:
+        conn.close()
+
+def reset(store: str):
+    """Hapus rollup toko (mis. setelah toko dihapus); diisi ulang saat dibaca berikutnya."""
+    with _fill_guard:
+        _fill_queue.pop(store, None)
+    with _store_lock(store):
+        conn = _connect()
+        try:
+            with _write(conn):
+                for table in ROLLUP_TABLES:
+                    conn.execute(f"DELETE FROM {table} WHERE store = ?", (store,))
+        finally:
+            conn.close()
+    pop_changed_days(store)
+
+
+# Ringkasan rentang tanggal (start inklusif, end eksklusif, teks YYYY-MM-DD), dengan bentuk
+# hasil yang sama seperti RPC dashboard yang digantikannya. RollupPending jika rentang belum
+# lengkap di rollup.
+
+def store_performance(store: str, start_date: str, end_date: str) -> list:
+    """Seperti get_store_business_performance_v2."""
+    def read(conn):
+        sums = conn.execute(
+            f"SELECT {', '.join(f'COALESCE(SUM({c}), 0)' for c in PERFORMANCE_SUMS)} "
+            "FROM rollup_days WHERE store = ? AND day >= ? AND day < ?",
+            (store, start_date, end_date),
+        ).fetchone()
+        modal = conn.execute(
+            "SELECT total_modal FROM rollup_days WHERE store = ? ORDER BY fetched_at DESC LIMIT 1", (store,)
+        ).fetchone()
+        return sums, modal
+
+    sums, modal = _read(store, start_date, end_date, read)
+    result = {"total_modal": modal["total_modal"] if modal else 0, **dict(zip(PERFORMANCE_SUMS, sums))}
+    for column in ("stock_transaction_count", "non_stock_transaction_count", "transaction_count"):
+        result[column] = int(result[column])
+    total_revenue = result["total_revenue"]
+    result["profit_margin"] = (result["net_profit"] / total_revenue * 100) if total_revenue else 0
+    return [result]
+
+def store_kpis(store: str, start_date: str, end_date: str) -> dict:
+    """Seperti get_store_kpis."""
+    sums = _read(store, start_date, end_date, lambda conn: conn.execute(
+        f"SELECT {', '.join(f'COALESCE(SUM(kpi_{c}), 0)' for c in KPI_SUMS)} "
+        "FROM rollup_days WHERE store = ? AND day >= ? AND day < ?",
+        (store, start_date, end_date),
+    ).fetchone())
+    result = dict(zip(KPI_SUMS, sums))
+    result["sale_count"] = int(result["sale_count"])
+    return result
+
+def expense_summary(store: str, start_date: str, end_date: str) -> list:
+    """Seperti get_expense_summary."""
+    rows = _read(store, start_date, end_date, lambda conn: conn.execute(
+        "SELECT expense_type, SUM(total_amount) AS total_amount, SUM(transaction_count) AS transaction_count "
+        "FROM daily_expenses WHERE store = ? AND day >= ? AND day < ? GROUP BY expense_type ORDER BY total_amount DESC",
+        (store, start_date, end_date),
+    ).fetchall())
+    return [dict(row) for row in rows]
+
+
+# Tren per periode. Pengelompokan dilakukan di SQL atas rollup harian, jadi rentang multi-tahun
+# tetap hanya mengembalikan satu baris per periode.
+
+# Periode -> (ekspresi SQL awal periode dari kolom day, frekuensi pandas yang sama)
+TREND_BUCKETS = {
+    "day": ("day", "D"),
+    "week": ("date(day, '-6 days', 'weekday 1')", "W-MON"),  # minggu mulai Senin
+    "month": ("substr(day, 1, 7) || '-01'", "MS"),
+}
+
+def trend_bucket(start_date: str, end_date: str) -> str:
+    """Periode default menurut panjang rentang: harian sampai ~3 bulan, mingguan sampai 2 tahun."""
+    days = (datetime.date.fromisoformat(end_date) - datetime.date.fromisoformat(start_date)).days
+    if days <= 92:
+        return "day"
+    return "week" if days <= 731 else "month"
+
+def sales_trend(store: str, start_date: str, end_date: str, bucket: str = "day") -> list:
+    """Pendapatan, HPP, laba kotor, biaya dan laba bersih per periode dalam rentang. Periode
+    tanpa transaksi ikut dikembalikan dengan nilai 0 agar grafik tidak melompati celah."""
+    expression, freq = TREND_BUCKETS[bucket]
+
+    def read(conn):
+        rows = conn.execute(
+            f"SELECT {expression} AS period, SUM(total_revenue), SUM(hpp), SUM(transaction_count), "
+            "SUM(total_expenses), SUM(gross_profit), SUM(net_profit) FROM rollup_days "
+            "WHERE store = ? AND day >= ? AND day < ? GROUP BY period",
+            (store, start_date, end_date),
+        ).fetchall()
+        first = conn.execute(f"SELECT {expression} FROM (SELECT ? AS day)", (start_date,)).fetchone()[0]
+        return rows, first
+
+    rows, first = _read(store, start_date, end_date, read)
+    df = pd.DataFrame(
+        [tuple(row) for row in rows],
+        columns=["period", "revenue", "hpp", "transactions", "expenses", "gross_profit", "net_profit"],
+    ).set_index("period")
+    last_day = datetime.date.fromisoformat(end_date) - datetime.timedelta(days=1)
+    periods = pd.date_range(first, last_day, freq=freq).strftime("%Y-%m-%d")
+    df = df.reindex(periods).fillna(0)
+    df["transactions"] = df["transactions"].astype("int64")
+    return df.rename_axis("period").reset_index().to_dict("records")
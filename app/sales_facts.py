@@ -0,0 +1,303 @@
+# app/sales_facts.py
+# Tabel fakta penjualan stok per toko dalam bentuk kolom NumPy: kode produk (int32), jumlah
+# (int32), nilai dalam rupiah (int64) dan hari (datetime64[D]). Baris sale baru (saleid >
+# high-water mark) ditambahkan per halaman, lalu disimpan ke file .npz per toko agar proses
+# berikutnya tidak membaca ulang seluruh riwayat.
+#
+# Pertanyaan per produk untuk rentang apa pun (terlaris, paling sedikit terjual, sell-through)
+# cukup satu mask tanggal dan np.bincount atas kode produk. Waktu penjualan terakhir per produk
+# (presisi detik) diperbarui saat append, sehingga produk lambat terjual tidak memindai fakta.
+#
+# Setiap refresh membaca ulang FACTS_REREAD_WINDOW id di bawah high-water mark
+# (penjualan yang commit belakangan bisa punya id lebih kecil); saleid yang sudah masuk dicatat
+# di recent_ids dan dilewati. Hapus toko memanggil reset().
+import datetime
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from app.db import PRODUCT_COLUMNS, dashboard_generation, fetch_reference, get_client, stock_matrix
+from app.utils.formatters import parse_datetime_series
+
+logger = logging.getLogger(__name__)
+
+SALES_FACTS_PATH = os.getenv("SALES_FACTS_PATH", os.path.join("data", "sales_facts"))
+FACTS_PAGE_SIZE = 1000
+# Refresh inkremental paling sering sekali per interval ini per toko (detik)
+FACTS_MIN_INTERVAL = 5.0
+FACT_COLUMNS = "saleid, productid, quantity, total, is_non_stock, sale_date"
+# Jumlah id di bawah high-water mark yang dibaca ulang setiap refresh
+FACTS_REREAD_WINDOW = 2_000
+
+NO_SALE = np.datetime64("NaT", "s")
+
+
+@dataclass
+class SalesFacts:
+    """Fakta penjualan stok satu toko. Kolom fakta punya kapasitas cadangan; hanya `size`
+    baris pertama yang berisi data. product_ids[kode] adalah productid asli. recent_ids berisi
+    saleid yang sudah diterapkan di dalam jendela baca ulang."""
+    last_id: int = 0
+    size: int = 0
+    codes: np.ndarray = field(default_factory=lambda: np.empty(0, np.int32))
+    quantity: np.ndarray = field(default_factory=lambda: np.empty(0, np.int32))
+    amount: np.ndarray = field(default_factory=lambda: np.empty(0, np.int64))
+    day: np.ndarray = field(default_factory=lambda: np.empty(0, "datetime64[D]"))
+    product_ids: np.ndarray = field(default_factory=lambda: np.empty(0, np.int64))
+    last_sale: np.ndarray = field(default_factory=lambda: np.empty(0, "datetime64[s]"))
+    recent_ids: np.ndarray = field(default_factory=lambda: np.empty(0, np.int64))
+
+    def __post_init__(self):
+        self._code_of = {int(pid): code for code, pid in enumerate(self.product_ids)}
+
+    @property
+    def product_count(self) -> int:
+        return len(self.product_ids)
+
+    def columns(self) -> tuple:
+        """(codes, quantity, amount, day) yang terisi. Append berikutnya hanya menulis di
+        belakang `size` atau ke array baru, jadi view ini aman dipakai tanpa lock."""
+        n = self.size
+        return self.codes[:n], self.quantity[:n], self.amount[:n], self.day[:n]
+
+    def codes_of(self, product_ids: list) -> np.ndarray:
+        """Kode fakta untuk productid, -1 untuk produk yang belum pernah terjual."""
+        return np.fromiter((self._code_of.get(pid, -1) for pid in product_ids), np.int64, len(product_ids))
+
+    def _code(self, product_ids: np.ndarray) -> np.ndarray:
+        new = [pid for pid in dict.fromkeys(product_ids.tolist()) if pid not in self._code_of]
+        if new:
+            start = len(self.product_ids)
+            self._code_of.update((pid, start + i) for i, pid in enumerate(new))
+            self.product_ids = np.concatenate([self.product_ids, np.asarray(new, np.int64)])
+            self.last_sale = np.concatenate([self.last_sale, np.full(len(new), NO_SALE)])
+        return np.fromiter((self._code_of[pid] for pid in product_ids.tolist()), np.int32, len(product_ids))
+
+    def _reserve(self, extra: int):
+        needed = self.size + extra
+        if needed <= len(self.codes):
+            return
+        capacity = max(needed, 2 * len(self.codes), 1024)
+        for name in ("codes", "quantity", "amount", "day"):
+            old = getattr(self, name)
+            grown = np.empty(capacity, old.dtype)
+            grown[:self.size] = old[:self.size]
+            setattr(self, name, grown)
+
+    def append(self, rows: list) -> int:
+        """Tambahkan satu halaman baris sale (urut saleid), kecuali saleid yang sudah ada di
+        recent_ids. Mengembalikan jumlah fakta baru."""
+        if not rows:
+            return 0
+        df = pd.DataFrame(rows)
+        ids = df["saleid"].to_numpy(np.int64)
+        df = df[~np.isin(ids, self.recent_ids)]
+        self.last_id = max(self.last_id, int(ids.max()))
+        recent = np.concatenate([self.recent_ids, df["saleid"].to_numpy(np.int64)])
+        self.recent_ids = recent[recent > self.last_id - FACTS_REREAD_WINDOW]
+        df = df[df["productid"].notna() & ~df["is_non_stock"].fillna(False).astype(bool)]
+        if df.empty:
+            return 0
+
+        codes = self._code(df["productid"].astype("int64").to_numpy())
+        # Hari diambil dari teks tanggal apa adanya, sama seperti rollup dan filter RPC
+        days = df["sale_date"].astype(str).str.slice(0, 10).to_numpy("datetime64[D]")
+        sold_at = parse_datetime_series(df["sale_date"]).to_numpy("datetime64[s]")
+        n = len(df)
+        self._reserve(n)
+        end = self.size + n
+        self.codes[self.size:end] = codes
+        self.quantity[self.size:end] = pd.to_numeric(df["quantity"], errors="coerce").fillna(0).to_numpy(np.int32)
+        self.amount[self.size:end] = pd.to_numeric(df["total"], errors="coerce").fillna(0).round().to_numpy(np.int64)
+        self.day[self.size:end] = days
+        # NaT disimpan sebagai int64 terkecil, jadi maximum.at langsung mengabaikannya
+        np.maximum.at(self.last_sale.view(np.int64), codes, sold_at.view(np.int64))
+        self.size = end
+        return n
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        codes, quantity, amount, day = self.columns()
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            np.savez(f, last_id=np.int64(self.last_id), codes=codes, quantity=quantity, amount=amount, day=day,
+                     product_ids=self.product_ids, last_sale=self.last_sale, recent_ids=self.recent_ids)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "SalesFacts":
+        with np.load(path) as data:
+            return cls(last_id=int(data["last_id"]), size=len(data["codes"]), codes=data["codes"], quantity=data["quantity"],
+                       amount=data["amount"], day=data["day"], product_ids=data["product_ids"], last_sale=data["last_sale"],
+                       recent_ids=data["recent_ids"])
+
+
+_facts: dict = {}
+_last_refresh: dict = {}
+# db.dashboard_generation toko saat refresh terakhir dimulai; jika sudah berubah, ada transaksi
+# yang mungkin belum masuk tabel fakta sehingga interval minimum refresh tidak berlaku
+_refreshed_generation: dict = {}
+_store_locks: dict = {}
+_locks_guard = threading.Lock()
+
+
+def _store_lock(store: str) -> threading.Lock:
+    with _locks_guard:
+        return _store_locks.setdefault(store, threading.Lock())
+
+def _path(store: str) -> str:
+    return os.path.join(SALES_FACTS_PATH, hashlib.sha1(store.encode()).hexdigest()[:20] + ".npz")
+
+def _load(store: str) -> SalesFacts:
+    path = _path(store)
+    if os.path.exists(path):
+        try:
+            return SalesFacts.load(path)
+        except Exception as e:
+            logger.warning(f"Fakta penjualan {store} tidak bisa dibaca, dibangun ulang: {e}")
+    return SalesFacts()
+
+def refresh(store: str) -> SalesFacts:
+    """Tambahkan penjualan baru toko ke tabel fakta (memuat file/membangun saat pertama kali)."""
+    with _store_lock(store):
+        generation = dashboard_generation(store)
+        facts = _facts.get(store) or _load(store)
+        start_id, added = facts.last_id, 0
+        cursor = max(0, facts.last_id - FACTS_REREAD_WINDOW)
+        while True:
+            page = get_client().table("sale").select(FACT_COLUMNS).eq("store", store).gt("saleid", cursor).order(
+                "saleid"
+            ).limit(FACTS_PAGE_SIZE).execute().data or []
+            added += facts.append(page)
+            if page:
+                cursor = max(r["saleid"] for r in page)
+            if len(page) < FACTS_PAGE_SIZE:
+                break
+        if facts.last_id != start_id or added or store not in _facts:
+            facts.save(_path(store))
+        _facts[store] = facts
+        _last_refresh[store] = time.monotonic()
+        _refreshed_generation[store] = generation
+    if added:
+        logger.info(f"Fakta penjualan {store}: {added} baris baru")
+    return facts
+
+def get_facts(store: str) -> SalesFacts:
+    """Tabel fakta toko, di-refresh paling sering sekali per FACTS_MIN_INTERVAL. Jika refresh
+    lain sedang berjalan, tabel yang sudah ada di memori langsung dipakai, kecuali ada transaksi
+    toko sejak refresh terakhir dimulai (db.dashboard_generation): saat itu refresh ditunggu."""
+    facts = _facts.get(store)
+    last = _last_refresh.get(store)
+    written = _refreshed_generation.get(store) != dashboard_generation(store)
+    if facts is not None and not written and (time.monotonic() - last < FACTS_MIN_INTERVAL or _store_lock(store).locked()):
+        return facts
+    return refresh(store)
+
+def reset(store: str):
+    """Hapus tabel fakta toko (mis. setelah toko dihapus); dibangun ulang saat dibaca berikutnya."""
+    with _store_lock(store):
+        _facts.pop(store, None)
+        _last_refresh.pop(store, None)
+        _refreshed_generation.pop(store, None)
+        if os.path.exists(_path(store)):
+            os.remove(_path(store))
+
+
+# Perhitungan per produk. Rentang: start inklusif, end eksklusif, teks YYYY-MM-DD.
+
+def product_totals(facts: SalesFacts, start_date: str, end_date: str) -> tuple:
+    """(jumlah terjual, pendapatan) per kode produk dalam rentang."""
+    codes, quantity, amount, day = facts.columns()
+    mask = (day >= np.datetime64(start_date, "D")) & (day < np.datetime64(end_date, "D"))
+    n = facts.product_count
+    sold = np.bincount(codes[mask], weights=quantity[mask], minlength=n).astype(np.int64)
+    revenue = np.bincount(codes[mask], weights=amount[mask], minlength=n)
+    return sold, revenue
+
+def rank(primary: np.ndarray, secondary: np.ndarray, candidates: np.ndarray, n: int, largest: bool = True) -> np.ndarray:
+    """n kandidat dengan primary (lalu secondary) terbesar/terkecil, sudah berurutan.
+    argpartition memilih batas nilai ke-n; semua kandidat yang seri di batas itu ikut diurutkan
+    agar urutan seri mengikuti secondary, bukan urutan acak partisi."""
+    if n <= 0 or not len(candidates):
+        return candidates[:0]
+    sign = -1 if largest else 1
+    keys = sign * primary[candidates]
+    if n < len(candidates):
+        threshold = keys[np.argpartition(keys, n - 1)[n - 1]]
+        candidates, keys = candidates[keys <= threshold], keys[keys <= threshold]
+    order = np.lexsort((candidates, sign * secondary[candidates], keys))
+    return candidates[order[:n]]
+
+def _catalog(store: str, facts: SalesFacts) -> tuple:
+    """(produk katalog, kode fakta tiap produk atau -1 jika belum pernah terjual, total stok tiap produk)."""
+    products = fetch_reference("product", store, PRODUCT_COLUMNS, order="productname")
+    stock = stock_matrix(store)
+    totals = np.fromiter((stock.total(p["productid"]) for p in products), np.int64, len(products))
+    return products, facts.codes_of([p["productid"] for p in products]), totals
+
+def sell_through(sold: int, stock: int) -> float:
+    """Persentase unit terjual dari unit yang tersedia (terjual + sisa stok)."""
+    available = sold + max(stock, 0)
+    return sold / available * 100 if available else 0.0
+
+def top_selling_products(store: str, start_date: str, end_date: str, limit_count: int = 10) -> list:
+    """Seperti get_top_selling_products, ditambah sell_through (%) terhadap stok saat ini."""
+    facts = get_facts(store)
+    sold, revenue = product_totals(facts, start_date, end_date)
+    top = rank(sold, revenue, np.flatnonzero(sold > 0), int(limit_count))
+    products = {p["productid"]: p for p in fetch_reference("product", store, PRODUCT_COLUMNS, order="productname")}
+    stock = stock_matrix(store)
+    rows = []
+    for code in top:
+        product_id = int(facts.product_ids[code])
+        product = products.get(product_id, {})
+        rows.append({
+            "product_name": product.get("productname", f"Produk #{product_id}"),
+            "total_quantity_sold": int(sold[code]),
+            "total_revenue": float(revenue[code]),
+            "sell_through": sell_through(int(sold[code]), stock.total(product_id)),
+        })
+    return rows
+
+def bottom_selling_products(store: str, start_date: str, end_date: str, limit_count: int = 10) -> list:
+    """Produk yang masih ada stoknya dengan penjualan paling sedikit dalam rentang (termasuk
+    yang tidak terjual sama sekali), dari jumlah terjual lalu pendapatan terkecil."""
+    facts = get_facts(store)
+    sold, revenue = product_totals(facts, start_date, end_date)
+    products, codes, totals = _catalog(store, facts)
+    in_stock = np.flatnonzero(totals > 0)
+    # Produk yang belum pernah terjual mendapat 0 (indeks -1 diarahkan ke nilai 0 tambahan)
+    catalog_sold = np.append(sold, 0)[codes]
+    catalog_revenue = np.append(revenue, 0)[codes]
+    return [
+        {"product_name": products[i]["productname"], "total_quantity_sold": int(catalog_sold[i]),
+         "total_revenue": float(catalog_revenue[i]), "total_stock": int(totals[i]),
+         "sell_through": sell_through(int(catalog_sold[i]), int(totals[i]))}
+        for i in rank(catalog_sold, catalog_revenue, in_stock, int(limit_count), largest=False)
+    ]
+
+def slow_moving_products(store: str, days_threshold: int = 60, now: Optional[datetime.datetime] = None) -> list:
+    """Seperti get_slow_moving_products: produk berstok yang belum pernah terjual atau terakhir
+    terjual sebelum batas (sekarang - days_threshold hari), ditambah days_since_last_sale."""
+    facts = get_facts(store)
+    now = np.datetime64(now or datetime.datetime.now(), "s")
+    products, codes, totals = _catalog(store, facts)
+    last_sale = np.append(facts.last_sale, NO_SALE)[codes]
+    stocked = totals > 0
+    slow = np.flatnonzero(stocked & (np.isnat(last_sale) | (last_sale < now - np.timedelta64(int(days_threshold), "D"))))
+    # Seperti ORDER BY last_sale_date di SQLite: yang belum pernah terjual (NaT) lebih dulu
+    slow = slow[np.lexsort((last_sale[slow], ~np.isnat(last_sale[slow])))]
+    return [
+        {"product_name": products[i]["productname"],
+         "last_sale_date": None if np.isnat(last_sale[i]) else str(last_sale[i]),
+         "total_stock": int(totals[i]),
+         "days_since_last_sale": None if np.isnat(last_sale[i]) else int((now - last_sale[i]) // np.timedelta64(1, "D"))}
+        for i in slow
+    ]
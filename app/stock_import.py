@@ -0,0 +1,554 @@
+# app/stock_import.py
+# Impor produk bertahap untuk halaman Impor Produk. File (xlsx, CSV atau Parquet) dibaca per
+# chunk tanpa memuat seluruh isi file, setiap chunk dibersihkan dengan operasi kolom pandas
+# lalu dikirim sebagai satu panggilan bulk_import_smart. Chunk yang sudah masuk dicatat di ledger lokal
+# (SQLite) sehingga impor yang terputus bisa dilanjutkan tanpa mengirim ulang chunk tersebut.
+import csv
+import datetime
+import hashlib
+import io
+import json
+import logging
+import os
+import re
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.db import get_client, invalidate_after_rpc
+from app.outbox import is_permanent_error
+from app.utils.validators import validate_price_series, validate_product_name_series, validate_quantity_series
+
+logger = logging.getLogger(__name__)
+
+IMPORT_LEDGER_PATH = os.getenv("IMPORT_LEDGER_PATH", os.path.join("data", "imports.db"))
+IMPORT_CHUNK_SIZE = 500
+# Validasi memakai batch lebih besar agar overhead per batch pandas tidak dominan
+SCAN_CHUNK_SIZE = 20_000
+PREVIEW_ROWS = 100
+
+# Kolom file impor; hanya Nama Produk yang wajib ada
+REQUIRED_COLUMNS = ("Nama Produk",)
+NUMERIC_COLUMNS = ("Jumlah", "Harga Beli")
+TEXT_COLUMNS = ("Gudang", "Supplier", "Jenis", "Ukuran", "Warna", "Merek", "Deskripsi")
+IMPORT_COLUMNS = REQUIRED_COLUMNS + NUMERIC_COLUMNS + TEXT_COLUMNS
+# Header lain yang diterima untuk setiap kolom (mis. ekspor ERP). Dicocokkan tanpa beda huruf
+# besar/kecil, spasi ganda dan garis bawah; kolom yang tidak dikenal tidak dibaca.
+COLUMN_ALIASES = {
+    "Nama Produk": ("nama", "nama barang", "product name", "productname", "product"),
+    "Jumlah": ("qty", "quantity", "kuantitas", "stok"),
+    "Harga Beli": ("harga", "price", "purchase price", "cost", "harga pokok"),
+    "Gudang": ("warehouse", "lokasi"),
+    "Supplier": ("pemasok", "vendor", "suppliername"),
+    "Jenis": ("type", "kategori", "category"),
+    "Ukuran": ("size",),
+    "Warna": ("color", "colour"),
+    "Merek": ("merk", "brand"),
+    "Deskripsi": ("keterangan", "description"),
+}
+# Nomor baris di file asli (Excel/CSV: header = baris 1; Parquet: urutan baris data),
+# dipakai untuk pesan error
+ROW_COLUMN = "Baris"
+IMPORT_FILE_TYPES = ("xlsx", "csv", "parquet")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS import_job (
+    job_id TEXT PRIMARY KEY,
+    store TEXT NOT NULL,
+    file_name TEXT,
+    chunk_size INTEGER NOT NULL,
+    import_date TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'running',
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS import_chunk (
+    job_id TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    row_count INTEGER NOT NULL,
+    import_date TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    updated_at TEXT NOT NULL,
+    PRIMARY KEY (job_id, chunk_index)
+);
+"""
+
+RUNNING, SENT, DONE = "running", "sent", "done"
+
+
+def _connect() -> sqlite3.Connection:
+    if IMPORT_LEDGER_PATH != ":memory:":
+        os.makedirs(os.path.dirname(IMPORT_LEDGER_PATH) or ".", exist_ok=True)
+    conn = sqlite3.connect(IMPORT_LEDGER_PATH, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = FULL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+def _now() -> str:
+    return datetime.datetime.now().isoformat()
+
+
+# Membaca file. Setiap reader menghasilkan DataFrame per `chunk_size` baris berisi kolom
+# IMPORT_COLUMNS yang ada di file (sudah dinamai ulang lewat map_columns) dan ROW_COLUMN.
+# Baris yang seluruh kolom impornya kosong dilewati.
+
+def _header_key(name) -> str:
+    return re.sub(r"[\s_]+", " ", str(name)).strip().lower()
+
+_HEADER_LOOKUP = {
+    _header_key(alias): column
+    for column, aliases in COLUMN_ALIASES.items()
+    for alias in (column, *aliases)
+}
+
+def map_columns(headers) -> dict:
+    """{header di file: kolom impor} untuk header yang dikenal; header pertama yang cocok dipakai."""
+    mapping = {}
+    for header in headers:
+        column = _HEADER_LOOKUP.get(_header_key(header)) if header is not None else None
+        if column and column not in mapping.values():
+            mapping[header] = column
+    return mapping
+
+def _drop_blank(df: pd.DataFrame) -> pd.DataFrame:
+    columns = [c for c in df.columns if c != ROW_COLUMN]
+    filled = df[columns].notna() & (df[columns].astype("string") != "")
+    return df[filled.any(axis=1)]
+
+def iter_excel_chunks(file, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Sheet pertama lewat openpyxl read-only, tanpa memuat seluruh workbook."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        mapping = map_columns(header)
+        positions = [i for i, h in enumerate(header) if h in mapping]
+        columns = [mapping[header[i]] for i in positions]
+        batch, numbers = [], []
+        for number, row in enumerate(rows, start=2):
+            values = tuple(row[i] if i < len(row) else None for i in positions)
+            if all(value is None or value == "" for value in values):
+                continue
+            batch.append(values)
+            numbers.append(number)
+            if len(batch) == chunk_size:
+                yield _frame(batch, numbers, columns)
+                batch, numbers = [], []
+        if batch:
+            yield _frame(batch, numbers, columns)
+    finally:
+        workbook.close()
+
+def _frame(rows: list, numbers: list, columns: list) -> pd.DataFrame:
+    df = pd.DataFrame.from_records(rows, columns=columns)
+    df[ROW_COLUMN] = numbers
+    return df
+
+def _sniff_delimiter(file) -> str:
+    sample = file.read(64 * 1024)
+    file.seek(0)
+    if isinstance(sample, bytes):
+        sample = sample.decode("utf-8-sig", errors="ignore")
+    try:
+        return csv.Sniffer().sniff(sample.split("\n", 1)[0], delimiters=",;\t|").delimiter
+    except csv.Error:
+        return ","
+
+def iter_csv_chunks(file, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """CSV lewat parser C pandas per chunk; hanya kolom yang dikenal yang di-parse.
+
+    Semua nilai dibaca sebagai teks (angka divalidasi/diubah kemudian, sama seperti Excel) dan
+    hanya sel kosong yang dianggap kosong. Pemisah (, ; tab |) ditebak dari baris header.
+    """
+    delimiter = _sniff_delimiter(file)
+    reader = pd.read_csv(
+        file, sep=delimiter, encoding="utf-8-sig", dtype=str, keep_default_na=False, na_values=[""],
+        usecols=lambda header: _header_key(header) in _HEADER_LOOKUP,
+        skip_blank_lines=False, chunksize=chunk_size,
+    )
+    number = 2
+    with reader:
+        for df in reader:
+            mapping = map_columns(df.columns)
+            df = df[list(mapping)].rename(columns=mapping)
+            df[ROW_COLUMN] = range(number, number + len(df))
+            number += len(df)
+            df = _drop_blank(df)
+            if len(df):
+                yield df.reset_index(drop=True)
+
+def iter_parquet_chunks(file, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Parquet per record batch; hanya kolom yang dikenal yang dibaca dari file (projection)."""
+    import pyarrow.parquet as pq
+
+    parquet = pq.ParquetFile(file)
+    mapping = map_columns(parquet.schema_arrow.names)
+    if not mapping:
+        yield pd.DataFrame({ROW_COLUMN: []})
+        return
+    number = 1
+    for batch in parquet.iter_batches(batch_size=chunk_size, columns=list(mapping)):
+        df = batch.to_pandas().rename(columns=mapping)
+        df[ROW_COLUMN] = range(number, number + len(df))
+        number += len(df)
+        df = _drop_blank(df)
+        if len(df):
+            yield df.reset_index(drop=True)
+
+READERS = {
+    "xlsx": iter_excel_chunks,
+    "csv": iter_csv_chunks,
+    "parquet": iter_parquet_chunks,
+}
+
+def iter_file_chunks(file, file_name: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """Pilih reader dari ekstensi file (lihat IMPORT_FILE_TYPES)."""
+    extension = os.path.splitext(file_name)[1].lstrip(".").lower()
+    if extension not in READERS:
+        raise ValueError(f"Format file .{extension} tidak didukung. Gunakan {', '.join(IMPORT_FILE_TYPES)}.")
+    return READERS[extension](file, chunk_size)
+
+def missing_columns(columns) -> list:
+    return [column for column in REQUIRED_COLUMNS if column not in columns]
+
+
+# Membersihkan chunk (seluruh kolom sekaligus)
+
+def clean_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """Lengkapi kolom opsional, buang baris tanpa nama produk, ubah angka dan rapikan teks."""
+    df = df.copy()
+    for column in NUMERIC_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors="coerce").fillna(0) if column in df else 0
+    df["Jumlah"] = df["Jumlah"].astype(int)
+    for column in ("Nama Produk",) + TEXT_COLUMNS:
+        text = df[column].astype("string").str.strip() if column in df else pd.Series("", index=df.index, dtype="string")
+        df[column] = text.fillna("")
+    return df[df["Nama Produk"] != ""]
+
+def chunk_products(df: pd.DataFrame) -> list:
+    """Chunk yang sudah dibersihkan menjadi daftar produk untuk p_products bulk_import_smart."""
+    def optional(column):
+        return df[column].astype(object).where(df[column] != "", None)
+
+    products = pd.DataFrame({
+        "productname": df["Nama Produk"].astype(object),
+        "type": df["Jenis"].astype(object).where(df["Jenis"] != "", "Umum"),
+        "size": optional("Ukuran"),
+        "color": optional("Warna"),
+        "brand": optional("Merek"),
+        "harga": df["Harga Beli"].astype(float),
+        "quantity": df["Jumlah"].astype(int),
+        "description": optional("Deskripsi"),
+    })
+    return products.to_dict("records")
+
+
+# Validasi per chunk (seluruh kolom sekaligus)
+
+ERROR, WARNING = "Error", "Peringatan"
+REPORT_COLUMNS = [ROW_COLUMN, "Kolom", "Nilai", "Pesan", "Tingkat"]
+
+def _text(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df:
+        return pd.Series("", index=df.index, dtype="string")
+    return df[column].astype("string").str.strip().fillna("")
+
+def _names(values) -> set:
+    return {str(name).strip().lower() for name in values if name}
+
+def _in_set(values: pd.Series, names: set) -> pd.Series:
+    """Seperti values.isin(names), tetapi hanya nilai unik yang dicek ke set (hash, O(1))."""
+    codes, uniques = pd.factorize(values)
+    found = np.fromiter((value in names for value in uniques), dtype=bool, count=len(uniques))
+    return pd.Series(found[codes], index=values.index)
+
+class ImportValidator:
+    """Memeriksa chunk mentah dan mengembalikan baris laporan (REPORT_COLUMNS).
+
+    Nama gudang dan supplier dicocokkan lewat set huruf kecil (isin), jadi biayanya tidak
+    bergantung pada jumlah gudang/supplier. Nama produk yang sudah muncul di chunk sebelumnya
+    diingat untuk mendeteksi duplikat di seluruh file.
+    """
+
+    def __init__(self, warehouse_names, supplier_names, has_default_supplier: bool):
+        self.warehouses = _names(warehouse_names)
+        self.suppliers = _names(supplier_names)
+        self.has_default_supplier = has_default_supplier
+        self.seen_products = set()
+
+    def validate(self, raw: pd.DataFrame) -> pd.DataFrame:
+        issues = []
+
+        def add(column, messages, level=ERROR):
+            bad = messages != ""
+            if bad.any():
+                issues.append(pd.DataFrame({
+                    ROW_COLUMN: raw.loc[bad, ROW_COLUMN],
+                    "Kolom": column,
+                    "Nilai": _text(raw, column)[bad],
+                    "Pesan": messages[bad],
+                    "Tingkat": level,
+                }))
+
+        def flag(column, mask, message, level=ERROR):
+            add(column, pd.Series(message, index=raw.index, dtype=object).where(mask, ""), level)
+
+        names = _text(raw, "Nama Produk")
+        add("Nama Produk", validate_product_name_series(names))
+        keys = names.str.lower()
+        repeated = (keys != "") & (keys.duplicated() | _in_set(keys, self.seen_products))
+        flag("Nama Produk", repeated, "Nama produk muncul lebih dari sekali di file.", WARNING)
+        self.seen_products.update(keys[keys != ""])
+
+        # Kosong berarti 0 (hanya daftar produk / tanpa harga); teks lain harus angka
+        quantity_text, price_text = _text(raw, "Jumlah"), _text(raw, "Harga Beli")
+        quantity = raw["Jumlah"].where(quantity_text != "", 0) if "Jumlah" in raw else quantity_text.replace("", "0")
+        price = raw["Harga Beli"].where(price_text != "", 0) if "Harga Beli" in raw else price_text.replace("", "0")
+        add("Jumlah", validate_quantity_series(quantity, minimum=0))
+        purchased = pd.to_numeric(quantity, errors="coerce").fillna(0) > 0
+        add("Harga Beli", validate_price_series(price).where(purchased, validate_price_series(price, minimum=0)))
+
+        warehouse = _text(raw, "Gudang")
+        flag("Gudang", (warehouse != "") & ~_in_set(warehouse.str.lower(), self.warehouses), "Gudang tidak terdaftar.")
+
+        supplier = _text(raw, "Supplier")
+        if not self.has_default_supplier:
+            flag("Supplier", purchased & (supplier == ""),
+                 "Supplier wajib diisi untuk jumlah > 0 (atau pilih Supplier Default).")
+        flag("Supplier", (supplier != "") & ~_in_set(supplier.str.lower(), self.suppliers), "Supplier belum terdaftar.", WARNING)
+
+        if not issues:
+            return pd.DataFrame(columns=REPORT_COLUMNS)
+        return pd.concat(issues)[REPORT_COLUMNS]
+
+
+# Ringkasan sebelum impor
+
+@dataclass
+class ImportScan:
+    columns: list = field(default_factory=list)
+    total_rows: int = 0
+    register_only: int = 0
+    with_purchase: int = 0
+    total_value: float = 0.0
+    file_rows: int = 0
+    preview: Optional[pd.DataFrame] = None
+    report: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=REPORT_COLUMNS))
+
+    @property
+    def missing_columns(self) -> list:
+        return missing_columns(self.columns)
+
+    @property
+    def chunk_count(self) -> int:
+        """Jumlah chunk impor (IMPORT_CHUNK_SIZE baris file) yang akan dikirim."""
+        return -(-self.file_rows // IMPORT_CHUNK_SIZE)
+
+    @property
+    def errors(self) -> pd.DataFrame:
+        return self.report[self.report["Tingkat"] == ERROR]
+
+    @property
+    def warnings(self) -> pd.DataFrame:
+        return self.report[self.report["Tingkat"] == WARNING]
+
+def scan(chunks, validator: ImportValidator) -> ImportScan:
+    """Satu kali baca seluruh file: validasi dan hitung ringkasan, tanpa menyimpan semua baris."""
+    result = ImportScan()
+    previews, reports = [], []
+    for raw in chunks:
+        result.file_rows += len(raw)
+        if not result.columns:
+            result.columns = [c for c in raw.columns if c != ROW_COLUMN]
+            if result.missing_columns:
+                return result
+        report = validator.validate(raw)
+        if len(report):
+            reports.append(report)
+        df = clean_chunk(raw)
+        result.total_rows += len(df)
+        result.register_only += int((df["Jumlah"] == 0).sum())
+        purchases = df[df["Jumlah"] > 0]
+        result.with_purchase += len(purchases)
+        result.total_value += float((purchases["Jumlah"] * purchases["Harga Beli"]).sum())
+        if sum(len(p) for p in previews) < PREVIEW_ROWS:
+            previews.append(df.head(PREVIEW_ROWS))
+    if previews:
+        result.preview = pd.concat(previews).head(PREVIEW_ROWS)
+    if reports:
+        result.report = pd.concat(reports, ignore_index=True).sort_values(ROW_COLUMN, kind="stable", ignore_index=True)
+    return result
+
+def report_file(report: pd.DataFrame, fmt: str = "xlsx") -> bytes:
+    """Laporan validasi untuk diunduh (xlsx atau csv)."""
+    if fmt == "csv":
+        # BOM agar Excel membaca UTF-8 dengan benar
+        return report.to_csv(index=False).encode("utf-8-sig")
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine="openpyxl") as writer:
+        report.to_excel(writer, index=False, sheet_name="Laporan Validasi")
+    return output.getvalue()
+
+
+# Job impor dan ledger chunk
+
+def job_id_for(file_bytes: bytes, store: str, settings: dict, chunk_size: int = IMPORT_CHUNK_SIZE) -> str:
+    """ID job yang sama untuk file, toko dan pengaturan yang sama -> impor bisa dilanjutkan."""
+    digest = hashlib.sha256(file_bytes)
+    digest.update(json.dumps([store, settings, chunk_size], sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:24]
+
+@dataclass
+class ImportJob:
+    job_id: str
+    store: str
+    chunk_size: int
+    import_date: str
+    status: str
+    done_chunks: int = 0
+    done_rows: int = 0
+
+def get_job(job_id: str) -> Optional[ImportJob]:
+    conn = _connect()
+    try:
+        row = conn.execute("SELECT * FROM import_job WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        done = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(row_count), 0) FROM import_chunk WHERE job_id = ? AND status = ?", (job_id, DONE)
+        ).fetchone()
+        return ImportJob(row["job_id"], row["store"], row["chunk_size"], row["import_date"], row["status"], done[0], done[1])
+    finally:
+        conn.close()
+
+def start_job(job_id: str, store: str, file_name: str, chunk_size: int = IMPORT_CHUNK_SIZE) -> ImportJob:
+    """Buat job baru, atau kembalikan job yang sudah ada agar chunk yang sudah masuk dilewati."""
+    job = get_job(job_id)
+    if job is not None:
+        return job
+    conn = _connect()
+    try:
+        now = _now()
+        conn.execute(
+            "INSERT INTO import_job (job_id, store, file_name, chunk_size, import_date, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, store, file_name, chunk_size, now, now, now),
+        )
+    finally:
+        conn.close()
+    return get_job(job_id)
+
+def discard_job(job_id: str):
+    """Lupakan job (mis. untuk mengimpor ulang file yang sama sebagai impor baru)."""
+    conn = _connect()
+    try:
+        conn.execute("DELETE FROM import_chunk WHERE job_id = ?", (job_id,))
+        conn.execute("DELETE FROM import_job WHERE job_id = ?", (job_id,))
+    finally:
+        conn.close()
+
+def _chunk_state(conn, job_id: str, index: int) -> Optional[sqlite3.Row]:
+    return conn.execute("SELECT * FROM import_chunk WHERE job_id = ? AND chunk_index = ?", (job_id, index)).fetchone()
+
+def _set_chunk(conn, job_id: str, index: int, rows: int, import_date: str, status: str, result=None):
+    conn.execute(
+        "INSERT INTO import_chunk (job_id, chunk_index, row_count, import_date, status, result, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (job_id, chunk_index) DO UPDATE SET "
+        "row_count = excluded.row_count, status = excluded.status, result = excluded.result, updated_at = excluded.updated_at",
+        (job_id, index, rows, import_date, status, json.dumps(result, default=str) if result is not None else None, _now()),
+    )
+
+def _chunk_date(job: ImportJob, index: int) -> str:
+    # Tanggal impor unik per chunk: penanda chunk di tabel purchase untuk cek idempotensi
+    base = datetime.datetime.fromisoformat(job.import_date)
+    return (base + datetime.timedelta(microseconds=index)).isoformat()
+
+def chunk_applied(store: str, import_date: str, created_by: str) -> bool:
+    """Apakah chunk dengan tanggal impor ini sudah tercatat sebagai pembelian di server?"""
+    response = get_client().table("purchase").select("purchaseid").eq("store", store).eq(
+        "purchase_date", import_date
+    ).eq("created_by", created_by).limit(1).execute()
+    return bool(response.data)
+
+
+class ImportInterrupted(Exception):
+    """Impor berhenti di tengah; chunk sebelumnya sudah tersimpan dan bisa dilanjutkan."""
+
+    def __init__(self, chunk_index: int, error: Exception, permanent: bool):
+        super().__init__(f"Chunk {chunk_index + 1} gagal: {error}")
+        self.chunk_index = chunk_index
+        self.error = error
+        self.permanent = permanent
+
+@dataclass
+class ImportProgress:
+    chunk_index: int
+    rows_done: int
+    skipped_chunks: int = 0
+    new_count: int = 0
+    existing_count: int = 0
+
+
+def run_import(job: ImportJob, chunks, params: dict, created_by: str,
+               on_progress: Optional[Callable[[ImportProgress], None]] = None) -> ImportProgress:
+    """Kirim chunk berurutan ke bulk_import_smart. Chunk yang sudah DONE dilewati; chunk SENT
+    (hasil kiriman sebelumnya tidak diketahui) dicek dulu ke server sebelum dikirim ulang.
+
+    params berisi parameter RPC selain p_products, p_import_date dan p_payment_amount.
+    """
+    progress = ImportProgress(chunk_index=-1, rows_done=0)
+    conn = _connect()
+    try:
+        for index, raw in enumerate(chunks):
+            df = clean_chunk(raw)
+            progress.chunk_index = index
+            state = _chunk_state(conn, job.job_id, index)
+            import_date = state["import_date"] if state else _chunk_date(job, index)
+            has_purchase = bool((df["Jumlah"] > 0).any())
+
+            if state is not None and state["status"] == DONE:
+                progress.skipped_chunks += 1
+            elif state is not None and has_purchase and chunk_applied(job.store, import_date, created_by):
+                # Kiriman sebelumnya sudah sampai walaupun jawabannya tidak diterima
+                _set_chunk(conn, job.job_id, index, len(df), import_date, DONE)
+                progress.skipped_chunks += 1
+            elif len(df):
+                products = chunk_products(df)
+                total = sum(p["harga"] * p["quantity"] for p in products)
+                chunk_params = dict(params, p_products=json.dumps(products), p_import_date=import_date,
+                                    p_payment_amount=total if params.get("p_payment_type") == "cash" else None)
+                _set_chunk(conn, job.job_id, index, len(df), import_date, SENT)
+                try:
+                    response = get_client().rpc("bulk_import_smart", chunk_params).execute()
+                except Exception as e:
+                    permanent = is_permanent_error(e)
+                    if permanent:
+                        # Ditolak server (transaksi dibatalkan): chunk aman dikirim ulang setelah diperbaiki
+                        conn.execute("DELETE FROM import_chunk WHERE job_id = ? AND chunk_index = ?", (job.job_id, index))
+                    logger.warning(f"Impor {job.job_id} chunk {index} gagal: {e}")
+                    raise ImportInterrupted(index, e, permanent) from e
+                finally:
+                    invalidate_after_rpc("bulk_import_smart", job.store, chunk_params)
+                result = response.data[0] if isinstance(response.data, list) and response.data else response.data
+                _set_chunk(conn, job.job_id, index, len(df), import_date, DONE, result)
+                if isinstance(result, dict):
+                    progress.new_count += result.get("new_count", 0)
+                    progress.existing_count += result.get("existing_count", 0)
+            progress.rows_done += len(df)
+            if on_progress:
+                on_progress(progress)
+
+        conn.execute("UPDATE import_job SET status = ?, updated_at = ? WHERE job_id = ?", (DONE, _now(), job.job_id))
+    finally:
+        conn.close()
+    return progress
@@ -1,19 +1,33 @@
 # app/utils/__init__.py
-from .validators import VALIDATORS, validate_product_name, validate_price, validate_quantity
-from .formatters import FORMATTERS, format_currency, format_datetime, format_indonesian_date
+from .validators import (
+    VALIDATORS, SERIES_VALIDATORS, validate_product_name, validate_price, validate_quantity,
+    validate_product_name_series, validate_price_series, validate_quantity_series, validate_phone_number_series,
+)
+from .formatters import (
+    FORMATTERS, format_currency, format_datetime, format_indonesian_date,
+    format_currency_series, format_datetime_series, format_indonesian_date_series,
+)
 from .error_handlers import ErrorHandler, handle_api_error, safe_api_call
 from .logger import app_logger, transaction_logger, auth_logger, error_logger
 
 __all__ = [
     'VALIDATORS',
+    'SERIES_VALIDATORS',
     'FORMATTERS',
     'ErrorHandler',
     'validate_product_name',
     'validate_price',
     'validate_quantity',
+    'validate_product_name_series',
+    'validate_price_series',
+    'validate_quantity_series',
+    'validate_phone_number_series',
     'format_currency',
     'format_datetime',
     'format_indonesian_date',
+    'format_currency_series',
+    'format_datetime_series',
+    'format_indonesian_date_series',
     'handle_api_error',
     'safe_api_call',
     'app_logger',
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+# Grafik garis di browser tidak perlu lebih banyak titik daripada lebar plotnya. Seri yang
+# panjang diperkecil dengan Largest-Triangle-Three-Buckets (LTTB): titik pertama dan terakhir
+# dipertahankan, lalu dari setiap bucket dipilih titik yang membentuk segitiga terbesar dengan
+# titik terpilih sebelumnya dan rata-rata bucket berikutnya, sehingga puncak dan lembah tetap ada.
+MAX_CHART_POINTS = 500
+
+
+def lttb_indices(x, y, threshold: int) -> np.ndarray:
+    """Indeks titik yang dipertahankan (berurutan) saat seri (x, y) diperkecil ke threshold titik."""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+
+    every = (n - 2) / (threshold - 2)
+    edges = (np.arange(threshold - 1) * every).astype(np.int64) + 1
+    edges[-1] = n - 1
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+
+    a = 0
+    for i in range(threshold - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x, avg_y = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def downsample(df: pd.DataFrame, y: str, max_points: int = MAX_CHART_POINTS) -> pd.DataFrame:
+    """Baris df (berurutan menurut index waktu/angka) yang dipilih LTTB atas kolom y. Kolom lain
+    ikut diambil pada baris yang sama, jadi beberapa seri tetap sejajar di grafik."""
+    if len(df) <= max_points:
+        return df
+    x = df.index.to_numpy()
+    if np.issubdtype(x.dtype, np.datetime64):
+        x = x.astype("datetime64[s]").astype(np.int64)
+    elif not np.issubdtype(x.dtype, np.number):
+        x = np.arange(len(df))
+    return df.iloc[lttb_indices(x, df[y].to_numpy(), max_points)]
@@ -1,6 +1,11 @@
 from datetime import datetime, date
 from typing import Union
 
+MONTHS_ID = (
+    "Januari", "Februari", "Maret", "April", "Mei", "Juni",
+    "Juli", "Agustus", "September", "Oktober", "November", "Desember"
+)
+
 def format_currency(value: float, prefix: str = "Rp ") -> str:
     try:
         return f"{prefix}{value:,.2f}"
@@ -66,11 +71,6 @@ def format_percentage(value: float, decimal: int = 2) -> str:
         return "0.00%"
 
 def format_indonesian_date(d: Union[date, str]) -> str:
-    months_id = [
-        "Januari", "Februari", "Maret", "April", "Mei", "Juni",
-        "Juli", "Agustus", "September", "Oktober", "November", "Desember"
-    ]
-    
     if isinstance(d, str):
         try:
             d = datetime.fromisoformat(d).date()
@@ -80,7 +80,7 @@ def format_indonesian_date(d: Union[date, str]) -> str:
     try:
         if isinstance(d, datetime):
             d = d.date()
-        month_name = months_id[d.month - 1]
+        month_name = MONTHS_ID[d.month - 1]
         return f"{d.day} {month_name} {d.year}"
     except:
         return str(d)
@@ -120,6 +120,77 @@ def shorten_text(text: str, max_length: int = 50, suffix: str = "...") -> str:
         return text[:max_length - len(suffix)] + suffix
     return text
 
+# Versi Series dari formatter di atas. Satu panggilan memformat seluruh kolom dengan operasi
+# pandas (.str/.dt, tanpa fungsi Python per baris), dan hanya sekali untuk setiap nilai unik:
+# harga dan tanggal di riwayat banyak berulang. pandas/numpy di-import saat dipakai agar modul
+# ini tetap ringan untuk halaman login.
+
+# Offset zona waktu setelah jam pada timestamp ISO; dibuang agar jam yang tampil sama dengan
+# jam yang tersimpan (seperti format_datetime), juga ketika offset antar baris berbeda
+_TZ_SUFFIX = r"(?<=\d{2}:\d{2})(?::\d{2}(?:\.\d+)?)?(?:Z|[+-]\d{2}(?::?\d{2})?)$"
+# Posisi pemisah ribuan dalam teks bilangan bulat
+_THOUSANDS = r"\B(?=(?:\d{3})+$)"
+
+def _as_series(values):
+    import pandas as pd
+    return values if isinstance(values, pd.Series) else pd.Series(values)
+
+def _by_unique(values, format_unique, na: str):
+    """Format Series nilai unik dengan `format_unique` lalu sebarkan ke semua baris. NaN/NaT menjadi `na`."""
+    import numpy as np
+    import pandas as pd
+    codes, uniques = pd.factorize(values)
+    labels = np.empty(len(uniques) + 1, dtype=object)
+    labels[:-1] = format_unique(pd.Series(uniques)).to_numpy(dtype=object) if len(uniques) else []
+    labels[-1] = na
+    return pd.Series(labels[codes], index=values.index, dtype=object)
+
+def parse_datetime_series(values):
+    """Kolom teks ISO (atau datetime) menjadi datetime64 tanpa zona waktu. Teks yang tidak valid menjadi NaT."""
+    import pandas as pd
+    values = _as_series(values)
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        try:
+            values = pd.to_datetime(values, format="ISO8601", errors="coerce")
+        except ValueError:
+            # Offset berbeda antar baris: pakai jam setempat masing-masing baris
+            text = values.astype("string").str.replace(_TZ_SUFFIX, "", regex=True)
+            values = pd.to_datetime(text, format="ISO8601", errors="coerce")
+    return values.dt.tz_localize(None) if values.dt.tz is not None else values
+
+def _currency_text(numbers, prefix: str, decimals: int):
+    import numpy as np
+    scaled = (numbers.abs() * 10 ** decimals).round().astype("int64")
+    text = (scaled // 10 ** decimals).astype(str).str.replace(_THOUSANDS, ",", regex=True)
+    if decimals:
+        text = text + "." + (scaled % 10 ** decimals).astype(str).str.zfill(decimals)
+    return prefix + text.mask(np.signbit(numbers), "-" + text)
+
+def format_currency_series(values, prefix: str = "Rp ", decimals: int = 2, na: str = "-"):
+    """Seperti format_currency untuk satu kolom (f"{prefix}{x:,.{decimals}f}"). NaN/None menjadi `na`.
+    Dengan decimals=0 hasilnya identik (-0.0 tampil sebagai 0); dengan desimal, nilai yang dalam float tepat di tengah
+    (mis. 1.115) bisa berbeda satu pada digit terakhir karena dibulatkan setelah dikali 10**decimals."""
+    import pandas as pd
+    numbers = pd.to_numeric(_as_series(values), errors="coerce").astype(float)
+    return _by_unique(numbers, lambda u: _currency_text(u, prefix, decimals), na)
+
+def format_datetime_series(values, format: str = "%d/%m/%Y %H:%M", na: str = "-"):
+    """Seperti format_datetime untuk satu kolom. NaT/teks tidak valid menjadi `na`."""
+    return _by_unique(parse_datetime_series(values), lambda u: u.dt.strftime(format), na)
+
+def format_date_series(values, format: str = "%d/%m/%Y", na: str = "-"):
+    return format_datetime_series(values, format, na)
+
+def _indonesian_date_text(dates):
+    import pandas as pd
+    months = pd.Series(MONTHS_ID, index=range(1, 13))
+    return dates.dt.day.astype(str) + " " + months[dates.dt.month].to_numpy() + " " + dates.dt.year.astype(str)
+
+def format_indonesian_date_series(values, na: str = "-"):
+    """Seperti format_indonesian_date ("1 Januari 2024") untuk satu kolom."""
+    # Jam diabaikan sehingga setiap hari cukup diformat sekali
+    return _by_unique(parse_datetime_series(values).dt.normalize(), _indonesian_date_text, na)
+
 FORMATTERS = {
     'currency': format_currency,
     'datetime': format_datetime,
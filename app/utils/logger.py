@@ -1,18 +1,30 @@
+import atexit
+import copy
 import logging
 import logging.handlers
 import json
-from datetime import datetime
+import queue
+import threading
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, Optional
 
 LOGS_DIR = Path("logs")
 LOGS_DIR.mkdir(exist_ok=True)
 
+# Semua logger menulis lewat satu antrian; format JSON dan I/O disk dikerjakan thread
+# listener sehingga thread request (mis. checkout) tidak pernah menunggu disk.
+LOG_QUEUE_SIZE = 10000
+# Jumlah record maksimum yang ditulis sebelum flush ke disk
+LOG_BATCH_SIZE = 200
+# Saat antrian penuh, record ERROR ke atas ditunggu sebentar; level lain langsung dibuang
+LOG_BLOCK_TIMEOUT = 0.5
+
 class JSONFormatter(logging.Formatter):
     
     def format(self, record: logging.LogRecord) -> str:
         log_data = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
@@ -23,6 +35,8 @@ class JSONFormatter(logging.Formatter):
 
         if record.exc_info:
             log_data["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            log_data["exception"] = record.exc_text
         
         if hasattr(record, "user"):
             log_data["user"] = record.user
@@ -33,6 +47,142 @@ class JSONFormatter(logging.Formatter):
         
         return json.dumps(log_data, default=str)
 
+class BatchRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler yang menulis sekumpulan record lalu flush sekali."""
+
+    def handle_batch(self, records: list):
+        self.acquire()
+        try:
+            for record in records:
+                try:
+                    msg = self.format(record) + self.terminator
+                    if self.stream is None:
+                        self.stream = self._open()
+                    if self.maxBytes > 0 and self.stream.tell() + len(msg) >= self.maxBytes:
+                        self.doRollover()
+                        if self.stream is None:
+                            self.stream = self._open()
+                    self.stream.write(msg)
+                except Exception:
+                    self.handleError(record)
+            if self.stream is not None:
+                self.stream.flush()
+        finally:
+            self.release()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler dengan antrian terbatas: tidak pernah memblokir untuk record di bawah ERROR.
+
+    `route` adalah nama logger pemilik handler ini. Record dari logger anak (mis. inventory_app.db)
+    sampai ke sini lewat propagasi dengan record.name milik anak, jadi listener memakai route."""
+
+    dropped = 0
+    _dropped_lock = threading.Lock()
+
+    def __init__(self, log_queue: queue.Queue, route: str):
+        super().__init__(log_queue)
+        self.route = route
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Hanya gabungkan msg % args (murah); format JSON dilakukan di listener.
+        # Traceback disimpan di exc_text karena exc_info tidak ikut disalin.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        record.log_route = self.route
+        if record.exc_info:
+            record.exc_text = record.exc_text or _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+            return
+        except queue.Full:
+            pass
+        if record.levelno >= logging.ERROR:
+            try:
+                self.queue.put(record, timeout=LOG_BLOCK_TIMEOUT)
+                return
+            except queue.Full:
+                pass
+        with self._dropped_lock:
+            DroppingQueueHandler.dropped += 1
+
+
+class BatchQueueListener(logging.handlers.QueueListener):
+    """Satu thread untuk semua logger: ambil record per batch dan arahkan ke handler milik
+    logger yang memasukkannya ke antrian (record.log_route, atau record.name jika tidak ada)."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.routes: Dict[str, list] = {}
+        self._reported_dropped = 0
+
+    def enqueue_sentinel(self):
+        # Blokir jika perlu: listener terus mengosongkan antrian sampai sentinel masuk
+        self.queue.put(self._sentinel)
+
+    def _monitor(self):
+        q = self.queue
+        while True:
+            batch = [q.get()]
+            while len(batch) < LOG_BATCH_SIZE:
+                try:
+                    batch.append(q.get_nowait())
+                except queue.Empty:
+                    break
+            stop = any(r is self._sentinel for r in batch)
+            self.handle_batch([r for r in batch if r is not self._sentinel])
+            for _ in batch:
+                q.task_done()
+            if stop:
+                break
+
+    def handle_batch(self, records: list):
+        dropped = DroppingQueueHandler.dropped
+        if dropped > self._reported_dropped:
+            records.append(logging.makeLogRecord({
+                "name": "inventory_app", "levelno": logging.WARNING, "levelname": "WARNING",
+                "msg": f"{dropped - self._reported_dropped} log record dibuang karena antrian log penuh",
+            }))
+            self._reported_dropped = dropped
+
+        by_logger: Dict[str, list] = {}
+        for record in records:
+            by_logger.setdefault(getattr(record, "log_route", record.name), []).append(record)
+        for name, group in by_logger.items():
+            for handler in self.routes.get(name, ()):
+                accepted = [r for r in group if r.levelno >= handler.level and handler.filter(r)]
+                if not accepted:
+                    continue
+                if isinstance(handler, BatchRotatingFileHandler):
+                    handler.handle_batch(accepted)
+                else:
+                    for record in accepted:
+                        handler.handle(record)
+
+
+_exception_formatter = logging.Formatter()
+_log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+_listener = BatchQueueListener(_log_queue)
+_listener.start()
+
+def shutdown_logging():
+    """Tulis semua record yang masih di antrian lalu hentikan listener (dipanggil saat proses keluar)."""
+    global _listener
+    if _listener is None:
+        return
+    _listener.stop()
+    for handlers in _listener.routes.values():
+        for handler in handlers:
+            handler.close()
+    _listener = None
+
+atexit.register(shutdown_logging)
+
 def setup_logger(name: str, log_file: Optional[str] = None, level: int = logging.INFO) -> logging.Logger:
     logger = logging.getLogger(name)
     logger.setLevel(level)
@@ -48,12 +198,12 @@ def setup_logger(name: str, log_file: Optional[str] = None, level: int = logging
         datefmt='%Y-%m-%d %H:%M:%S'
     )
     console_handler.setFormatter(console_formatter)
-    logger.addHandler(console_handler)
+    handlers = [console_handler]
     
     # File handler
     if log_file:
         log_path = LOGS_DIR / log_file
-        file_handler = logging.handlers.RotatingFileHandler(
+        file_handler = BatchRotatingFileHandler(
             log_path,
             maxBytes=10 * 1024 * 1024,  
             backupCount=5, 
@@ -61,7 +211,13 @@ def setup_logger(name: str, log_file: Optional[str] = None, level: int = logging
         )
         file_handler.setLevel(level)
         file_handler.setFormatter(JSONFormatter())
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+
+    # Handler asli dijalankan oleh listener; logger hanya memasukkan record ke antrian
+    _listener.routes[name] = handlers
+    queue_handler = DroppingQueueHandler(_log_queue, route=name)
+    queue_handler.setLevel(level)
+    logger.addHandler(queue_handler)
     
     return logger
 
@@ -70,6 +226,7 @@ app_logger = setup_logger('inventory_app', 'app.log')
 transaction_logger = setup_logger('transactions', 'transactions.log')
 auth_logger = setup_logger('auth', 'auth.log')
 error_logger = setup_logger('errors', 'errors.log', level=logging.ERROR)
+perf_logger = setup_logger('performance', 'performance.log')
 
 # Utility functions
 
@@ -203,6 +360,7 @@ __all__ = [
     'transaction_logger',
     'auth_logger',
     'error_logger',
+    'perf_logger',
     'log_login',
     'log_logout',
     'log_purchase_transaction',
@@ -210,4 +368,5 @@ __all__ = [
     'log_stock_adjustment',
     'log_payment',
     'log_error',
+    'shutdown_logging',
 ]
@@ -0,0 +1,120 @@
+import streamlit as st
+import logging
+from typing import Optional
+
+from app.db import HISTORY_PAGE_SIZE, fetch_history_page
+
+logger = logging.getLogger(__name__)
+
+# State riwayat disimpan di session_state agar halaman yang sudah dimuat tetap ada
+# saat rerun (mis. ketika tombol "Muat Lebih Banyak" ditekan).
+
+def start_history(key: str, rpc_name: str, params: dict, filters=(), page_size: int = HISTORY_PAGE_SIZE) -> dict:
+    """Muat halaman pertama beserta total baris, ganti state riwayat sebelumnya.
+
+    Filter dikirim ke server. Jika server menolaknya, data diambil tanpa filter dan
+    state["filtered"] bernilai False sehingga halaman memfilter sendiri dengan pandas.
+    """
+    filters = tuple(filters)
+    try:
+        page = fetch_history_page(rpc_name, params, page_size=page_size, with_total=True, filters=filters)
+        filtered = True
+    except Exception as e:
+        if not filters:
+            raise
+        logger.warning(f"Filter {rpc_name} tidak bisa dijalankan di server, memakai filter lokal: {e}")
+        page = fetch_history_page(rpc_name, params, page_size=page_size, with_total=True)
+        filtered = False
+    state = {
+        "rpc": rpc_name,
+        "params": dict(params),
+        "filters": filters,
+        "filtered": filtered,
+        "page_size": page_size,
+        "rows": list(page.rows),
+        "cursor": page.cursor,
+        "total": page.total if page.total is not None else len(page.rows),
+    }
+    st.session_state[key] = state
+    return state
+
+def get_history(key: str, params: dict, filters=()) -> Optional[dict]:
+    """State riwayat yang sudah dimuat, atau None jika belum ada / parameter atau filter sudah berubah."""
+    state = st.session_state.get(key)
+    if state is None or state["params"] != params or state["filters"] != tuple(filters):
+        return None
+    return state
+
+def needs_reload(key: str, params: dict, filters=()) -> bool:
+    """True jika riwayat sudah pernah dimuat tetapi tanggal/filter berubah, agar hasil ikut diperbarui."""
+    state = st.session_state.get(key)
+    return state is not None and (state["params"] != params or state["filters"] != tuple(filters))
+
+def load_more(key: str) -> bool:
+    state = st.session_state.get(key)
+    if not state or state["cursor"] is None:
+        return False
+    filters = state["filters"] if state["filtered"] else ()
+    page = fetch_history_page(state["rpc"], state["params"], state["cursor"], state["page_size"], filters=filters)
+    state["rows"].extend(page.rows)
+    state["cursor"] = page.cursor if page.rows else None
+    return bool(page.rows)
+
+def show_load_more(key: str, label: str = "Muat Lebih Banyak"):
+    """Keterangan jumlah baris yang dimuat dan tombol untuk halaman berikutnya."""
+    state = st.session_state.get(key)
+    if not state:
+        return
+    loaded, total = len(state["rows"]), state["total"]
+    st.caption(f"Menampilkan {loaded:,} dari {total:,} data.")
+    if state["cursor"] is not None and loaded < total:
+        if st.button(f"{label} ({min(state['page_size'], total - loaded):,} berikutnya)", key=f"{key}_load_more"):
+            load_more(key)
+            st.rerun()
+
+def is_partial(key: str) -> bool:
+    """True jika masih ada halaman riwayat yang belum dimuat."""
+    state = st.session_state.get(key)
+    return bool(state) and state["cursor"] is not None and len(state["rows"]) < state["total"]
+
+def summary_metric(key: str, label: str, value):
+    """st.metric ringkasan riwayat (jumlah/total nilai) yang dihitung dari baris yang sudah dimuat.
+    Selama masih ada halaman yang belum dimuat, label dan keterangannya menyebutkan hal itu agar
+    tidak terbaca sebagai total seluruh periode."""
+    if not is_partial(key):
+        st.metric(label, value)
+        return
+    state = st.session_state[key]
+    st.metric(
+        f"{label} (baris dimuat)",
+        value,
+        help=f"Dihitung dari {len(state['rows']):,} dari {state['total']:,} baris. "
+             "Muat halaman berikutnya untuk total seluruh periode.",
+    )
+
+
+# Paging tampilan untuk data yang sudah ada di memori (mis. detail produk): hanya baris
+# di halaman aktif yang dirender, sehingga jumlah elemen di browser tetap kecil.
+PAGE_SIZES = (10, 25, 50, 100)
+
+def jump_to_position(key: str, position: int):
+    """Pindah ke halaman yang memuat baris ke-`position` (0-based) dengan ukuran halaman aktif."""
+    page_size = st.session_state.get(f"{key}_size", PAGE_SIZES[0])
+    st.session_state[f"{key}_page"] = position // page_size + 1
+
+def show_page_controls(key: str, total: int, page_sizes=PAGE_SIZES) -> tuple:
+    """Pilihan ukuran halaman dan nomor halaman. Mengembalikan (start, stop) baris yang ditampilkan."""
+    col_size, col_page, col_info = st.columns([1, 1, 2])
+    with col_size:
+        page_size = st.selectbox("Per halaman", page_sizes, key=f"{key}_size")
+    pages = max(1, -(-total // page_size))
+    # Nomor halaman lama bisa melewati batas setelah filter atau ukuran halaman berubah
+    page_key = f"{key}_page"
+    st.session_state[page_key] = min(max(1, st.session_state.get(page_key, 1)), pages)
+    with col_page:
+        page = st.number_input(f"Halaman (1-{pages:,})", min_value=1, max_value=pages, step=1, key=page_key)
+    start = (page - 1) * page_size
+    stop = min(start + page_size, total)
+    with col_info:
+        st.caption(f"Menampilkan {start + 1 if total else 0:,}-{stop:,} dari {total:,} data.")
+    return start, stop
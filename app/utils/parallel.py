@@ -0,0 +1,115 @@
+import contextvars
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+# Pool bersama untuk semua sesi. Query yang timeout tetap selesai di background
+# tanpa menahan rerun, jadi jumlah worker dibatasi agar server tidak kebanjiran.
+MAX_WORKERS = 8
+DEFAULT_TIMEOUT = 20.0
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="db-query")
+        return _executor
+
+
+class QueryTimeout(TimeoutError):
+    pass
+
+
+@dataclass
+class QueryResult:
+    name: str
+    data: Any = None
+    error: Optional[BaseException] = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+class ParallelQueries:
+    """Jalankan beberapa query independen sekaligus dan ambil hasilnya sesuai urutan selesai.
+
+    Contoh:
+        batch = ParallelQueries(timeout=15)
+        batch.add("kpi", lambda: supabase.rpc("get_store_kpis", params).execute().data)
+        for result in batch.as_completed():
+            ...
+    """
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, max_in_flight: Optional[int] = None):
+        # max_in_flight membatasi berapa query batch ini yang dikirim ke pool bersama sekaligus;
+        # sisanya menunggu giliran di sini. Batas waktu tiap query dihitung sejak dikirim ke pool,
+        # termasuk waktu menunggu worker kosong (pool juga dipakai reload matriks stok), sehingga
+        # timeout adalah batas total; query yang belum sempat jalan dibatalkan.
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        self._calls: dict = {}
+
+    def add(self, name: str, func: Callable[..., Any], *args, timeout: Optional[float] = None, **kwargs) -> "ParallelQueries":
+        self._calls[name] = (func, args, kwargs, self.timeout if timeout is None else timeout)
+        return self
+
+    def as_completed(self) -> Iterator[QueryResult]:
+        """Yield QueryResult begitu setiap query selesai, gagal, atau melewati batas waktunya."""
+        executor = get_executor()
+        queued = list(self._calls.items())[::-1]
+        limit = self.max_in_flight or len(queued)
+        pending: dict = {}
+
+        def submit_next():
+            while queued and len(pending) < limit:
+                name, (func, args, kwargs, timeout) = queued.pop()
+                # Salin context agar pencatatan query (app.utils.profiler) tetap masuk ke rerun pemanggil
+                future = executor.submit(contextvars.copy_context().run, _timed, func, *args, **kwargs)
+                pending[future] = (name, time.monotonic(), timeout)
+
+        submit_next()
+        while pending:
+            next_deadline = min(submitted + timeout for _, submitted, timeout in pending.values())
+            done, _ = wait(pending, timeout=max(0.0, next_deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                yield _to_result(pending.pop(future)[0], future)
+
+            now = time.monotonic()
+            for future, (name, submitted, timeout) in list(pending.items()):
+                if submitted + timeout <= now and not future.done():
+                    del pending[future]
+                    if future.cancel():
+                        logger.warning(f"Query '{name}' tidak mendapat worker dalam {timeout:.1f} detik")
+                    else:
+                        logger.warning(f"Query '{name}' melewati batas waktu {timeout:.1f} detik")
+                    yield QueryResult(name, error=QueryTimeout(f"Query '{name}' timeout"), elapsed=now - submitted)
+
+            submit_next()
+
+    def run(self) -> dict:
+        """Tunggu semua query dan kembalikan {name: QueryResult}."""
+        return {result.name: result for result in self.as_completed()}
+
+
+def _timed(func: Callable[..., Any], *args, **kwargs) -> tuple:
+    start = time.monotonic()
+    return func(*args, **kwargs), time.monotonic() - start
+
+def _to_result(name: str, future: Future) -> QueryResult:
+    try:
+        data, elapsed = future.result()
+        return QueryResult(name, data=data, elapsed=elapsed)
+    except Exception as e:
+        logger.warning(f"Query '{name}' gagal: {e}")
+        return QueryResult(name, error=e)
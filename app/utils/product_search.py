@@ -0,0 +1,176 @@
+import bisect
+import heapq
+import re
+from collections import Counter
+from typing import Optional
+
+# Kolom produk yang bisa dicari dari picker
+SEARCH_FIELDS = ("productname", "type", "size", "brand")
+# Jumlah hasil yang dikirim ke browser per pencarian
+DEFAULT_LIMIT = 50
+# Kolom yang bisa di-scan sebagai kode produk (barcode dicetak dari productid)
+CODE_FIELDS = ("productid",)
+# Minimal porsi trigram query yang harus cocok agar ikut sebagai hasil "mirip"
+TRIGRAM_THRESHOLD = 0.5
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text) -> list:
+    return _TOKEN.findall(str(text).lower()) if text else []
+
+def trigrams(token: str) -> set:
+    # Padding seperti pg_trgm: dua spasi di depan, satu di belakang
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def normalize_code(code) -> str:
+    # Scanner EAN/UPC sering menambah nol di depan: "000123" == "123"
+    code = str(code).strip().lower()
+    return (code.lstrip("0") or "0") if code.isdigit() else code
+
+def product_label(p: dict, stock=None) -> str:
+    """Nama produk untuk picker; dengan stock (StockMatrix toko) ditambah total stok semua gudang."""
+    label = p['productname']
+    if p.get('size'):
+        label += f" ({p['size']})"
+    if p.get('type'):
+        label += f" - {p['type']}"
+    if stock is not None:
+        label += f" [Stok: {stock.total(p['productid'])}]"
+    return label
+
+
+class ProductIndex:
+    """Index pencarian katalog satu toko: prefix per kata dan trigram untuk salah ketik.
+
+    Dibangun sekali per versi katalog (lihat app.db.product_index); urutan hasil dengan
+    skor sama mengikuti urutan baris asli (productname).
+    """
+
+    def __init__(self, rows: list, fields: tuple = SEARCH_FIELDS):
+        self.rows = rows
+        self.by_id = {row["productid"]: row for row in rows}
+        self.fields = fields
+        self._signature = self._signature_of(rows)
+        # Kode scan -> productid (lookup O(1); baris diambil dari by_id agar ikut refresh())
+        self._codes = {
+            normalize_code(row[field]): row["productid"]
+            for field in CODE_FIELDS for row in rows if row.get(field) is not None
+        }
+
+        postings: dict = {}
+        findall = _TOKEN.findall
+        for pos, row in enumerate(rows):
+            text = " ".join(str(row[field]) for field in fields if row.get(field))
+            for token in set(findall(text.lower())):
+                postings.setdefault(token, []).append(pos)
+
+        # Trigram dihitung per kata unik (bukan per baris); angka (kode/nomor seri) tidak
+        # dicari secara fuzzy
+        token_grams: dict = {}
+        for token in postings:
+            if token.isdigit():
+                continue
+            for gram in trigrams(token):
+                token_grams.setdefault(gram, []).append(token)
+
+        self._postings = postings
+        self._tokens = sorted(postings)
+        self._token_grams = token_grams
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def lookup(self, code) -> Optional[dict]:
+        """Produk dengan kode scan persis sama, atau None."""
+        product_id = self._codes.get(normalize_code(code))
+        return self.by_id.get(product_id)
+
+    def _signature_of(self, rows: list) -> list:
+        return [(row["productid"],) + tuple(row.get(field) for field in self.fields) for row in rows]
+
+    def refresh(self, rows: list) -> bool:
+        """Pakai baris baru (mis. harga berubah) tanpa membangun ulang index jika produk dan
+        kolom yang dicari tidak berubah. False jika index perlu dibangun ulang."""
+        if rows is self.rows:
+            return True
+        if self._signature_of(rows) != self._signature:
+            return False
+        self.by_id = {row["productid"]: row for row in rows}
+        self.rows = rows
+        return True
+
+    def _term_scores(self, term: str, fuzzy: bool = False) -> dict:
+        """{posisi baris: skor} untuk satu kata query: kata utuh 2, awalan 1, dan jika fuzzy,
+        kata yang mirip (trigram) bernilai porsi trigram yang cocok (< 1)."""
+        scores: dict = {}
+
+        def add(token, score):
+            for pos in self._postings[token]:
+                if scores.get(pos, 0) < score:
+                    scores[pos] = score
+
+        i = bisect.bisect_left(self._tokens, term)
+        while i < len(self._tokens) and self._tokens[i].startswith(term):
+            add(self._tokens[i], 2 if self._tokens[i] == term else 1)
+            i += 1
+
+        if fuzzy:
+            grams = trigrams(term)
+            counts = Counter()
+            for gram in grams:
+                counts.update(self._token_grams.get(gram, ()))
+            for token, n in counts.items():
+                similarity = n / len(grams)
+                if similarity >= TRIGRAM_THRESHOLD:
+                    add(token, min(similarity, 0.99))
+        return scores
+
+    def _match(self, terms: list, fuzzy: bool) -> dict:
+        scores = None
+        # Kata terpanjang biasanya paling selektif; hasil antar kata di-AND
+        for term in sorted(set(terms), key=len, reverse=True):
+            term_scores = self._term_scores(term, fuzzy and len(term) >= 3)
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {pos: s + term_scores[pos] for pos, s in scores.items() if pos in term_scores}
+            if not scores:
+                break
+        return scores or {}
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list:
+        """Maksimal `limit` produk yang paling cocok. Semua kata query harus cocok sebagai
+        awalan kata di nama/tipe/ukuran/merek; jika hasilnya kurang, kata yang mirip
+        (salah ketik) ikut dihitung lewat trigram."""
+        terms = tokenize(query)
+        if not terms:
+            return self.rows[:limit]
+
+        scores = self._match(terms, fuzzy=False)
+        if len(scores) < limit and any(len(term) >= 3 for term in terms):
+            scores = self._match(terms, fuzzy=True)
+        best = heapq.nsmallest(limit, scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return [self.rows[pos] for pos, _ in best]
+
+
+def product_picker(index: ProductIndex, label: str, key: str, stock=None,
+                   limit: int = DEFAULT_LIMIT) -> Optional[dict]:
+    """Kotak cari + selectbox berisi `limit` hasil teratas. Mengembalikan baris produk atau None."""
+    import streamlit as st
+
+    query = st.text_input(label, key=f"{key}_query", placeholder="Ketik nama, tipe, ukuran atau merek lalu Enter")
+    matches = index.search(query, limit)
+    if not matches:
+        st.caption("Produk tidak ditemukan.")
+        return None
+
+    selected_id = st.selectbox(
+        label,
+        options=[p["productid"] for p in matches],
+        format_func=lambda pid: product_label(index.by_id[pid], stock),
+        key=f"{key}_select",
+        label_visibility="collapsed",
+    )
+    return index.by_id.get(selected_id)
@@ -0,0 +1,221 @@
+import contextvars
+import json
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from .logger import perf_logger
+
+# Batas query lambat yang juga ditulis ke log sebagai warning (ms)
+SLOW_QUERY_MS = 500
+# Jumlah record query yang disimpan per sesi untuk panel Performance
+MAX_RECORDS = 1000
+
+_current_stats: contextvars.ContextVar = contextvars.ContextVar("query_stats", default=None)
+
+
+@dataclass
+class QueryRecord:
+    kind: str           # "table" atau "rpc"
+    name: str
+    operation: str      # select/insert/update/delete/upsert/rpc
+    filters: str
+    elapsed_ms: float
+    rows: int
+    bytes: int
+    page: str = ""
+    rerun_id: str = ""
+    error: Optional[str] = None
+
+
+@dataclass
+class QueryStats:
+    """Kumpulan record query satu sesi Streamlit, dikelompokkan per rerun dan per halaman."""
+
+    records: deque = field(default_factory=lambda: deque(maxlen=MAX_RECORDS))
+    page: str = ""
+    rerun_id: str = ""
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, record: QueryRecord):
+        with self._lock:
+            self.records.append(record)
+
+    def rerun_records(self) -> list:
+        with self._lock:
+            return [r for r in self.records if r.rerun_id == self.rerun_id]
+
+    def top_offenders(self, limit: int = 10) -> list:
+        """Agregasi per (halaman, nama query), diurutkan dari total waktu terbesar."""
+        groups: dict = {}
+        with self._lock:
+            records = list(self.records)
+        for r in records:
+            key = (r.page, f"{r.kind}:{r.name}")
+            g = groups.setdefault(key, {"page": r.page, "query": key[1], "calls": 0, "total_ms": 0.0,
+                                        "max_ms": 0.0, "rows": 0, "kb": 0.0, "errors": 0})
+            g["calls"] += 1
+            g["total_ms"] += r.elapsed_ms
+            g["max_ms"] = max(g["max_ms"], r.elapsed_ms)
+            g["rows"] += r.rows
+            g["kb"] += r.bytes / 1024
+            g["errors"] += r.error is not None
+        return sorted(groups.values(), key=lambda g: g["total_ms"], reverse=True)[:limit]
+
+    @contextmanager
+    def rerun(self, page: str, user: str = "", store: str = ""):
+        """Tandai satu rerun halaman; semua execute() di dalamnya tercatat ke sesi ini."""
+        self.page = page
+        self.rerun_id = uuid.uuid4().hex[:8]
+        token = _current_stats.set(self)
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            _current_stats.reset(token)
+            records = self.rerun_records()
+            perf_logger.info(
+                f"Rerun {page}: {len(records)} query, {sum(r.elapsed_ms for r in records):.0f} ms di database, "
+                f"{(time.perf_counter() - start) * 1000:.0f} ms total",
+                extra={"user": user, "store": store, "data": {
+                    "rerun_id": self.rerun_id,
+                    "page": page,
+                    "queries": len(records),
+                    "db_ms": round(sum(r.elapsed_ms for r in records), 1),
+                    "rows": sum(r.rows for r in records),
+                    "bytes": sum(r.bytes for r in records),
+                }},
+            )
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+def _payload_size(data: Any) -> int:
+    if data is None:
+        return 0
+    try:
+        return len(json.dumps(data, default=str, separators=(",", ":")))
+    except (TypeError, ValueError):
+        return 0
+
+def _describe_call(method: str, args: tuple, kwargs: dict) -> str:
+    values = [repr(a) if not isinstance(a, (dict, list)) else f"<{type(a).__name__}>" for a in args]
+    values += [f"{k}={v!r}" for k, v in kwargs.items()]
+    return f"{method}({', '.join(values)})"
+
+
+class InstrumentedBuilder:
+    """Proxy query builder: meneruskan semua pemanggilan dan mencatat setiap execute()."""
+
+    _OPERATIONS = ("select", "insert", "update", "delete", "upsert")
+
+    def __init__(self, builder, kind: str, name: str, operation: str, calls: tuple = ()):
+        self._builder = builder
+        self._kind = kind
+        self._name = name
+        self._operation = operation
+        self._calls = calls
+
+    def __getattr__(self, attr):
+        target = getattr(self._builder, attr)
+        if not callable(target):
+            return target
+        if attr == "execute":
+            return self._execute
+
+        def call(*args, **kwargs):
+            result = target(*args, **kwargs)
+            if hasattr(result, "execute"):
+                operation = attr if attr in self._OPERATIONS else self._operation
+                calls = self._calls if attr in self._OPERATIONS else self._calls + (_describe_call(attr, args, kwargs),)
+                return InstrumentedBuilder(result, self._kind, self._name, operation, calls)
+            return result
+        return call
+
+    def _execute(self, *args, **kwargs):
+        stats = current_stats()
+        start = time.perf_counter()
+        error = None
+        response = None
+        try:
+            response = self._builder.execute(*args, **kwargs)
+            return response
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            data = getattr(response, "data", None)
+            rows = len(data) if isinstance(data, list) else int(data is not None)
+            record = QueryRecord(
+                kind=self._kind,
+                name=self._name,
+                operation=self._operation,
+                filters=", ".join(self._calls),
+                elapsed_ms=elapsed_ms,
+                rows=rows,
+                bytes=_payload_size(data),
+                page=stats.page if stats else "",
+                rerun_id=stats.rerun_id if stats else "",
+                error=error,
+            )
+            if stats is not None:
+                stats.add(record)
+            _log_query(record)
+
+
+def _log_query(record: QueryRecord):
+    message = (f"{record.kind}:{record.name} {record.operation} {record.elapsed_ms:.0f} ms, "
+               f"{record.rows} baris, {record.bytes} byte")
+    extra = {"data": {"page": record.page, "rerun_id": record.rerun_id, "filters": record.filters, "error": record.error}}
+    if record.error or record.elapsed_ms >= SLOW_QUERY_MS:
+        perf_logger.warning(message, extra=extra)
+    else:
+        perf_logger.debug(message, extra=extra)
+
+
+class InstrumentedClient:
+    """Pembungkus client Supabase (atau LocalClient) yang mencatat waktu setiap query."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, name: str) -> InstrumentedBuilder:
+        return InstrumentedBuilder(self._client.table(name), "table", name, "select")
+
+    def from_(self, name: str) -> InstrumentedBuilder:
+        return self.table(name)
+
+    def rpc(self, name: str, params: Optional[dict] = None, *args, **kwargs) -> InstrumentedBuilder:
+        return InstrumentedBuilder(self._client.rpc(name, params, *args, **kwargs), "rpc", name, "rpc")
+
+    def __getattr__(self, attr):
+        return getattr(self._client, attr)
+
+
+def show_performance_panel(stats: Optional[QueryStats]):
+    """Panel sidebar admin: query paling berat pada sesi ini."""
+    import pandas as pd
+    import streamlit as st
+
+    with st.sidebar.expander("Performance", expanded=False):
+        if stats is None or not stats.records:
+            st.caption("Belum ada query yang tercatat.")
+            return
+
+        last = stats.rerun_records()
+        st.caption(f"Rerun terakhir: {len(last)} query, {sum(r.elapsed_ms for r in last):,.0f} ms")
+        df = pd.DataFrame(stats.top_offenders())
+        df["total_ms"] = df["total_ms"].round(0)
+        df["max_ms"] = df["max_ms"].round(0)
+        df["kb"] = df["kb"].round(1)
+        st.dataframe(df, use_container_width=True, hide_index=True)
+        if st.button("Reset", key="perf_panel_reset"):
+            stats.records.clear()
+            st.rerun()
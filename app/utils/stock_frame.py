@@ -0,0 +1,72 @@
+import pandas as pd
+
+from app.utils.formatters import format_datetime_series
+
+# Kolom produk yang dipilih halaman Daftar Stok, beserta relasi bersarangnya
+STOCK_SELECT = (
+    "productid, productname, type, size, color, brand, description, updateat, harga, "
+    "productsupply(price, supplier(suppliername)), "
+    "product_warehouse(quantity, warehouse_list(name))"
+)
+
+STOCK_FRAME_COLUMNS = [
+    "ID", "Nama Produk", "Jenis", "Ukuran", "Warna", "Merek", "Harga Rata-rata",
+    "Total Kuantitas", "Supplier", "Gudang", "Deskripsi", "Update Terakhir",
+]
+
+_TEXT_COLUMNS = {
+    "productname": "Nama Produk",
+    "type": "Jenis",
+    "size": "Ukuran",
+    "color": "Warna",
+    "brand": "Merek",
+    "description": "Deskripsi",
+}
+
+
+def _children(products: list, key: str) -> pd.Series:
+    """Relasi bersarang (list per produk) menjadi satu Series dict dengan index productid."""
+    nested = pd.Series([p.get(key) or [] for p in products], index=[p["productid"] for p in products], dtype=object)
+    return nested.explode().dropna()
+
+def _joined_names(names: pd.Series) -> pd.Series:
+    """Nama unik per produk (index productid), diurutkan dan digabung dengan koma."""
+    names = names.dropna()
+    names = names[names != ""]
+    frame = pd.DataFrame({"productid": names.index, "name": names.astype(object).values})
+    frame = frame.drop_duplicates().sort_values(["productid", "name"])
+    # Penjumlahan string per grup jauh lebih cepat daripada agg(", ".join) per grup
+    return (frame["name"] + ", ").groupby(frame["productid"]).sum().str.slice(0, -2)
+
+def flatten_stock(products: list) -> pd.DataFrame:
+    """Hasil select STOCK_SELECT menjadi tabel stok datar (satu baris per produk).
+
+    Semua produk diolah sekaligus: relasi di-explode lalu diagregasi dengan groupby, dan
+    tanggal update di-parse serta diformat sekali untuk seluruh kolom.
+    """
+    if not products:
+        return pd.DataFrame(columns=STOCK_FRAME_COLUMNS)
+
+    base = pd.DataFrame.from_records(
+        products, columns=["productid", "harga", "updateat", *_TEXT_COLUMNS]
+    ).set_index("productid", drop=False)
+
+    frame = pd.DataFrame({"ID": base["productid"]})
+    for source, column in _TEXT_COLUMNS.items():
+        frame[column] = base[source].where(base[source].notna() & (base[source] != ""), "-")
+
+    frame["Harga Rata-rata"] = pd.to_numeric(base["harga"], errors="coerce").fillna(0).round(2)
+
+    warehouses = _children(products, "product_warehouse")
+    quantity = pd.to_numeric(warehouses.str.get("quantity"), errors="coerce").fillna(0)
+    frame["Total Kuantitas"] = quantity.groupby(level=0).sum().reindex(base.index, fill_value=0).astype("int64")
+
+    supplies = _children(products, "productsupply")
+    supplier_names = _joined_names(supplies.str.get("supplier").str.get("suppliername"))
+    warehouse_names = _joined_names(warehouses.str.get("warehouse_list").str.get("name"))
+    frame["Supplier"] = supplier_names.reindex(base.index).fillna("-")
+    frame["Gudang"] = warehouse_names.reindex(base.index).fillna("-")
+
+    frame["Update Terakhir"] = format_datetime_series(base["updateat"], "%Y-%m-%d %H:%M")
+
+    return frame[STOCK_FRAME_COLUMNS].reset_index(drop=True)
@@ -0,0 +1,99 @@
+import json
+import threading
+import time
+from array import array
+from typing import Optional
+
+# RPC yang mengubah stok tetapi delta-nya tidak bisa dihitung dari parameter -> muat ulang matriks
+STOCK_RELOAD_RPCS = ("bulk_import_smart", "migrate_all_warehouse_stock", "delete_warehouse_permanent", "delete_store_cascade")
+
+
+class StockMatrix:
+    """Stok produk x gudang satu toko dalam satu array int64 (baris = produk, kolom = gudang).
+
+    Dimuat sekali dari product_warehouse, lalu diperbarui dengan delta dari transaksi yang
+    dicatat aplikasi ini (apply) dan dimuat ulang berkala untuk perubahan dari luar.
+    """
+
+    def __init__(self, warehouse_ids: list, rows: list):
+        self.loaded_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._cols = {wid: j for j, wid in enumerate(warehouse_ids)}
+        self._rows: dict = {}
+        self._data = array("q")
+        for row in rows:
+            if row["warehouseid"] in self._cols:
+                self._data[self._index(row["productid"], row["warehouseid"], grow=True)] = int(row["quantity"] or 0)
+
+    @property
+    def warehouse_ids(self) -> list:
+        return list(self._cols)
+
+    def _index(self, product_id, warehouse_id, grow: bool = False) -> Optional[int]:
+        j = self._cols.get(warehouse_id)
+        i = self._rows.get(product_id)
+        if j is None:
+            return None
+        if i is None:
+            if not grow:
+                return None
+            i = self._rows[product_id] = len(self._rows)
+            self._data.extend([0] * len(self._cols))
+        return i * len(self._cols) + j
+
+    def get(self, product_id, warehouse_id) -> int:
+        index = self._index(product_id, warehouse_id)
+        return 0 if index is None else self._data[index]
+
+    def for_product(self, product_id) -> dict:
+        """{warehouseid: quantity} untuk semua gudang toko (gudang tanpa stok bernilai 0)."""
+        i = self._rows.get(product_id)
+        if i is None:
+            return {wid: 0 for wid in self._cols}
+        start = i * len(self._cols)
+        return {wid: self._data[start + j] for wid, j in self._cols.items()}
+
+    def total(self, product_id) -> int:
+        return sum(self.for_product(product_id).values())
+
+    def apply(self, deltas: list) -> bool:
+        """Terapkan [(productid, warehouseid, delta)]. False jika ada gudang yang tidak dikenal
+        (matriks perlu dimuat ulang)."""
+        with self._lock:
+            for product_id, warehouse_id, delta in deltas:
+                index = self._index(product_id, warehouse_id, grow=True)
+                if index is None:
+                    return False
+                self._data[index] += int(delta)
+        return True
+
+
+# RPC multi-item: arah perubahan stok untuk setiap item di p_items
+_ITEM_SIGN = {
+    "record_sale_transaction_multi": -1,
+    "record_purchase_transaction_multi": 1,
+    "record_purchase_return": -1,
+    "record_sale_return": 1,
+}
+STOCK_RPCS = set(_ITEM_SIGN) | {"record_stock_adjustment", "migrate_product_stock"} | set(STOCK_RELOAD_RPCS)
+
+def _items(value) -> list:
+    return json.loads(value) if isinstance(value, str) else list(value or [])
+
+def stock_deltas(rpc_name: str, params: Optional[dict]) -> Optional[list]:
+    """Perubahan stok [(productid, warehouseid, delta)] dari parameter RPC tulis.
+    [] jika RPC tidak mengubah stok, None jika ada perubahan yang tidak bisa dihitung."""
+    if rpc_name not in STOCK_RPCS:
+        return []
+    if params is None or rpc_name in STOCK_RELOAD_RPCS:
+        return None
+
+    if rpc_name in _ITEM_SIGN:
+        sign = _ITEM_SIGN[rpc_name]
+        return [(item["product_id"], params["p_warehouse_id"], sign * int(item["quantity"]))
+                for item in _items(params.get("p_items"))]
+    quantity = int(params["p_quantity"])
+    if rpc_name == "record_stock_adjustment":
+        return [(params["p_product_id"], params["p_warehouse_id"], quantity if params["p_adj_type"] == "add" else -quantity)]
+    return [(params["p_product_id"], params["p_source_warehouse_id"], -quantity),
+            (params["p_product_id"], params["p_target_warehouse_id"], quantity)]
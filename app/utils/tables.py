@@ -0,0 +1,50 @@
+from functools import lru_cache
+
+import pandas as pd
+
+from app.utils.formatters import parse_datetime_series
+
+# Tabel riwayat disimpan dengan tipe aslinya (angka, datetime, kategori) dari fetch sampai
+# agregasi. Format Rupiah/tanggal hanya dipasang lewat st.column_config saat render, sehingga
+# sorting dan total bekerja dengan angka, bukan teks "Rp 1,234".
+MONEY_FORMAT = "Rp %,.0f"
+# Pemisah ribuan ("%,") di format printf baru didukung Streamlit 1.55; versi lama tanpa pemisah
+MONEY_FORMAT_MIN_STREAMLIT = (1, 55)
+MONEY_FORMAT_LEGACY = "Rp %.0f"
+DATETIME_FORMAT = "YYYY-MM-DD HH:mm"
+
+
+def typed_frame(rows: list, numeric=(), datetimes=(), categories=(), labels: dict = None) -> pd.DataFrame:
+    """Baris RPC menjadi DataFrame bertipe. Kolom yang tidak ada di hasil dilewati.
+
+    labels berisi {kolom: {nilai: label}}; nilai tanpa label dibiarkan apa adanya. Kolom di
+    labels dan categories disimpan sebagai category.
+    """
+    df = pd.DataFrame(rows)
+    for column in numeric:
+        if column in df:
+            df[column] = pd.to_numeric(df[column], errors="coerce")
+    for column in datetimes:
+        if column in df:
+            df[column] = parse_datetime_series(df[column])
+    for column, mapping in (labels or {}).items():
+        if column in df:
+            df[column] = df[column].map(mapping).fillna(df[column])
+    for column in (*categories, *(labels or {})):
+        if column in df:
+            df[column] = df[column].astype("category")
+    return df
+
+@lru_cache(maxsize=None)
+def money_format() -> str:
+    import streamlit as st
+    version = tuple(int(part) for part in st.__version__.split(".")[:2])
+    return MONEY_FORMAT if version >= MONEY_FORMAT_MIN_STREAMLIT else MONEY_FORMAT_LEGACY
+
+def money_column(label: str = None, **kwargs):
+    import streamlit as st
+    return st.column_config.NumberColumn(label, format=money_format(), **kwargs)
+
+def datetime_column(label: str = None, **kwargs):
+    import streamlit as st
+    return st.column_config.DatetimeColumn(label, format=DATETIME_FORMAT, **kwargs)
@@ -106,6 +106,66 @@ def validate_username(username: str) -> tuple[bool, str]:
     
     return True, ""
 
+# Versi Series dari validator di atas untuk memeriksa satu kolom sekaligus (mis. file impor).
+# Hasilnya Series pesan error sejajar dengan input: "" berarti valid. Aturan dan pesannya
+# sama dengan versi skalar; pandas/numpy di-import saat dipakai.
+
+def _as_text(values):
+    import pandas as pd
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    return values.astype("string").str.strip()
+
+def _messages(index, rules, default: str = ""):
+    """rules: daftar (mask, pesan); mask pertama yang benar menentukan pesan baris."""
+    import numpy as np
+    import pandas as pd
+    conditions = [np.asarray(mask, dtype=bool) for mask, _ in rules]
+    return pd.Series(np.select(conditions, [message for _, message in rules], default), index=index, dtype=object)
+
+def validate_product_name_series(values):
+    text = _as_text(values)
+    length = text.str.len().fillna(0)
+    return _messages(text.index, [
+        (length == 0, "Nama produk tidak boleh kosong atau hanya spasi."),
+        (length < 3, "Nama produk minimal 3 karakter."),
+        (length > 100, "Nama produk maksimal 100 karakter."),
+    ])
+
+def _numbers(values):
+    """Nilai float dan mask nilai yang bukan angka (termasuk kosong)."""
+    import pandas as pd
+    values = values if isinstance(values, pd.Series) else pd.Series(values)
+    numbers = pd.to_numeric(values, errors="coerce").astype(float)
+    return numbers, numbers.isna()
+
+def validate_quantity_series(values, minimum: int = 1):
+    numbers, not_number = _numbers(values)
+    return _messages(numbers.index, [
+        (not_number, "Jumlah harus berupa angka."),
+        (numbers % 1 != 0, "Jumlah harus bilangan bulat."),
+        (numbers < minimum, f"Jumlah harus minimal {minimum}."),
+    ])
+
+def validate_price_series(values, minimum: float = 0.01):
+    numbers, not_number = _numbers(values)
+    return _messages(numbers.index, [
+        (not_number, "Harga harus berupa angka."),
+        (numbers < minimum, f"Harga harus minimal Rp {minimum:g}."),
+    ])
+
+def validate_phone_number_series(values):
+    text = _as_text(values).fillna("")
+    cleaned = text.str.replace(r"[- +]", "", regex=True)
+    length = cleaned.str.len()
+    country = cleaned.str.startswith("62")
+    local = cleaned.str.startswith("8")
+    return _messages(text.index, [
+        (text == "", ""),
+        (country & ((length < 10) | (length > 13)), "Nomor telepon tidak valid (format: +62 8xx-xxxx-xxxx)."),
+        (local & ((length < 9) | (length > 12)), "Nomor telepon tidak valid (format: 08xx-xxxx-xxxx)."),
+        (~country & ~local, "Nomor telepon harus dimulai dengan 08 atau +62."),
+    ])
+
 # Dictionary untuk easy import
 VALIDATORS = {
     'product_name': validate_product_name,
@@ -118,3 +178,10 @@ VALIDATORS = {
     'password': validate_password,
     'username': validate_username,
 }
+
+SERIES_VALIDATORS = {
+    'product_name': validate_product_name_series,
+    'phone': validate_phone_number_series,
+    'quantity': validate_quantity_series,
+    'price': validate_price_series,
+}
@@ -0,0 +1,64 @@
+# benchmarks/formatters.py
+# Perbandingan memformat satu kolom uang dan tanggal: .apply / .dt.strftime per baris
+# (cara lama di halaman riwayat) vs formatter Series di app/utils/formatters.py.
+#
+#     python benchmarks/formatters.py [--rows 100000] [--repeat 5]
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.formatters import (  # noqa: E402
+    MONTHS_ID, format_currency_series, format_datetime_series, format_indonesian_date_series,
+)
+
+
+def timed(func, repeat: int) -> tuple:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        runs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(runs), result
+
+
+def run(rows: int, repeat: int):
+    rng = np.random.default_rng(1)
+    amounts = pd.Series(rng.integers(1_000, 50_000_000, rows) / 7)
+    # Harga di riwayat berulang: beberapa ratus nilai berbeda
+    prices = pd.Series(rng.integers(1, 500, rows) * 2_500.0)
+    dates = pd.Series(pd.date_range("2023-01-01", periods=rows, freq="37min").strftime("%Y-%m-%dT%H:%M:%S.%f+00:00"))
+    parsed = pd.to_datetime(dates, format="ISO8601")
+    print(f"{rows:,} baris, pandas {pd.__version__}, {repeat}x (median)\n")
+
+    cases = [
+        ("uang", lambda: amounts.apply(lambda x: f"Rp {x:,.0f}"), lambda: format_currency_series(amounts, decimals=0)),
+        ("uang (harga berulang)", lambda: prices.apply(lambda x: f"Rp {x:,.0f}"),
+         lambda: format_currency_series(prices, decimals=0)),
+        ("tanggal (sudah di-parse)", lambda: parsed.dt.strftime("%Y-%m-%d %H:%M"),
+         lambda: format_datetime_series(parsed, "%Y-%m-%d %H:%M")),
+        ("tanggal (teks ISO)", lambda: pd.to_datetime(dates, format="ISO8601").dt.strftime("%Y-%m-%d %H:%M"),
+         lambda: format_datetime_series(dates, "%Y-%m-%d %H:%M")),
+        ("tanggal Indonesia", lambda: parsed.apply(lambda d: f"{d.day} {MONTHS_ID[d.month - 1]} {d.year}"),
+         lambda: format_indonesian_date_series(parsed)),
+    ]
+    for name, old, new in cases:
+        old_ms, expected = timed(old, repeat)
+        new_ms, actual = timed(new, repeat)
+        same = (expected.astype(object).to_numpy() == actual.to_numpy()).all()
+        print(f"  {name:<26} per baris {old_ms:8.1f} ms   Series {new_ms:8.1f} ms   "
+              f"({old_ms / new_ms:.1f}x){'' if same else '  ! hasil berbeda'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark formatter Series")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
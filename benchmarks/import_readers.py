@@ -0,0 +1,81 @@
+# benchmarks/import_readers.py
+# Waktu membaca file impor yang sama dalam format xlsx (openpyxl read-only), CSV (parser C
+# pandas per chunk) dan Parquet (hanya kolom impor yang dibaca) lewat iter_file_chunks.
+# File diberi beberapa kolom ekstra yang tidak diimpor, seperti ekspor ERP.
+#
+#     python benchmarks/import_readers.py [--rows 200000] [--repeat 3]
+import argparse
+import io
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.stock_import import ROW_COLUMN, SCAN_CHUNK_SIZE, clean_chunk, iter_file_chunks  # noqa: E402
+
+
+def make_export(rows: int, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "product_name": [f"Produk {i:06d}" for i in range(rows)],
+        "qty": rng.integers(0, 50, rows),
+        "price": rng.integers(1_000, 500_000, rows),
+        "warehouse": rng.choice(["Gudang Utama", "Gudang 2"], rows),
+        "brand": rng.choice(["Roman", "Asia Tile", "Platinum"], rows),
+        "sku": [f"SKU-{i:08d}" for i in range(rows)],
+        "barcode": rng.integers(10**12, 10**13, rows).astype(str),
+        "created_at": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 10**7, rows), unit="s"),
+    })
+
+
+def encode(df: pd.DataFrame) -> dict:
+    files = {}
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False)
+    files["xlsx"] = buffer.getvalue()
+    files["csv"] = df.to_csv(index=False, sep=";").encode()
+    buffer = io.BytesIO()
+    df.to_parquet(buffer, index=False)
+    files["parquet"] = buffer.getvalue()
+    return files
+
+
+def read_all(data: bytes, extension: str) -> pd.DataFrame:
+    chunks = iter_file_chunks(io.BytesIO(data), f"impor.{extension}", SCAN_CHUNK_SIZE)
+    return pd.concat([clean_chunk(chunk) for chunk in chunks], ignore_index=True)
+
+
+def run(rows: int, repeat: int):
+    files = encode(make_export(rows))
+    print(f"{rows:,} baris, pandas {pd.__version__}, {repeat}x (median)\n")
+    results, timings = {}, {}
+    for extension, data in files.items():
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            results[extension] = read_all(data, extension)
+            runs.append((time.perf_counter() - start) * 1000)
+        timings[extension] = statistics.median(runs)
+
+    for extension, ms in timings.items():
+        speedup = f"  ({timings['xlsx'] / ms:.1f}x lebih cepat dari xlsx)" if extension != "xlsx" else ""
+        print(f"  {extension:<8} {len(files[extension]) / 1e6:6.1f} MB  {ms:9.1f} ms{speedup}")
+
+    # Ketiga format harus menghasilkan baris impor yang sama (nomor baris Parquet tanpa header)
+    expected = results["xlsx"].drop(columns=ROW_COLUMN)
+    for extension in ("csv", "parquet"):
+        pd.testing.assert_frame_equal(results[extension].drop(columns=ROW_COLUMN), expected, check_dtype=False)
+    print("\n  hasil ketiga format identik")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark reader file impor")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
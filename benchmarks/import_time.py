@@ -0,0 +1,113 @@
+# benchmarks/import_time.py
+# Laporan waktu import: berapa lama worker Streamlit baru butuh sampai layar login
+# bisa tampil, dan berapa biaya tiap halaman saat pertama kali dibuka.
+#
+# Setiap target di-import di proses Python baru dengan `-X importtime`, jadi hasilnya
+# adalah waktu cold start (tanpa cache sys.modules). Jalankan dari root repo:
+#
+#     python benchmarks/import_time.py [--repeat 5] [--top 10]
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Yang di-import sebelum layar login bisa tampil
+LOGIN_PATH = ("main",)
+
+PAGE_MODULES = (
+    "app.pages.admin.dashboard",
+    "app.pages.admin.finance_management",
+    "app.pages.admin.operational_expense",
+    "app.pages.admin.cashflow_history",
+    "app.pages.admin.admin_management",
+    "app.pages.admin.staff_management",
+    "app.pages.user.view_stock",
+    "app.pages.user.register_stock",
+    "app.pages.user.stock_adjustment",
+    "app.pages.user.adjustment_history",
+    "app.pages.user.import_stock",
+    "app.pages.user.purchase",
+    "app.pages.user.purchase_history",
+    "app.pages.user.sale",
+    "app.pages.user.sales_history",
+    "app.pages.user.sales_payable",
+    "app.pages.user.purchase_return",
+    "app.pages.user.sale_return",
+    "app.pages.user.return_history",
+    "app.pages.user.view_supplier",
+    "app.pages.user.add_supplier",
+    "app.pages.user.supplier_debt",
+    "app.pages.user.view_warehouse",
+    "app.pages.user.register_warehouse",
+)
+
+_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)$")
+
+
+def measure(modules: tuple, baseline: tuple = ()) -> dict:
+    """Import `modules` di proses baru. Modul di `baseline` di-import lebih dulu dan tidak dihitung."""
+    code = "".join(f"import {m}\n" for m in baseline) + "import sys; sys.stderr.write('--start--\\n')\n"
+    code += "".join(f"import {m}\n" for m in modules)
+    env = dict(os.environ, INVENTORY_BACKEND=os.getenv("INVENTORY_BACKEND", "local"), LOCAL_DB_PATH=":memory:")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code], cwd=ROOT, env=env,
+                          capture_output=True, text=True)
+    if "--start--\n" not in proc.stderr:
+        error = (proc.stderr.strip().splitlines() or ["gagal"])[-1]
+        return {"total_ms": 0.0, "packages": {}, "error": f"baseline gagal di-import: {error}"}
+    stderr = proc.stderr.split("--start--\n", 1)[1]
+
+    total_us = 0
+    packages = {}
+    for line in stderr.splitlines():
+        match = _LINE.match(line)
+        if not match:
+            continue
+        cumulative, indent, name = int(match.group(2)), match.group(3), match.group(4)
+        # Baris tanpa indentasi tambahan adalah import tingkat atas; cumulative-nya sudah termasuk anak-anaknya
+        if len(indent) == 1:
+            total_us += cumulative
+            top = name.split(".")[0]
+            packages[top] = packages.get(top, 0) + cumulative
+    error = None
+    if proc.returncode != 0:
+        error = (proc.stderr.strip().splitlines() or ["gagal"])[-1]
+    return {"total_ms": total_us / 1000, "packages": packages, "error": error}
+
+
+def run(repeat: int, top: int):
+    print(f"Python {sys.version.split()[0]}, {repeat}x per target (median)\n")
+
+    login_runs = [measure(LOGIN_PATH) for _ in range(repeat)]
+    login_ms = statistics.median(r["total_ms"] for r in login_runs)
+    print(f"Layar login (import main): {login_ms:8.1f} ms")
+    if login_runs[0]["error"]:
+        print(f"  ! {login_runs[0]['error']}")
+    for name, us in sorted(login_runs[0]["packages"].items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"    {name:<30} {us / 1000:8.1f} ms")
+
+    eager_runs = [measure(LOGIN_PATH + PAGE_MODULES) for _ in range(repeat)]
+    eager_ms = statistics.median(r["total_ms"] for r in eager_runs)
+    print(f"\nJika semua halaman di-import di awal: {eager_ms:8.1f} ms "
+          f"(lazy menghemat {eager_ms - login_ms:.1f} ms sebelum login)\n")
+
+    print("Biaya pertama kali membuka halaman (setelah main ter-import):")
+    for module in PAGE_MODULES:
+        runs = [measure((module,), baseline=LOGIN_PATH) for _ in range(repeat)]
+        ms = statistics.median(r["total_ms"] for r in runs)
+        heaviest = sorted(runs[0]["packages"].items(), key=lambda kv: kv[1], reverse=True)[:3]
+        detail = ", ".join(f"{name} {us / 1000:.0f} ms" for name, us in heaviest)
+        note = f"  ! {runs[0]['error']}" if runs[0]["error"] else ""
+        print(f"  {module:<40} {ms:8.1f} ms  [{detail}]{note}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Laporan waktu import cold start")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10, help="jumlah package terberat yang ditampilkan")
+    args = parser.parse_args()
+    run(args.repeat, args.top)
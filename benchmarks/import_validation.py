@@ -0,0 +1,93 @@
+# benchmarks/import_validation.py
+# Perbandingan validasi file impor: validator skalar per baris (app/utils/validators.py)
+# vs ImportValidator di app/stock_import.py yang memeriksa seluruh kolom sekaligus dan
+# mencocokkan gudang/supplier lewat set.
+#
+#     python benchmarks/import_validation.py [--rows 100000] [--warehouses 50] [--repeat 3]
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.stock_import import ROW_COLUMN, SCAN_CHUNK_SIZE, ImportValidator  # noqa: E402
+from app.utils.validators import validate_price, validate_product_name, validate_quantity  # noqa: E402
+
+
+def make_rows(rows: int, warehouses: list, suppliers: list, seed: int = 1) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Nama Produk": [f"Produk {i:06d}" for i in range(rows)],
+        "Jumlah": rng.integers(0, 50, rows).astype(object),
+        "Harga Beli": rng.integers(1, 500_000, rows).astype(object),
+        "Gudang": rng.choice(warehouses + [""], rows).astype(object),
+        "Supplier": rng.choice(suppliers + [""], rows).astype(object),
+    })
+    # Sekitar 1% baris bermasalah
+    bad = rng.choice(rows, rows // 100, replace=False)
+    df.loc[bad[0::3], "Jumlah"] = "dua"
+    df.loc[bad[1::3], "Gudang"] = "Gudang Tidak Ada"
+    df.loc[bad[2::3], "Nama Produk"] = "ab"
+    df[ROW_COLUMN] = np.arange(2, rows + 2)
+    return df
+
+
+def validate_loop(df: pd.DataFrame, warehouses: list, suppliers: list) -> int:
+    """Cara per baris: validator skalar dan pencarian nama di list."""
+    warehouse_names = [w.lower() for w in warehouses]
+    errors = 0
+    for _, row in df.iterrows():
+        errors += not validate_product_name(str(row["Nama Produk"]))[0]
+        valid, _ = validate_quantity(row["Jumlah"])
+        if valid:
+            errors += not validate_price(row["Harga Beli"])[0]
+        else:
+            # Jumlah 0 boleh di file impor (hanya daftar produk)
+            errors += str(row["Jumlah"]) != "0"
+        warehouse = str(row["Gudang"]).strip().lower()
+        errors += bool(warehouse) and warehouse not in warehouse_names
+    return errors
+
+
+def validate_frame(df: pd.DataFrame, warehouses: list, suppliers: list) -> int:
+    validator = ImportValidator(warehouses, suppliers, has_default_supplier=True)
+    errors = 0
+    for start in range(0, len(df), SCAN_CHUNK_SIZE):
+        report = validator.validate(df.iloc[start:start + SCAN_CHUNK_SIZE])
+        errors += int((report["Tingkat"] == "Error").sum())
+    return errors
+
+
+def timed(func, repeat: int, *args) -> tuple:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        runs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(runs), result
+
+
+def run(rows: int, warehouse_count: int, repeat: int):
+    warehouses = [f"Gudang {i}" for i in range(warehouse_count)]
+    suppliers = [f"Supplier {i}" for i in range(200)]
+    df = make_rows(rows, warehouses, suppliers)
+    print(f"{rows:,} baris, {warehouse_count} gudang, pandas {pd.__version__}, {repeat}x (median)\n")
+
+    loop_ms, loop_errors = timed(validate_loop, repeat, df, warehouses, suppliers)
+    frame_ms, frame_errors = timed(validate_frame, repeat, df, warehouses, suppliers)
+    print(f"  per baris       {loop_ms:9.1f} ms  ({loop_errors} error)")
+    print(f"  ImportValidator {frame_ms:9.1f} ms  ({frame_errors} error, {loop_ms / frame_ms:.1f}x lebih cepat)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark validasi file impor")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--warehouses", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.rows, args.warehouses, args.repeat)
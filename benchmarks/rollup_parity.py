@@ -0,0 +1,96 @@
+# benchmarks/rollup_parity.py
+# Kecocokan dan kecepatan rollup harian (app/rollups.py) dibanding RPC rentang aslinya:
+# get_store_business_performance_v2, get_store_kpis dan get_expense_summary. Backend mengikuti
+# konfigurasi aplikasi (SUPABASE_URL/SUPABASE_KEY untuk project sungguhan, atau
+# INVENTORY_BACKEND=local); dengan --demo, database demo lokal dibuat di direktori sementara.
+# Rollup ditulis ke file sementara, jadi rollup aplikasi tidak tersentuh.
+#
+#     python benchmarks/rollup_parity.py --store "Nama Toko" [--days 7 30 365] [--repeat 5]
+#     python benchmarks/rollup_parity.py --demo
+import argparse
+import datetime
+import math
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+workdir = tempfile.mkdtemp(prefix="rollup_parity_")
+os.environ["ROLLUP_PATH"] = os.path.join(workdir, "rollups.db")
+if "--demo" in sys.argv:
+    os.environ["INVENTORY_BACKEND"] = "local"
+    os.environ["LOCAL_DB_PATH"] = os.path.join(workdir, "inventory.db")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import rollups  # noqa: E402
+from app.db import get_client  # noqa: E402
+
+DEMO_STORE = "Toko Demo"
+
+
+def timed(func, repeat: int) -> tuple:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        runs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(runs), result
+
+
+def same(expected, actual) -> bool:
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        return all(same(value, actual.get(key)) for key, value in expected.items())
+    if isinstance(expected, list) and isinstance(actual, list):
+        return len(expected) == len(actual) and all(same(e, a) for e, a in zip(expected, actual))
+    if isinstance(expected, (int, float)) and isinstance(actual, (int, float)):
+        return math.isclose(expected, actual, rel_tol=1e-9, abs_tol=0.01)
+    return expected == actual
+
+
+def run(store: str, days_list: list, repeat: int) -> bool:
+    client = get_client()
+    # Seluruh hari diambil langsung agar rollup lengkap pada pemanggilan pertama
+    rollups.ROLLUP_SYNC_DAYS = rollups.ROLLUP_MAX_DAYS
+    today = datetime.date.today()
+    end = (today + datetime.timedelta(days=1)).isoformat()
+    print(f"Toko {store}, {repeat}x (median)\n")
+    ok = True
+    for days in days_list:
+        begin = (today - datetime.timedelta(days=days)).isoformat()
+        params = {"store_input": store, "start_date": begin, "end_date": end}
+        start = time.perf_counter()
+        rollups.store_performance(store, begin, end)
+        fill_ms = (time.perf_counter() - start) * 1000
+        for rpc_name, compute in (
+            ("get_store_business_performance_v2", rollups.store_performance),
+            ("get_store_kpis", rollups.store_kpis),
+            ("get_expense_summary", rollups.expense_summary),
+        ):
+            rpc_ms, expected = timed(lambda: client.rpc(rpc_name, params).execute().data, repeat)
+            rollup_ms, actual = timed(lambda: compute(store, begin, end), repeat)
+            match = same(expected, actual)
+            ok &= match
+            print(f"  {days:>4} hari  {rpc_name:<34} RPC {rpc_ms:8.2f} ms   rollup {rollup_ms:7.2f} ms"
+                  f"{'' if match else '  ! BERBEDA'}")
+            if not match:
+                print(f"      RPC    {expected}\n      rollup {actual}")
+        print(f"  {days:>4} hari  (mengisi rollup pertama kali {fill_ms:.0f} ms)\n")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kecocokan rollup harian dengan RPC dashboard")
+    parser.add_argument("--store")
+    parser.add_argument("--demo", action="store_true", help="pakai database demo lokal")
+    parser.add_argument("--days", type=int, nargs="+", default=[7, 30, 365])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    if args.demo:
+        from app.local_backend import seed_demo_data
+        seed_demo_data(get_client()._client, DEMO_STORE, n_products=500, n_sales=20_000, days=400)
+    elif not args.store:
+        parser.error("--store wajib diisi tanpa --demo")
+    sys.exit(0 if run(args.store or DEMO_STORE, args.days, args.repeat) else 1)
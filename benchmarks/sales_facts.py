@@ -0,0 +1,69 @@
+# benchmarks/sales_facts.py
+# Produk terlaris dan lambat terjual: RPC backend lokal (GROUP BY atas tabel sale di SQLite)
+# vs tabel fakta NumPy di app/sales_facts.py, untuk beberapa panjang rentang. Database demo
+# dibuat di direktori sementara.
+#
+#     python benchmarks/sales_facts.py [--products 2000] [--sales 200000] [--repeat 20]
+import argparse
+import datetime
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+workdir = tempfile.mkdtemp(prefix="sales_facts_")
+os.environ["INVENTORY_BACKEND"] = "local"
+os.environ["LOCAL_DB_PATH"] = os.path.join(workdir, "inventory.db")
+os.environ["SALES_FACTS_PATH"] = os.path.join(workdir, "facts")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import sales_facts  # noqa: E402
+from app.db import get_client  # noqa: E402
+from app.local_backend import seed_demo_data  # noqa: E402
+
+STORE = "Toko Demo"
+
+
+def timed(func, repeat: int) -> tuple:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        runs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(runs), result
+
+
+def run(products: int, sales: int, repeat: int):
+    client = get_client()
+    seed_demo_data(client._client, STORE, n_products=products, n_sales=sales, days=730)
+    start = time.perf_counter()
+    facts = sales_facts.refresh(STORE)
+    print(f"{products:,} produk, {facts.size:,} baris penjualan, {repeat}x (median)")
+    print(f"  bangun tabel fakta {(time.perf_counter() - start) * 1000:9.1f} ms\n")
+
+    today = datetime.date.today()
+    end = (today + datetime.timedelta(days=1)).isoformat()
+    for days in (7, 90, 730):
+        begin = (today - datetime.timedelta(days=days)).isoformat()
+        params = {"store_input": STORE, "start_date": begin, "end_date": end, "limit_count": 10}
+        rpc_ms, expected = timed(lambda: client.rpc("get_top_selling_products", params).execute().data, repeat)
+        facts_ms, result = timed(lambda: sales_facts.top_selling_products(STORE, begin, end, 10), repeat)
+        assert [r["total_quantity_sold"] for r in result] == [r["total_quantity_sold"] for r in expected]
+        print(f"  terlaris {days:>4} hari   RPC {rpc_ms:8.2f} ms   fakta {facts_ms:7.2f} ms  ({rpc_ms / facts_ms:.0f}x)")
+
+    rpc_ms, expected = timed(lambda: client.rpc("get_slow_moving_products", {"store_input": STORE, "days_threshold": 60}).execute().data, repeat)
+    facts_ms, result = timed(lambda: sales_facts.slow_moving_products(STORE, 60), repeat)
+    assert [r["product_name"] for r in result] == [r["product_name"] for r in expected]
+    print(f"  lambat terjual       RPC {rpc_ms:8.2f} ms   fakta {facts_ms:7.2f} ms  ({rpc_ms / facts_ms:.0f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark tabel fakta penjualan")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--sales", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.products, args.sales, args.repeat)
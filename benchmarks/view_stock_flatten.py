@@ -0,0 +1,115 @@
+# benchmarks/view_stock_flatten.py
+# Perbandingan waktu meratakan hasil select halaman Daftar Stok: loop per produk (cara
+# lama di view_stock.py) vs flatten_stock (explode + groupby, parse tanggal sekali).
+#
+# Data dibuat acak dengan bentuk yang sama seperti respons PostgREST. Jalankan dari root repo:
+#
+#     python benchmarks/view_stock_flatten.py [--products 20000] [--repeat 5]
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.utils.stock_frame import flatten_stock  # noqa: E402
+
+
+def make_products(n: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    suppliers = [f"Supplier {i}" for i in range(40)]
+    warehouses = [f"Gudang {i}" for i in range(6)]
+    products = []
+    for pid in range(1, n + 1):
+        products.append({
+            "productid": pid,
+            "productname": f"Produk {pid:05d}",
+            "type": rng.choice(["Keramik", "Granit", "Cat", None]),
+            "size": rng.choice(["30x30", "40x40", "60x60", ""]),
+            "color": rng.choice(["Putih", "Abu", None]),
+            "brand": rng.choice(["Roman", "Asia Tile", "Platinum"]),
+            "description": None,
+            "updateat": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}T"
+                        f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}:00.{rng.randint(0, 999999):06d}+00:00",
+            "harga": rng.uniform(1000, 500000),
+            "productsupply": [
+                {"price": rng.uniform(1000, 500000), "supplier": {"suppliername": rng.choice(suppliers)}}
+                for _ in range(rng.randint(0, 3))
+            ],
+            "product_warehouse": [
+                {"quantity": rng.randint(0, 500), "warehouse_list": {"name": name}}
+                for name in rng.sample(warehouses, rng.randint(0, 3))
+            ],
+        })
+    return products
+
+
+def flatten_loop(products: list) -> pd.DataFrame:
+    """Cara lama: satu dict per produk, pd.to_datetime per baris."""
+    rows = []
+    for p in products:
+        supplies = p.get("productsupply", []) or []
+        supplier_names = set()
+        for s in supplies:
+            if s and s.get("supplier") and s["supplier"].get("suppliername"):
+                supplier_names.add(s["supplier"]["suppliername"])
+
+        avg_price = p.get("harga") or 0
+
+        warehouses = p.get("product_warehouse", []) or []
+        total_quantity = sum(w.get("quantity", 0) for w in warehouses if w)
+        warehouse_names = set()
+        for w in warehouses:
+            if w and w.get("warehouse_list") and w["warehouse_list"].get("name"):
+                warehouse_names.add(w["warehouse_list"]["name"])
+
+        rows.append({
+            "ID": p["productid"],
+            "Nama Produk": p["productname"] or "-",
+            "Jenis": p.get("type") or "-",
+            "Ukuran": p.get("size") or "-",
+            "Warna": p.get("color") or "-",
+            "Merek": p.get("brand") or "-",
+            "Harga Rata-rata": round(avg_price, 2),
+            "Total Kuantitas": total_quantity,
+            "Supplier": ", ".join(sorted(supplier_names)) if supplier_names else "-",
+            "Gudang": ", ".join(sorted(warehouse_names)) if warehouse_names else "-",
+            "Deskripsi": p.get("description") or "-",
+            "Update Terakhir": pd.to_datetime(p["updateat"]).strftime('%Y-%m-%d %H:%M') if p.get("updateat") else "-"
+        })
+    return pd.DataFrame(rows)
+
+
+def timed(func, products: list, repeat: int) -> tuple:
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(products)
+        runs.append((time.perf_counter() - start) * 1000)
+    return statistics.median(runs), result
+
+
+def run(n: int, repeat: int):
+    products = make_products(n)
+    print(f"{n} produk, pandas {pd.__version__}, {repeat}x (median)\n")
+
+    loop_ms, expected = timed(flatten_loop, products, repeat)
+    frame_ms, actual = timed(flatten_stock, products, repeat)
+    print(f"  loop per produk  {loop_ms:9.1f} ms")
+    print(f"  flatten_stock    {frame_ms:9.1f} ms  ({loop_ms / frame_ms:.1f}x lebih cepat)")
+
+    # Hasil harus sama persis (nilai, bukan dtype) dengan cara lama
+    pd.testing.assert_frame_equal(actual.astype(object), expected.astype(object), check_dtype=False)
+    print("\n  hasil identik dengan loop per produk")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark meratakan data Daftar Stok")
+    parser.add_argument("--products", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    run(args.products, args.repeat)
@@ -1,19 +1,7 @@
+import importlib
 import streamlit as st
 from app.auth import login, logout
-from app.pages.admin import dashboard as admin_dashboard
-from app.pages.admin import finance_management 
-from app.pages.admin import cashflow_history
-from app.pages.admin import admin_management
-from app.pages.admin import staff_management
-from app.pages.admin import operational_expense as admin_expense
-from app.pages.user import (
-    view_stock, register_stock, stock_adjustment, adjustment_history,
-    purchase, purchase_history, sale, sales_history, sales_payable,
-    view_supplier, add_supplier, supplier_debt,
-    view_warehouse, register_warehouse, 
-    import_stock, 
-    purchase_return, sale_return, return_history
-)
+from app.utils.profiler import QueryStats, show_performance_panel
 
 st.set_page_config(
     page_title="Sistem Inventaris Toko",
@@ -58,39 +46,57 @@ def init_session_state():
         st.session_state.username = ""
         st.session_state.role = ""
         st.session_state.store = ""
+    if 'query_stats' not in st.session_state:
+        st.session_state.query_stats = QueryStats()
 
 # Struktur Menu User
+# Setiap halaman ditulis sebagai path modul dan baru di-import saat pertama dibuka,
+# agar layar login tidak menunggu pandas, openpyxl, dll. dari semua halaman.
 USER_PAGES = {
     "Manajemen Produk": {
-        "Lihat Stok": view_stock.show,
-        "Daftarkan Produk": register_stock.show,
-        "Sesuaikan Stok": stock_adjustment.show,
-        "Riwayat Penyesuaian": adjustment_history.show,
-        "Impor dari Excel": import_stock.show,
+        "Lihat Stok": "app.pages.user.view_stock",
+        "Daftarkan Produk": "app.pages.user.register_stock",
+        "Sesuaikan Stok": "app.pages.user.stock_adjustment",
+        "Riwayat Penyesuaian": "app.pages.user.adjustment_history",
+        "Impor dari Excel": "app.pages.user.import_stock",
     },
     "Transaksi": {
-        "Pembelian": purchase.show,
-        "Riwayat Pembelian": purchase_history.show,
-        "Penjualan": sale.show,
-        "Riwayat Penjualan": sales_history.show,
-        "Piutang Pelanggan": sales_payable.show,
+        "Pembelian": "app.pages.user.purchase",
+        "Riwayat Pembelian": "app.pages.user.purchase_history",
+        "Penjualan": "app.pages.user.sale",
+        "Riwayat Penjualan": "app.pages.user.sales_history",
+        "Piutang Pelanggan": "app.pages.user.sales_payable",
     },
     "Retur": {
-        "Retur Pembelian": purchase_return.show,
-        "Retur Penjualan": sale_return.show,
-        "Riwayat Retur": return_history.show,
+        "Retur Pembelian": "app.pages.user.purchase_return",
+        "Retur Penjualan": "app.pages.user.sale_return",
+        "Riwayat Retur": "app.pages.user.return_history",
     },
     "Supplier": {
-        "Lihat Supplier": view_supplier.show,
-        "Tambah Supplier": add_supplier.show,
-        "Utang Supplier": supplier_debt.show,
+        "Lihat Supplier": "app.pages.user.view_supplier",
+        "Tambah Supplier": "app.pages.user.add_supplier",
+        "Utang Supplier": "app.pages.user.supplier_debt",
     },
     "Gudang": {
-        "Lihat Gudang": view_warehouse.show,
-        "Daftarkan Gudang": register_warehouse.show,
+        "Lihat Gudang": "app.pages.user.view_warehouse",
+        "Daftarkan Gudang": "app.pages.user.register_warehouse",
     }
 }
 
+# Struktur Menu Admin
+ADMIN_PAGES = {
+    "Dashboard Analisis": "app.pages.admin.dashboard",
+    "Keuangan": "app.pages.admin.finance_management",
+    "Biaya Operasional": "app.pages.admin.operational_expense",
+    "Laporan Kas": "app.pages.admin.cashflow_history",
+    "Manajemen Toko": "app.pages.admin.admin_management",
+    "Manajemen Pegawai": "app.pages.admin.staff_management",
+}
+
+def load_page(module_path: str):
+    """Import modul halaman (sekali per proses, selanjutnya dari sys.modules) dan kembalikan show()."""
+    return importlib.import_module(module_path).show
+
 # Fungsi Login Screen 
 def login_screen():
     col1, col2, col3 = st.columns([1, 2, 1])
@@ -121,6 +127,15 @@ def main():
     if not st.session_state.logged_in:
         login_screen()
     else:
+        # Outbox baru di-import setelah login agar layar login tetap ringan
+        from app.outbox import start_worker, show_outbox_status
+
+        # Kirim sisa antrian transaksi (juga dari sesi sebelum aplikasi restart), sekali per sesi;
+        # selanjutnya worker dibangunkan oleh setiap transaksi baru
+        if not st.session_state.get("outbox_started"):
+            start_worker()
+            st.session_state.outbox_started = True
+
         # Header Sidebar
         with st.sidebar:
             st.markdown(f"### Pengguna: {st.session_state.username}")
@@ -142,7 +157,7 @@ def main():
                 st.markdown("### Menu Admin", help="Manajemen sistem dan toko")
                 admin_menu = st.radio(
                     "Pilih Menu",
-                    ["Dashboard Analisis", "Keuangan", "Biaya Operasional", "Laporan Kas", "Manajemen Toko", "Manajemen Pegawai"],
+                    list(ADMIN_PAGES.keys()),
                     label_visibility="collapsed"
                 )
 
@@ -155,18 +170,11 @@ def main():
                     logout()
                     st.rerun()
 
-            if admin_menu == "Dashboard Analisis":
-                admin_dashboard.show()
-            elif admin_menu == "Keuangan":
-                finance_management.show()
-            elif admin_menu == "Biaya Operasional":
-                admin_expense.show()
-            elif admin_menu == "Laporan Kas":
-                cashflow_history.show()
-            elif admin_menu == "Manajemen Toko":
-                admin_management.show()
-            elif admin_menu == "Manajemen Pegawai":
-                staff_management.show()
+            query_stats = st.session_state.query_stats
+            with query_stats.rerun(f"Admin/{admin_menu}", user=st.session_state.username):
+                load_page(ADMIN_PAGES[admin_menu])()
+
+            show_performance_panel(query_stats)
         
         elif st.session_state.role == 'pegawai':
             # Staff Menu
@@ -186,7 +194,7 @@ def main():
                         label_visibility="collapsed",
                         key=f"submenu_{main_menu}"
                     )
-                    page_function = USER_PAGES[main_menu][submenu]
+                    page_path = USER_PAGES[main_menu][submenu]
 
             # Header halaman staff
             col_title, col_logout = st.columns([8, 1])
@@ -198,7 +206,10 @@ def main():
                     st.rerun()
             
             st.divider()
-            page_function()
+            with st.session_state.query_stats.rerun(f"{main_menu}/{submenu}", user=st.session_state.username, store=st.session_state.store):
+                load_page(page_path)()
+
+            show_outbox_status(st.session_state.store)
 
 if __name__ == "__main__":
     main()